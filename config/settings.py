@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -91,6 +92,30 @@ DATABASES = {
 }
 
 
+# Cache. Check-in codes and repeat check-ins, report rosters, exam payloads,
+# question orders and attempt deadlines are kept here, so with more than one
+# worker process it has to be shared: set REDIS_URL (needs the redis
+# package). Without it every process keeps its own LocMemCache, sized well
+# above Django's default of 300 entries so a class's check-in working set
+# stays resident, and each process warms and invalidates only its own copy.
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "learnevo",
+            "OPTIONS": {"MAX_ENTRIES": 100000},
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -140,6 +165,74 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"    
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+STORAGES = {
+    "default": {
+        "BACKEND": "courses.utils.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
+# Background PDF rendering (courses/utils/pdf_service.py)
+PDF_CACHE_DIR = BASE_DIR / "pdf_cache"
+PDF_CACHE_TIMEOUT = 60 * 10  # also how long files stay on disk; see purge_pdf_cache
+PDF_RENDER_TIMEOUT = 60 * 5
+PDF_RENDER_WORKERS = 2
+PDF_CHUNK_ROWS = 250
+
+# Chunked submission uploads (courses/uploads.py)
+UPLOAD_CHUNK_DIR = BASE_DIR / "upload_chunks"
+UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+SUBMISSION_MAX_UPLOAD_MB = 50
+
+# Reports dashboard listing cache (courses/reports.py); bounds staleness when
+# the cache is per-process.
+REPORTS_DASHBOARD_CACHE_TIMEOUT = 60 * 5
+
+# Student self check-in (courses/checkin.py). Repeat check-ins are answered
+# from one cache key per student; see CACHES above.
+CHECKIN_GRACE_MINUTES = 5
+CHECKIN_BATCH_SIZE = 200
+CHECKIN_FLUSH_INTERVAL = 0.05
+CHECKIN_CACHE_TIMEOUT = 60 * 15
+
+# Early-warning risk score (courses/rollups.py): weights of missed attendance
+# and of a low grade average.
+RISK_ATTENDANCE_WEIGHT = 0.6
+RISK_GRADE_WEIGHT = 0.4
+
+# Session report cache (courses/reports.py), shared by the HTML, PDF and
+# spreadsheet outputs.
+REPORTS_SESSION_CACHE_TIMEOUT = 60 * 10
+
+# Cached question order and single-page exam payload per exam
+# (exams/ordering.py, exams/delivery.py).
+EXAM_ORDER_CACHE_TIMEOUT = 60 * 15
+EXAM_PAYLOAD_CACHE_TIMEOUT = 60 * 15
+
+# Item analysis cache per exam (exams/analysis.py); answer writes through
+# exams/answers.py and question/choice edits drop it sooner.
+EXAM_ANALYSIS_CACHE_TIMEOUT = 60 * 60
+
+# Exam starts (exams/attempts.py) are group-committed like check-ins.
+# ``manage.py provision_exams`` should run shortly before exams open.
+EXAM_START_BATCH_SIZE = 200
+EXAM_START_FLUSH_INTERVAL = 0.05
+
+# Exam deadlines (exams/attempts.py): answers arriving up to the grace period
+# after an attempt's deadline are still saved; ``manage.py sweep_exams``
+# should run every minute to submit attempts nobody finished.
+EXAM_DEADLINE_GRACE_SECONDS = 30
+EXAM_DEADLINE_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Near-duplicate detection (courses/similarity.py): pairs at or above this
+# estimated similarity are flagged; shorter texts are left out of reports.
+SIMILARITY_THRESHOLD = 0.8
+SIMILARITY_MIN_WORDS = 30
+
+# Exam question import (exams/interchange.py): largest file accepted inside
+# an uploaded ZIP, media or the exam file itself.
+EXAM_IMPORT_MAX_FILE_BYTES = 50 * 1024 * 1024
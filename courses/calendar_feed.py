@@ -0,0 +1,255 @@
+"""
+Per-user calendar of sessions, exam windows and assignment due dates.
+
+Each source is a queryset scoped to the user's classes and ordered by its
+indexed time column; ``events`` streams them with ``.iterator()`` and merges
+them with ``heapq.merge``, so a window is produced in order without loading
+or sorting the sources together. Calendar clients subscribe to an iCalendar
+feed addressed by a signed per-user token. The token carries the user's
+``CalendarFeedKey``, so rotating the key revokes every copy of the old URL;
+its ETag is built from a few
+aggregate queries, so an unchanged feed is answered with a 304 without
+rendering anything.
+"""
+import hashlib
+import heapq
+import secrets
+from datetime import timedelta, timezone as dt_timezone
+from typing import NamedTuple
+
+from django.core import signing
+from django.db.models import Count, Max, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Assignment, CalendarFeedKey, Classroom, Session
+
+
+FEED_SALT = "courses.calendar_feed"
+FEED_PAST_DAYS = 30
+FEED_FUTURE_DAYS = 180
+MAX_WINDOW_DAYS = 62
+
+KIND_SESSION = "session"
+KIND_EXAM = "exam"
+KIND_DUE = "due"
+
+
+class CalendarEvent(NamedTuple):
+    start: object
+    end: object
+    kind: str
+    title: str
+    context: str
+    url: str
+    uid: str
+
+
+def _exam_model():
+    from exams.models import Exam
+    return Exam
+
+
+def scoped_sources(user):
+    """Return the session, exam and assignment querysets ``user`` may see."""
+    Exam = _exam_model()
+    sessions = Session.objects.filter(start_time__isnull=False)
+    exams = Exam.objects.all()
+    assignments = Assignment.objects.filter(due_date__isnull=False)
+
+    role = getattr(user, "role", None)
+    if role in ["manager", "employee"]:
+        return sessions, exams, assignments
+
+    if role == "instructor":
+        classes = Classroom.objects.filter(instructor=user)
+        exams = exams.filter(Q(instructor=user) | Q(course__classes__in=classes)).distinct()
+    else:
+        classes = Classroom.objects.filter(students=user)
+        exams = exams.filter(course__classes__in=classes).distinct()
+        assignments = assignments.filter(is_published=True)
+
+    return (
+        sessions.filter(classroom__in=classes),
+        exams,
+        assignments.filter(course__classes__in=classes).distinct(),
+    )
+
+
+def _session_events(queryset, start, end):
+    rows = (
+        queryset.filter(start_time__gte=start, start_time__lt=end)
+        .order_by("start_time", "pk")
+        .values_list("pk", "title", "start_time", "end_time", "classroom__title")
+    )
+    for pk, title, begins, ends, classroom in rows.iterator():
+        yield CalendarEvent(
+            begins, ends, KIND_SESSION, title, classroom,
+            reverse("courses:session_detail", args=[pk]), f"session-{pk}",
+        )
+
+
+def _exam_events(queryset, start, end, for_student=False):
+    rows = (
+        queryset.filter(start_time__gte=start, start_time__lt=end)
+        .order_by("start_time", "pk")
+        .values_list("pk", "title", "start_time", "end_time", "course__title")
+    )
+    # Students have no exam detail page; their exams are started from the list.
+    list_url = reverse("exams:exam_list")
+    for pk, title, begins, ends, course in rows.iterator():
+        yield CalendarEvent(
+            begins, ends, KIND_EXAM, title, course or "",
+            list_url if for_student else reverse("exams:exam_detail", args=[pk]), f"exam-{pk}",
+        )
+
+
+def _due_events(queryset, start, end):
+    rows = (
+        queryset.filter(due_date__gte=start, due_date__lt=end)
+        .order_by("due_date", "pk")
+        .values_list("pk", "title", "due_date", "course__title")
+    )
+    for pk, title, due, course in rows.iterator():
+        yield CalendarEvent(
+            due, None, KIND_DUE, f"Due: {title}", course,
+            reverse("courses:assignment_detail", args=[pk]), f"assignment-{pk}",
+        )
+
+
+def events(user, start, end):
+    """Lazily yield ``user``'s events starting in ``[start, end)``, in time order."""
+    sessions, exams, assignments = scoped_sources(user)
+    return heapq.merge(
+        _session_events(sessions, start, end),
+        _exam_events(exams, start, end, for_student=getattr(user, "role", None) == "student"),
+        _due_events(assignments, start, end),
+        key=lambda event: (event.start, event.kind, event.uid),
+    )
+
+
+def window(start=None, days=14):
+    """Clamp a requested window; returns ``(start, end, days)``."""
+    days = max(1, min(int(days), MAX_WINDOW_DAYS))
+    if start is None:
+        start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(days=days), days
+
+
+# iCalendar feed
+
+def _new_key():
+    return secrets.token_urlsafe(16)
+
+
+def feed_token(user):
+    feed_key, _ = CalendarFeedKey.objects.get_or_create(user=user, defaults={"key": _new_key()})
+    return signing.Signer(salt=FEED_SALT).sign(f"{user.pk}:{feed_key.key}")
+
+
+def rotate_feed_key(user):
+    """Give ``user`` a new feed key; URLs carrying the old one stop working."""
+    CalendarFeedKey.objects.update_or_create(user=user, defaults={"key": _new_key()})
+
+
+def user_from_token(token):
+    """The active user whose current feed key ``token`` carries, or ``None``."""
+    try:
+        pk, key = signing.Signer(salt=FEED_SALT).unsign(token).split(":", 1)
+        pk = int(pk)
+    except (signing.BadSignature, ValueError):
+        return None
+    feed_key = CalendarFeedKey.objects.select_related("user").filter(user_id=pk, user__is_active=True).first()
+    if feed_key is None or not secrets.compare_digest(feed_key.key, key):
+        return None
+    return feed_key.user
+
+
+def feed_window():
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=FEED_PAST_DAYS), today + timedelta(days=FEED_FUTURE_DAYS)
+
+
+def feed_etag(user):
+    """
+    A fingerprint of everything the feed would contain: the row count and the
+    last modification of each scoped source and of the classrooms or courses
+    whose titles its events show, plus the day (the window slides). Deletions
+    change a count, edits change a timestamp.
+    """
+    start, end = feed_window()
+    sessions, exams, assignments = scoped_sources(user)
+    parts = [user.pk, start.date().isoformat()]
+    for queryset, field, parent in (
+        (sessions, "start_time", "classroom"),
+        (exams, "start_time", "course"),
+        (assignments, "due_date", "course"),
+    ):
+        stats = (
+            queryset.filter(**{f"{field}__gte": start, f"{field}__lt": end})
+            .order_by()
+            .aggregate(
+                n=Count("pk", distinct=True),
+                changed=Max("updated_at"),
+                parent_changed=Max(f"{parent}__updated_at"),
+            )
+        )
+        parts += [stats["n"], stats["changed"], stats["parent_changed"]]
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def _ics_escape(value):
+    return (
+        str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _ics_time(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _fold(line):
+    """Fold a content line at 75 octets as RFC 5545 requires."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line
+    pieces, current = [], b""
+    for char in line:
+        data = char.encode("utf-8")
+        if len(current) + len(data) > (75 if not pieces else 74):
+            pieces.append(current.decode("utf-8"))
+            current = b""
+        current += data
+    pieces.append(current.decode("utf-8"))
+    return "\r\n ".join(pieces)
+
+
+def render_ics(user, base_url, host):
+    start, end = feed_window()
+    stamp = _ics_time(timezone.now())
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Learnevo//Calendar//EN",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_ics_escape('Learnevo')}",
+    ]
+    for event in events(user, start, end):
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{event.uid}@{host}",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_ics_time(event.start)}",
+        ]
+        if event.end and event.end > event.start:
+            lines.append(f"DTEND:{_ics_time(event.end)}")
+        lines += [
+            f"SUMMARY:{_ics_escape(event.title)}",
+            f"DESCRIPTION:{_ics_escape(event.context)}",
+            f"CATEGORIES:{event.kind.upper()}",
+            f"URL:{base_url}{event.url}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(_fold(line) for line in lines) + "\r\n"
@@ -0,0 +1,230 @@
+"""
+Student self check-in.
+
+An instructor opens check-in on a session, which gives it a short code; for
+the first minutes of the lecture every enrolled student submits that code.
+The request path reads nothing from the database in the common case: the
+session (classroom, times, code) and the set of enrolled student ids are
+cached, and a repeated check-in is answered from a per-student cache key.
+
+Writes are group-committed. Each request hands its row to the process-wide
+``GroupCommit`` and waits; the first waiter becomes the leader, collects
+rows for up to ``CHECKIN_FLUSH_INTERVAL`` seconds (or until
+``CHECKIN_BATCH_SIZE`` are queued) and writes them all in one transaction,
+so a burst of check-ins costs a few INSERTs instead of one transaction each,
+and every request still returns only after its row is stored.
+
+A batch is an upsert that never overrides an instructor: new rows are
+inserted with ``bulk_create(ignore_conflicts=True)`` and rows the instructor
+pre-filled as absent are upgraded with one UPDATE per status. Present, late
+and excused rows are left alone. Only a session's first batch touches the
+reports dashboard, which shows whether a session has attendance, not how much.
+"""
+import datetime
+import secrets
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import enrollment, reports, rollups
+from .models import Attendance, Session
+from .utils.group_commit import GroupCommit
+
+
+OK = "ok"
+ALREADY_CHECKED_IN = "already_checked_in"
+CLOSED = "closed"
+BAD_CODE = "bad_code"
+NOT_ENROLLED = "not_enrolled"
+
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 6
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _cache_timeout():
+    return _setting("CHECKIN_CACHE_TIMEOUT", 60 * 15)
+
+
+# session and roster lookups
+
+def _session_key(session_id):
+    return f"checkin:session:{session_id}"
+
+
+def _roster_key(classroom_id):
+    return f"checkin:roster:{classroom_id}"
+
+
+def _done_key(session_id, student_id):
+    return f"checkin:done:{session_id}:{student_id}"
+
+
+def _dashboard_key(session_id):
+    return f"checkin:dashboard:{session_id}"
+
+
+def session_info(session_id):
+    """``(classroom_id, start_time, end_time, checkin_code)`` or None, cached."""
+    key = _session_key(session_id)
+    info = cache.get(key)
+    if info is None:
+        row = (
+            Session.objects.filter(pk=session_id)
+            .values_list("classroom_id", "start_time", "end_time", "checkin_code")
+            .first()
+        )
+        # Cache misses too, so probing unknown ids doesn't reach the database.
+        info = row or ()
+        cache.set(key, info, _cache_timeout())
+    return info or None
+
+
+def forget_session(session_id):
+    cache.delete(_session_key(session_id))
+
+
+def _enrolled_ids(classroom_id):
+    key = _roster_key(classroom_id)
+    ids = cache.get(key)
+    if ids is None:
+        Through, classroom_field, student_field = enrollment._through()
+        ids = frozenset(
+            Through.objects.filter(**{f"{classroom_field}_id": classroom_id})
+            .values_list(f"{student_field}_id", flat=True)
+        )
+        cache.set(key, ids, _cache_timeout())
+    return ids
+
+
+def is_enrolled(classroom_id, student_id):
+    if student_id in _enrolled_ids(classroom_id):
+        return True
+    # The cache is per process; another worker may have enrolled the student
+    # since this copy was built. Only misses pay for the check.
+    Through, classroom_field, student_field = enrollment._through()
+    if Through.objects.filter(**{f"{classroom_field}_id": classroom_id, f"{student_field}_id": student_id}).exists():
+        forget_roster(classroom_id)
+        return True
+    return False
+
+
+def forget_roster(classroom_id):
+    cache.delete(_roster_key(classroom_id))
+
+
+# opening and closing
+
+def new_code():
+    return "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+
+
+def open_checkin(session):
+    session.checkin_code = new_code()
+    Session.objects.filter(pk=session.pk).update(checkin_code=session.checkin_code)
+    forget_session(session.pk)
+    cache.delete(_dashboard_key(session.pk))
+    return session.checkin_code
+
+
+def close_checkin(session):
+    session.checkin_code = ""
+    Session.objects.filter(pk=session.pk).update(checkin_code="")
+    forget_session(session.pk)
+
+
+def status_for(start_time, now):
+    """PRESENT within the grace period after ``start_time``, LATE after it."""
+    grace = datetime.timedelta(minutes=_setting("CHECKIN_GRACE_MINUTES", 5))
+    if start_time is None or now <= start_time + grace:
+        return Attendance.STATUS_PRESENT
+    return Attendance.STATUS_LATE
+
+
+# batched writes
+
+def write_batch(rows):
+    """
+    Store ``rows`` of ``(session_id, student_id, status)`` in one transaction
+    without overwriting a status an instructor has already set.
+    """
+    if not rows:
+        return
+    with transaction.atomic():
+        Attendance.objects.bulk_create(
+            [
+                Attendance(session_id=session_id, student_id=student_id, status=status, marked_by_id=student_id)
+                for session_id, student_id, status in rows
+            ],
+            ignore_conflicts=True,
+        )
+        groups = {}
+        for session_id, student_id, status in rows:
+            groups.setdefault((session_id, status), []).append(student_id)
+        for (session_id, status), student_ids in groups.items():
+            Attendance.objects.filter(
+                session_id=session_id, student_id__in=student_ids, status=Attendance.STATUS_ABSENT,
+            ).update(status=status, marked_by_id=F("student_id"), marked_at=timezone.now())
+        # bulk_create and update() send no signals.
+        session_ids = {session_id for session_id, _, _ in rows}
+        for session_id in session_ids:
+            rollups.rebuild_for_sessions([session_id], [student_id for s, student_id, _ in rows if s == session_id])
+    first_batches = [cache.add(_dashboard_key(session_id), True, _cache_timeout()) for session_id in session_ids]
+    if any(first_batches):
+        reports.invalidate_dashboard()
+    for session_id in session_ids:
+        reports.invalidate_session_report(session_id)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def batcher():
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = GroupCommit(
+                write_batch,
+                max_batch=_setting("CHECKIN_BATCH_SIZE", 200),
+                max_delay=_setting("CHECKIN_FLUSH_INTERVAL", 0.05),
+            )
+        return _batcher
+
+
+def check_in(session_id, student_id, code, now=None):
+    """
+    Record ``student_id`` as present or late for ``session_id``.
+    Returns ``(result, status)``; ``status`` is None unless the student is
+    (or already was) checked in.
+    """
+    info = session_info(session_id)
+    if info is None:
+        return CLOSED, None
+    classroom_id, start_time, end_time, open_code = info
+    now = now or timezone.now()
+    if not open_code or (end_time is not None and now > end_time):
+        return CLOSED, None
+    if not secrets.compare_digest(code.strip().upper(), open_code):
+        return BAD_CODE, None
+    if not is_enrolled(classroom_id, student_id):
+        return NOT_ENROLLED, None
+
+    status = status_for(start_time, now)
+    key = _done_key(session_id, student_id)
+    if not cache.add(key, status, _cache_timeout()):
+        return ALREADY_CHECKED_IN, cache.get(key, status)
+
+    try:
+        batcher().submit((session_id, student_id, status))
+    except Exception:
+        cache.delete(key)
+        raise
+    return OK, status
@@ -0,0 +1,111 @@
+"""
+Deep copy of a course for a new term.
+
+The graph is copied one level at a time: every classroom in one
+``bulk_create``, then every session, assignment, exam, question and choice,
+each level remapping its foreign keys through an ``{old_pk: new_pk}`` dict
+built from the previous level. The number of queries therefore depends on
+the depth of the graph, not on how many rows it has.
+
+Dates move by ``shift``. Enrollments, waitlists, attendance, submissions,
+grades and exam answers/results are per-term data and are not copied. File
+fields (assignment attachments, question media) keep pointing at the same
+stored file, which is released only once no row names it any more (see
+the FileField hooks in ``courses.signals``).
+"""
+from django.db import transaction
+
+from . import reports
+from .models import Assignment, Classroom, Course, Session
+
+
+def _shifted(value, shift):
+    return value + shift if value is not None else None
+
+
+def _copy(instance, exclude=(), **overrides):
+    """An unsaved copy of ``instance``'s concrete fields, without the pk."""
+    values = {
+        f.attname: getattr(instance, f.attname)
+        for f in instance._meta.concrete_fields
+        if not f.primary_key and f.name not in exclude
+    }
+    values.update(overrides)
+    return type(instance)(**values)
+
+
+def _bulk_copy(originals, make):
+    """Create ``make(original)`` for each row; returns ``{old_pk: new_pk}``."""
+    if not originals:
+        return {}
+    clones = [make(original) for original in originals]
+    model = type(clones[0])
+    model.objects.bulk_create(clones, batch_size=500)
+    return {original.pk: clone.pk for original, clone in zip(originals, clones)}
+
+
+def clone_course(course, shift, title=None, include_exams=True):
+    """
+    Copy ``course`` with its classrooms, sessions, assignments and (optionally)
+    exams, moving every date and time by the ``timedelta`` ``shift``.
+    Returns the new Course.
+    """
+    from exams.models import Choice, Exam, Question
+
+    with transaction.atomic():
+        new_course = Course.objects.create(
+            title=title or course.title,
+            description=course.description,
+        )
+
+        classrooms = list(Classroom.objects.filter(course=course).order_by("pk"))
+        sessions = list(Session.objects.filter(classroom__course=course).order_by("pk"))
+        sessions_per_class = {}
+        for session in sessions:
+            sessions_per_class[session.classroom_id] = sessions_per_class.get(session.classroom_id, 0) + 1
+
+        classroom_map = _bulk_copy(classrooms, lambda c: _copy(
+            c, exclude=("created_at", "updated_at"),
+            course_id=new_course.pk,
+            start_date=_shifted(c.start_date, shift),
+            end_date=_shifted(c.end_date, shift),
+            student_count=0,
+            session_count=sessions_per_class.get(c.pk, 0),
+        ))
+
+        session_map = _bulk_copy(sessions, lambda s: _copy(
+            s, exclude=("created_at", "updated_at"),
+            classroom_id=classroom_map[s.classroom_id],
+            start_time=_shifted(s.start_time, shift),
+            end_time=_shifted(s.end_time, shift),
+            # A copied check-in code would already be live in the new term.
+            checkin_code="",
+        ))
+
+        assignments = list(Assignment.objects.filter(course=course).order_by("pk"))
+        _bulk_copy(assignments, lambda a: _copy(
+            a, exclude=("created_at", "updated_at"),
+            course_id=new_course.pk,
+            session_id=session_map.get(a.session_id),
+            due_date=_shifted(a.due_date, shift),
+            submission_count=0,
+            graded_count=0,
+        ))
+
+        if include_exams:
+            exams = list(Exam.objects.filter(course=course).order_by("pk"))
+            exam_map = _bulk_copy(exams, lambda e: _copy(
+                e, exclude=("created_at", "updated_at"),
+                course_id=new_course.pk,
+                start_time=_shifted(e.start_time, shift),
+                end_time=_shifted(e.end_time, shift),
+            ))
+            questions = list(Question.objects.filter(exam__course=course).order_by("pk"))
+            question_map = _bulk_copy(questions, lambda q: _copy(q, exam_id=exam_map[q.exam_id]))
+            choices = list(Choice.objects.filter(question__exam__course=course).order_by("pk"))
+            _bulk_copy(choices, lambda c: _copy(c, question_id=question_map[c.question_id]))
+
+        # bulk_create sends no post_save, so nothing else saw the new sessions.
+        transaction.on_commit(reports.invalidate_dashboard)
+
+    return new_course
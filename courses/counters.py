@@ -0,0 +1,68 @@
+"""
+Denormalized counters on Classroom and Assignment.
+
+``Classroom.student_count``, ``Classroom.session_count``,
+``Assignment.submission_count`` and ``Assignment.graded_count`` are kept in
+step by the handlers in ``courses.signals`` and ``grades.signals``, so list
+pages can show them without a COUNT query per row. The ``refresh_*`` helpers
+recompute them from the source tables in a single UPDATE each; they back the
+signal handlers where an exact delta is not known and the ``repair_counters``
+management command.
+"""
+from django.apps import apps
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Assignment, Classroom, Session, Submission
+
+
+def _count_of(queryset, field):
+    """A correlated ``COUNT(*)`` over ``queryset`` grouped by ``field``."""
+    counted = (
+        queryset.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def _scope(queryset, ids):
+    return queryset if ids is None else queryset.filter(pk__in=list(ids))
+
+
+def refresh_student_counts(classroom_ids=None):
+    Through = Classroom.students.through
+    return _scope(Classroom.objects.all(), classroom_ids).update(
+        student_count=_count_of(Through.objects.all(), "classroom_id")
+    )
+
+
+def refresh_session_counts(classroom_ids=None):
+    return _scope(Classroom.objects.all(), classroom_ids).update(
+        session_count=_count_of(Session.objects.all(), "classroom_id")
+    )
+
+
+def refresh_submission_counts(assignment_ids=None):
+    return _scope(Assignment.objects.all(), assignment_ids).update(
+        submission_count=_count_of(Submission.objects.all(), "assignment_id")
+    )
+
+
+def refresh_graded_counts(assignment_ids=None):
+    Grade = apps.get_model("grades", "Grade")
+    return _scope(Assignment.objects.all(), assignment_ids).update(
+        graded_count=_count_of(Grade.objects.filter(graded_at__isnull=False), "assignment_id")
+    )
+
+
+def repair_all():
+    """Recompute every counter; returns the number of rows touched per counter."""
+    return {
+        "student_count": refresh_student_counts(),
+        "session_count": refresh_session_counts(),
+        "submission_count": refresh_submission_counts(),
+        "graded_count": refresh_graded_counts(),
+    }
@@ -0,0 +1,236 @@
+"""
+Classroom enrollment helpers.
+
+Seats are claimed through ``Classroom.student_count``: a student only gets a
+seat if a conditional ``UPDATE ... SET student_count = student_count + 1
+WHERE student_count < capacity`` touches the classroom row. The database
+serializes concurrent claims on that one row, so the limit holds without a
+lock around the whole request, and sign-ups for other classes are not held up
+at all. A student who finds the class full joins its waitlist and is promoted
+in order when a seat frees up.
+
+Roster imports write straight to the ``Classroom.students`` through table with
+``bulk_create(ignore_conflicts=True)``: emails are resolved in one ``IN``
+query per batch and no per-row ``m2m_changed`` or ``post_save`` work runs.
+Because of that, every write here maintains ``student_count`` itself.
+"""
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Lower
+
+from . import checkin, reports
+from .models import Classroom, WaitlistEntry
+
+
+# Keeps every IN (...) below SQLite's bound-parameter limit.
+LOOKUP_BATCH = 5000
+INSERT_BATCH = 2000
+
+ENROLLED = "enrolled"
+WAITLISTED = "waitlisted"
+ALREADY_ENROLLED = "already_enrolled"
+ALREADY_WAITLISTED = "already_waitlisted"
+
+
+def _through():
+    field = Classroom._meta.get_field("students")
+    return field.remote_field.through, field.m2m_field_name(), field.m2m_reverse_field_name()
+
+
+def _link(classroom, student):
+    Through, classroom_field, student_field = _through()
+    return Through, {f"{classroom_field}_id": classroom.pk, f"{student_field}_id": student.pk}
+
+
+def _forget_roster(classroom_id):
+    checkin.forget_roster(classroom_id)
+    reports.invalidate_roster(classroom_id)
+
+
+def _roster_changed(classroom):
+    # Through-table writes send no m2m_changed; drop the cached rosters.
+    transaction.on_commit(lambda: _forget_roster(classroom.pk))
+
+
+def _claim_seat(classroom):
+    """Take one seat if the class has room; returns True on success."""
+    has_room = Q(capacity__isnull=True) | Q(student_count__lt=F("capacity"))
+    return bool(
+        Classroom.objects.filter(has_room, pk=classroom.pk)
+        .update(student_count=F("student_count") + 1)
+    )
+
+
+def _release_seat(classroom):
+    Classroom.objects.filter(pk=classroom.pk, student_count__gt=0).update(student_count=F("student_count") - 1)
+
+
+def enroll(classroom, student):
+    """
+    Enroll ``student`` if a seat is free, otherwise put them on the waitlist.
+    Returns one of ENROLLED, WAITLISTED, ALREADY_ENROLLED or ALREADY_WAITLISTED.
+    """
+    Through, link = _link(classroom, student)
+    if Through.objects.filter(**link).exists():
+        return ALREADY_ENROLLED
+
+    try:
+        with transaction.atomic():
+            claimed = _claim_seat(classroom)
+            if claimed:
+                # A double submit races to here; the unique constraint on the
+                # through table rejects the second one and rolls its seat back.
+                Through.objects.create(**link)
+                WaitlistEntry.objects.filter(classroom=classroom, student=student).delete()
+    except IntegrityError:
+        return ALREADY_ENROLLED
+    if claimed:
+        _roster_changed(classroom)
+        return ENROLLED
+
+    _, created = WaitlistEntry.objects.get_or_create(classroom=classroom, student=student)
+    return WAITLISTED if created else ALREADY_WAITLISTED
+
+
+def _promote_waitlisted(classroom):
+    """Move students from the head of the waitlist into free seats."""
+    promoted = []
+    while True:
+        entry = (
+            WaitlistEntry.objects
+            .select_for_update(skip_locked=True)
+            .filter(classroom=classroom)
+            .select_related("student")
+            .first()
+        )
+        if entry is None or not _claim_seat(classroom):
+            return promoted
+        entry.delete()
+        Through, link = _link(classroom, entry.student)
+        try:
+            with transaction.atomic():
+                Through.objects.create(**link)
+        except IntegrityError:
+            # Enrolled by other means while waiting; give the seat back.
+            _release_seat(classroom)
+            continue
+        promoted.append(entry.student)
+
+
+def fill_from_waitlist(classroom):
+    """Promote waitlisted students into any free seats, e.g. after capacity grew."""
+    with transaction.atomic():
+        promoted = _promote_waitlisted(classroom)
+        if promoted:
+            _roster_changed(classroom)
+        return promoted
+
+
+def withdraw(classroom, student):
+    """
+    Remove ``student`` from the class or its waitlist. A freed seat goes to
+    the next waitlisted student; returns the students who were promoted.
+    """
+    Through, link = _link(classroom, student)
+    with transaction.atomic():
+        removed, _ = Through.objects.filter(**link).delete()
+        if not removed:
+            WaitlistEntry.objects.filter(classroom=classroom, student=student).delete()
+            return []
+        _release_seat(classroom)
+        _roster_changed(classroom)
+        return _promote_waitlisted(classroom)
+
+
+def waitlist_position(classroom, student):
+    entry = WaitlistEntry.objects.filter(classroom=classroom, student=student).first()
+    if entry is None:
+        return None
+    return WaitlistEntry.objects.filter(
+        Q(created_at__lt=entry.created_at) | Q(created_at=entry.created_at, pk__lt=entry.pk),
+        classroom=classroom,
+    ).count() + 1
+
+
+def parse_roster_csv(file_obj):
+    """
+    Return the unique emails of an uploaded CSV, lowercased and in file order.
+    Uses the ``email`` column when there is a header row, otherwise the first
+    column.
+    """
+    text = io.TextIOWrapper(file_obj, encoding="utf-8-sig", newline="")
+    rows = csv.reader(text)
+    emails, seen = [], set()
+    column = 0
+    for index, row in enumerate(rows):
+        if not row:
+            continue
+        if index == 0:
+            header = [cell.strip().lower() for cell in row]
+            if "email" in header:
+                column = header.index("email")
+                continue
+        if column >= len(row):
+            continue
+        email = row[column].strip().lower()
+        if email and "@" in email and email not in seen:
+            seen.add(email)
+            emails.append(email)
+    return emails
+
+
+def import_roster(classroom, emails):
+    """
+    Enroll every student in ``emails`` into ``classroom``.
+
+    Runs in one transaction with the classroom row locked, so concurrent
+    imports cannot push enrollment past ``capacity``; an import that would
+    overflow is rejected as a whole. ``emails`` are matched case-insensitively
+    and must already be lowercased. Returns the emails that were added, already
+    enrolled, or not matched to a student account.
+    """
+    User = get_user_model()
+    Through, classroom_field, student_field = _through()
+
+    ids_by_email = {}
+    for start in range(0, len(emails), LOOKUP_BATCH):
+        batch = emails[start:start + LOOKUP_BATCH]
+        ids_by_email.update(
+            User.objects
+            .annotate(email_lower=Lower("email"))
+            .filter(email_lower__in=batch, role="student")
+            .values_list("email_lower", "id")
+        )
+    unknown = [e for e in emails if e not in ids_by_email]
+
+    with transaction.atomic():
+        classroom = Classroom.objects.select_for_update().get(pk=classroom.pk)
+        enrolled_ids = set(
+            Through.objects.filter(**{classroom_field: classroom}).values_list(f"{student_field}_id", flat=True)
+        )
+        already = [e for e in emails if ids_by_email.get(e) in enrolled_ids]
+        added = [e for e in emails if e in ids_by_email and ids_by_email[e] not in enrolled_ids]
+
+        if classroom.capacity is not None and len(enrolled_ids) + len(added) > classroom.capacity:
+            raise ValidationError(
+                f"Import would enroll {len(enrolled_ids) + len(added)} students "
+                f"but the class capacity is {classroom.capacity}."
+            )
+
+        Through.objects.bulk_create(
+            [Through(**{f"{classroom_field}_id": classroom.pk, f"{student_field}_id": ids_by_email[e]}) for e in added],
+            batch_size=INSERT_BATCH,
+            ignore_conflicts=True,
+        )
+        Classroom.objects.filter(pk=classroom.pk).update(student_count=len(enrolled_ids) + len(added))
+        _roster_changed(classroom)
+        added_ids = [ids_by_email[e] for e in added]
+        for start in range(0, len(added_ids), LOOKUP_BATCH):
+            WaitlistEntry.objects.filter(classroom=classroom, student_id__in=added_ids[start:start + LOOKUP_BATCH]).delete()
+
+    return {"added": added, "already_enrolled": already, "unknown": unknown}
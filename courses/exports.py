@@ -0,0 +1,143 @@
+"""
+Spreadsheet exports: the class attendance matrix, class rosters and the
+submissions of an assignment.
+
+Each function returns ``(header, rows)`` where ``rows`` is a lazy generator
+over ``values_list(...).iterator(chunk_size=...)``, ready for
+``utils.table_export.export_response``. Nothing is loaded up front except
+what is per-column (a class's sessions); the attendance matrix fetches the
+marks of one chunk of students at a time.
+"""
+from itertools import islice
+
+from django.apps import apps
+from django.db.models import BooleanField, Case, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+from . import rollups
+from .models import Attendance, Session, Submission
+
+
+CHUNK_SIZE = 2000
+
+STUDENT_ORDER = ("first_name", "last_name", "pk")
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _full_name(first_name, last_name):
+    return f"{first_name or ''} {last_name or ''}".strip()
+
+
+def attendance_matrix(classroom, now=None):
+    """
+    One row per enrolled student and one column per session, as on the class
+    report: a session held without a mark counts as absent, one still to come
+    is left blank. The rate is ``rollups.attendance_rate``, as on the
+    early-warning page.
+    """
+    now = now or timezone.now()
+    sessions = list(
+        Session.objects.filter(classroom=classroom).order_by("start_time", "pk").values_list("pk", "title", "start_time")
+    )
+    header = ["Student", "Email"]
+    header += [
+        f"{start:%Y-%m-%d %H:%M} {title}" if start else title
+        for _, title, start in sessions
+    ]
+    header += ["Present", "Late", "Excused", "Absent", "Attendance %"]
+    session_ids = [pk for pk, _, _ in sessions]
+    held = {pk for pk, _, start in sessions if start is not None and start <= now}
+
+    def rows():
+        students = (
+            classroom.students.order_by(*STUDENT_ORDER)
+            .values_list("pk", "first_name", "last_name", "email")
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+        for chunk in _chunked(students, CHUNK_SIZE):
+            marks = {
+                (student_id, session_id): status
+                for student_id, session_id, status in (
+                    Attendance.objects
+                    .filter(session__classroom=classroom, student_id__in=[s[0] for s in chunk])
+                    .order_by()
+                    .values_list("student_id", "session_id", "status")
+                    .iterator(chunk_size=CHUNK_SIZE)
+                )
+            }
+            for student_id, first_name, last_name, email in chunk:
+                marked = [marks[(student_id, pk)] for pk in session_ids if (student_id, pk) in marks]
+                counts = {status: marked.count(status) for status, _ in Attendance.STATUS_CHOICES}
+                statuses = [
+                    marks.get((student_id, pk), Attendance.STATUS_ABSENT if pk in held else "")
+                    for pk in session_ids
+                ]
+                rate = rollups.attendance_rate(
+                    counts[Attendance.STATUS_PRESENT], counts[Attendance.STATUS_LATE],
+                    counts[Attendance.STATUS_ABSENT], counts[Attendance.STATUS_EXCUSED], len(held),
+                )
+                yield (
+                    _full_name(first_name, last_name), email, *statuses,
+                    counts[Attendance.STATUS_PRESENT], counts[Attendance.STATUS_LATE],
+                    counts[Attendance.STATUS_EXCUSED], statuses.count(Attendance.STATUS_ABSENT),
+                    round(100 * rate, 1) if rate is not None else None,
+                )
+
+    return header, rows()
+
+
+def roster(classroom):
+    """The students of ``classroom`` with the columns of the student list PDF."""
+    header = ["#", "First Name", "Last Name", "Email", "Phone", "Join Date", "Active"]
+
+    def rows():
+        students = (
+            classroom.students.order_by(*STUDENT_ORDER)
+            .values_list("first_name", "last_name", "email", "phone_number", "date_joined", "is_active")
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+        for number, (first_name, last_name, email, phone, joined, active) in enumerate(students, start=1):
+            yield number, first_name, last_name, email, phone, joined.date() if joined else None, active
+
+    return header, rows()
+
+
+def submissions(assignment):
+    """Every submission of ``assignment`` with its grade, if one was given."""
+    Grade = apps.get_model("grades", "Grade")
+    grades = Grade.objects.filter(assignment=OuterRef("assignment_id"), student=OuterRef("student_id"))
+    header = ["Student", "Email", "Submitted At", "Late", "File", "Has Text", "Score", "Max Score", "Feedback"]
+    due = assignment.due_date
+
+    def rows():
+        queryset = (
+            Submission.objects.filter(assignment=assignment)
+            .annotate(
+                score=Subquery(grades.values("score")[:1]),
+                max_score=Subquery(grades.values("max_score")[:1]),
+                has_text=Case(
+                    When(Q(content__isnull=True) | Q(content=""), then=Value(False)),
+                    default=Value(True), output_field=BooleanField(),
+                ),
+            )
+            .order_by("student__first_name", "student__last_name", "student_id")
+            .values_list(
+                "student__first_name", "student__last_name", "student__email", "submitted_at",
+                "file", "has_text", "score", "max_score", "feedback",
+            )
+        )
+        for first_name, last_name, email, submitted_at, file, has_text, score, max_score, feedback in (
+            queryset.iterator(chunk_size=CHUNK_SIZE)
+        ):
+            yield (
+                _full_name(first_name, last_name), email, submitted_at,
+                bool(due and submitted_at and submitted_at > due),
+                file.rsplit("/", 1)[-1] if file else "", has_text, score, max_score, feedback,
+            )
+
+    return header, rows()
@@ -28,6 +28,64 @@ class ClassForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['instructor'].queryset = User.objects.filter(role='instructor')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        capacity = cleaned_data.get('capacity')
+        students = cleaned_data.get('students')
+        if capacity is not None and students is not None and len(students) > capacity:
+            raise forms.ValidationError(f"{len(students)} students selected but the capacity is {capacity}.")
+        return cleaned_data
+
+
+class CourseCloneForm(forms.Form):
+    title = forms.CharField(max_length=200, label="New course title")
+    shift_weeks = forms.IntegerField(
+        initial=0,
+        min_value=-520,
+        max_value=520,
+        label="Shift dates by (weeks)",
+        help_text="Sessions, due dates, exams and class start/end dates move by this many weeks.",
+    )
+    include_exams = forms.BooleanField(required=False, initial=True, label="Copy exams with their questions and choices")
+
+
+class AttendanceRiskFilterForm(forms.Form):
+    SORT_CHOICES = [
+        ("risk", "Risk (highest first)"),
+        ("rate", "Attendance rate (lowest first)"),
+        ("-rate", "Attendance rate (highest first)"),
+        ("absent", "Most absences"),
+        ("student", "Student"),
+        ("classroom", "Class"),
+    ]
+
+    classroom = forms.ModelChoiceField(queryset=Classroom.objects.none(), required=False, empty_label="All classes")
+    below = forms.IntegerField(
+        required=False, min_value=0, max_value=100, initial=70,
+        label="Attendance at or below (%)",
+    )
+    min_marked = forms.IntegerField(required=False, min_value=0, initial=3, label="At least N sessions held")
+    sort = forms.ChoiceField(choices=SORT_CHOICES, required=False, initial="risk")
+
+    def __init__(self, *args, classrooms=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["classroom"].queryset = classrooms if classrooms is not None else Classroom.objects.all()
+        for name, field in self.fields.items():
+            field.widget.attrs["class"] = "form-select" if name in ("classroom", "sort") else "form-control"
+
+
+class RosterImportForm(forms.Form):
+    file = forms.FileField(
+        label="Roster CSV",
+        help_text="One student email per row, or a CSV with an \"email\" column.",
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data["file"]
+        if not file.name.lower().endswith(".csv"):
+            raise forms.ValidationError("Please upload a .csv file.")
+        return file
         
         
 class SessionForm(forms.ModelForm):
@@ -61,7 +119,7 @@ class AttendanceForm(forms.ModelForm):
 class AssignmentForm(forms.ModelForm):
     class Meta:
         model = Assignment
-        fields = ["title", "description", "attachment", "due_date", "max_score", "is_published", "session"]
+        fields = ["title", "description", "attachment", "due_date", "max_score", "max_upload_size", "is_published", "session"]
 
     def clean_due_date(self):
         due = self.cleaned_data.get("due_date")
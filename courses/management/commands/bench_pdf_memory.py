@@ -0,0 +1,74 @@
+import datetime
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from courses.models import Classroom, Course
+from courses.utils.pdf_service import render_parts, write_pdf
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Compare peak memory of single-pass and chunked student list PDF rendering."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000, help="Number of synthetic students.")
+        parser.add_argument("--chunk", type=int, default=250, help="Rows per part in chunked mode.")
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        chunk = options["chunk"]
+
+        # Unsaved instances: the benchmark never touches the database.
+        instructor = CustomUser(email="instructor@example.com", first_name="Bench", last_name="Instructor", role="instructor")
+        classroom = Classroom(
+            course=Course(title="Benchmark Course"),
+            instructor=instructor,
+            title="Benchmark Class",
+            start_date=datetime.date.today(),
+            capacity=rows,
+        )
+        students = [
+            CustomUser(
+                email=f"student{i}@example.com",
+                first_name=f"Student{i}",
+                last_name="Bench",
+                phone_number="0000000000",
+                role="student",
+            )
+            for i in range(rows)
+        ]
+        context = {
+            "classroom": classroom,
+            "students": students,
+            "student_count": rows,
+            "available_seats": 0,
+            "enrollment_rate": 100,
+            "generated_date": timezone.now(),
+        }
+
+        self.stdout.write(f"Rendering {rows} rows (chunk size {chunk})")
+        for label, size in (("single-pass", rows), ("chunked", chunk)):
+            peak, elapsed, size_bytes = self._measure(context, size)
+            self.stdout.write(
+                f"{label:>12}: peak {peak / 1024 / 1024:8.1f} MB  "
+                f"time {elapsed:6.2f} s  output {size_bytes / 1024:8.1f} KB"
+            )
+
+    def _measure(self, context, chunk_rows):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.pdf")
+            tracemalloc.start()
+            started = time.perf_counter()
+            parts = render_parts("courses/reports/student_list_pdf.html", context, "students", chunk_rows)
+            ok = write_pdf(parts, path)
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            if not ok:
+                raise RuntimeError("xhtml2pdf reported an error")
+            return peak, elapsed, os.path.getsize(path)
@@ -0,0 +1,31 @@
+import os
+
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.utils.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = "Move existing media files into the content-addressed blob store."
+
+    def handle(self, *args, **options):
+        storage = storages["default"]
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError("The default storage is not ContentAddressedStorage.")
+
+        root = storage.location
+        blob_root = storage.path(storage.blob_dir)
+        adopted = skipped = 0
+        for dirpath, dirnames, filenames in os.walk(root):
+            if os.path.commonpath([dirpath, blob_root]) == blob_root:
+                dirnames[:] = []
+                continue
+            for filename in filenames:
+                name = os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, "/")
+                if storage.adopt(name):
+                    adopted += 1
+                else:
+                    skipped += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Adopted {adopted} file(s), {skipped} already tracked."))
@@ -0,0 +1,105 @@
+import datetime
+import time
+import uuid
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+
+from courses import checkin
+from courses.management.commands import loadtest_enrollment
+from courses.models import Attendance, Classroom, Course, Session
+from users.models import CustomUser
+
+
+class Command(loadtest_enrollment.Command):
+    help = "Check many students into one session from concurrent threads and report throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=500, help="Enrolled students checking in.")
+        parser.add_argument("--threads", type=int, default=32, help="Concurrent worker threads.")
+        parser.add_argument(
+            "--prefilled", type=float, default=0.2,
+            help="Fraction of students the instructor already marked absent.",
+        )
+        parser.add_argument(
+            "--direct", action="store_true",
+            help="Write each check-in with its own update_or_create instead of batching, for comparison.",
+        )
+
+    def handle(self, *args, **options):
+        students_n = options["students"]
+        threads = options["threads"]
+
+        tag = uuid.uuid4().hex[:8]
+        instructor = CustomUser.objects.create(email=f"loadtest-{tag}-instructor@example.com", role="instructor")
+        course = Course.objects.create(title=f"Load test {tag}")
+        classroom = Classroom.objects.create(
+            course=course, instructor=instructor, title=f"Load test {tag}", start_date=datetime.date.today(),
+        )
+        CustomUser.objects.bulk_create([
+            CustomUser(email=f"loadtest-{tag}-{i}@example.com", role="student")
+            for i in range(students_n)
+        ])
+        students = list(CustomUser.objects.filter(email__startswith=f"loadtest-{tag}-", role="student"))
+        classroom.students.add(*students)
+        now = timezone.now()
+        session = Session.objects.create(
+            classroom=classroom, title=f"Load test {tag}",
+            start_time=now - datetime.timedelta(minutes=1), end_time=now + datetime.timedelta(hours=1),
+        )
+        code = checkin.open_checkin(session)
+        prefilled = students[:int(students_n * options["prefilled"])]
+        Attendance.objects.bulk_create([
+            Attendance(session=session, student=s, status=Attendance.STATUS_ABSENT, marked_by=instructor)
+            for s in prefilled
+        ])
+
+        if options["direct"]:
+            def action(student):
+                Attendance.objects.update_or_create(
+                    session=session, student=student,
+                    defaults={"status": checkin.status_for(session.start_time, timezone.now()), "marked_by": student},
+                )
+                return checkin.OK
+        else:
+            def action(student):
+                return checkin.check_in(session.pk, student.pk, code)[0]
+
+        try:
+            mode = "direct" if options["direct"] else "batched"
+            self.stdout.write(
+                f"{students_n} students ({len(prefilled)} pre-marked absent), {threads} threads, "
+                f"{connection.vendor}, {mode}"
+            )
+            batcher = checkin.batcher()
+            batches_before, rows_before = batcher.batches, batcher.rows
+            started = time.perf_counter()
+            results, timings, errors = self._run(threads, students, action)
+            wall = time.perf_counter() - started
+            self._report("check-in", timings, errors)
+            self.stdout.write(f"throughput {len(timings) / wall:8.0f} check-ins/s over {wall:.2f} s")
+            if not options["direct"]:
+                batches = batcher.batches - batches_before
+                rows = batcher.rows - rows_before
+                self.stdout.write(f"{batches} batches, {rows / batches if batches else 0:.1f} rows per batch")
+
+                # Repeats are answered from the cache while their keys survive
+                # and are no-ops in the database otherwise.
+                results_again, timings, repeat_errors = self._run(threads, students, action)
+                self._report("repeat", timings, repeat_errors)
+                cached = sum(result == checkin.ALREADY_CHECKED_IN for _, result in results_again)
+                self.stdout.write(f"{cached} of {len(results_again)} repeats answered from the cache")
+                errors += repeat_errors
+
+            stored = Attendance.objects.filter(session=session)
+            present = stored.filter(status=Attendance.STATUS_PRESENT).count()
+            self.stdout.write(f"{stored.count()} attendance rows, {present} present")
+            if errors:
+                raise CommandError(f"{len(errors)} check-in(s) failed, e.g. {errors[0]}")
+            if (stored.count(), present) != (students_n, students_n):
+                raise CommandError("Not every check-in was stored as present.")
+            self.stdout.write(self.style.SUCCESS("Every check-in was stored once."))
+        finally:
+            course.delete()
+            CustomUser.objects.filter(email__startswith=f"loadtest-{tag}-").delete()
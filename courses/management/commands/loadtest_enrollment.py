@@ -0,0 +1,105 @@
+import datetime
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from courses import enrollment
+from courses.models import Classroom, Course, WaitlistEntry
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Enroll many students into one class from concurrent threads and check the capacity held."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=200, help="Number of students signing up.")
+        parser.add_argument("--capacity", type=int, default=50, help="Seats in the test class.")
+        parser.add_argument("--threads", type=int, default=16, help="Concurrent worker threads.")
+        parser.add_argument("--withdraw", type=int, default=10, help="Enrolled students who leave afterwards.")
+
+    def handle(self, *args, **options):
+        students_n = options["students"]
+        capacity = options["capacity"]
+        threads = options["threads"]
+
+        # Everything is created under a unique tag and removed at the end.
+        tag = uuid.uuid4().hex[:8]
+        instructor = CustomUser.objects.create(email=f"loadtest-{tag}-instructor@example.com", role="instructor")
+        course = Course.objects.create(title=f"Load test {tag}")
+        classroom = Classroom.objects.create(
+            course=course, instructor=instructor, title=f"Load test {tag}",
+            start_date=datetime.date.today(), capacity=capacity,
+        )
+        CustomUser.objects.bulk_create([
+            CustomUser(email=f"loadtest-{tag}-{i}@example.com", role="student")
+            for i in range(students_n)
+        ])
+        students = list(CustomUser.objects.filter(email__startswith=f"loadtest-{tag}-", role="student"))
+
+        try:
+            self.stdout.write(f"{students_n} students, {capacity} seats, {threads} threads")
+            results, timings, errors = self._run(threads, students, lambda s: enrollment.enroll(classroom, s))
+            self._report("enroll", timings, errors)
+
+            enrolled = [s for s, status in results if status == enrollment.ENROLLED]
+            leaving = enrolled[:options["withdraw"]]
+            _, timings, withdraw_errors = self._run(threads, leaving, lambda s: enrollment.withdraw(classroom, s))
+            self._report("withdraw", timings, withdraw_errors)
+
+            classroom.refresh_from_db()
+            actual = classroom.students.count()
+            waiting = WaitlistEntry.objects.filter(classroom=classroom).count()
+            self.stdout.write(
+                f"enrolled {actual} (counter {classroom.student_count}), waitlisted {waiting}, "
+                f"capacity {capacity}"
+            )
+            if actual > capacity or actual != classroom.student_count:
+                raise CommandError("Capacity was oversubscribed or the seat counter drifted.")
+            remaining = students_n - len(leaving)
+            if not errors and not withdraw_errors and (actual, waiting) != (min(capacity, remaining), max(remaining - capacity, 0)):
+                raise CommandError("Seats were left empty while students were waiting.")
+            self.stdout.write(self.style.SUCCESS("Capacity held."))
+        finally:
+            course.delete()
+            CustomUser.objects.filter(email__startswith=f"loadtest-{tag}-").delete()
+
+    def _run(self, threads, students, action):
+        results, timings, errors = [], [], []
+        lock = threading.Lock()
+
+        def work(student):
+            started = time.perf_counter()
+            try:
+                outcome = action(student)
+                elapsed = time.perf_counter() - started
+            except OperationalError as e:
+                with lock:
+                    errors.append(str(e))
+                return
+            finally:
+                # Each worker thread has its own connection; don't leak them.
+                connection.close()
+            with lock:
+                results.append((student, outcome))
+                timings.append(elapsed)
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(work, students))
+        return results, timings, errors
+
+    def _report(self, label, timings, errors):
+        if not timings:
+            self.stdout.write(f"{label:>8}: no successful calls, {len(errors)} error(s)")
+            return
+        ordered = sorted(timings)
+        pct = lambda p: ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+        self.stdout.write(
+            f"{label:>8}: {len(timings)} calls  p50 {pct(0.50):7.1f} ms  p95 {pct(0.95):7.1f} ms  "
+            f"p99 {pct(0.99):7.1f} ms  max {ordered[-1] * 1000:7.1f} ms  "
+            f"stdev {statistics.pstdev(timings) * 1000:6.1f} ms  errors {len(errors)}"
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from courses.utils.pdf_service import prune_cache
+
+
+class Command(BaseCommand):
+    help = "Delete cached report PDFs and job files that are past PDF_CACHE_TIMEOUT / PDF_RENDER_TIMEOUT."
+
+    def handle(self, *args, **options):
+        removed = prune_cache()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} cached PDF file(s)."))
@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from courses.uploads import purge_stale
+
+
+class Command(BaseCommand):
+    help = "Delete chunked upload sessions in any state (and their temp files) that have been idle too long."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24, help="Idle time after which a session is purged.")
+
+    def handle(self, *args, **options):
+        removed = purge_stale(timedelta(hours=options["hours"]))
+        self.stdout.write(self.style.SUCCESS(f"Purged {removed} upload session(s)."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from courses import rollups
+from courses.counters import repair_all
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized counters and attendance rollups from their source tables."
+
+    def handle(self, *args, **options):
+        for field, rows in repair_all().items():
+            self.stdout.write(f"{field}: {rows} row(s) refreshed")
+        self.stdout.write(f"attendance rollups: {rollups.rebuild()} row(s) rebuilt")
+        self.stdout.write(self.style.SUCCESS("Counters repaired."))
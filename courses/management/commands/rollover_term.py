@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.cloning import clone_course
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = "Copy courses (classes, sessions, assignments, exams) into a new term, shifting every date."
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_ids", nargs="+", type=int, help="Courses to copy.")
+        parser.add_argument("--weeks", type=int, required=True, help="How many weeks to move dates by.")
+        parser.add_argument("--suffix", default="", help="Text appended to each copied course title.")
+        parser.add_argument("--skip-exams", action="store_true", help="Do not copy exams.")
+
+    def handle(self, *args, **options):
+        courses = Course.objects.in_bulk(options["course_ids"])
+        missing = set(options["course_ids"]) - set(courses)
+        if missing:
+            raise CommandError(f"Unknown course id(s): {', '.join(map(str, sorted(missing)))}")
+
+        shift = timedelta(weeks=options["weeks"])
+        for course_id in options["course_ids"]:
+            course = courses[course_id]
+            title = f"{course.title} {options['suffix']}".strip()
+            new_course = clone_course(course, shift, title=title, include_exams=not options["skip_exams"])
+            self.stdout.write(f"{course.pk} -> {new_course.pk}  {new_course.title}")
+        self.stdout.write(self.style.SUCCESS(f"Copied {len(courses)} course(s)."))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses import similarity
+from courses.models import Submission, TextSignature
+from exams.delivery import MCQ_TYPES
+from exams.models import Exam, Question
+from exams.similarity import record_attempts
+
+
+class Command(BaseCommand):
+    help = "Sign existing text submissions and written exam answers for near-duplicate detection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--assignments", nargs="*", type=int, help="Only these assignments.")
+        parser.add_argument("--exams", nargs="*", type=int, help="Only these exams.")
+
+    def handle(self, *args, **options):
+        only_assignments, only_exams = options["assignments"], options["exams"]
+        everything = only_assignments is None and only_exams is None
+
+        if everything or only_assignments is not None:
+            started = time.perf_counter()
+            submissions = Submission.objects.exclude(content__isnull=True).exclude(content="")
+            if only_assignments:
+                submissions = submissions.filter(assignment_id__in=only_assignments)
+            entries = submissions.values_list("assignment_id", "student_id", "content").iterator(chunk_size=2000)
+            signed = similarity.record(TextSignature.KIND_SUBMISSION, entries)
+            self.stdout.write(f"Submissions: {signed} signed in {time.perf_counter() - started:.2f} s")
+
+        if everything or only_exams is not None:
+            exams = Exam.objects.filter(pk__in=Question.objects.exclude(qtype__in=MCQ_TYPES).values("exam_id"))
+            if only_exams:
+                exams = exams.filter(pk__in=only_exams)
+            for exam in exams:
+                started = time.perf_counter()
+                signed = record_attempts(exam.pk)
+                self.stdout.write(f"{exam.pk}  {exam.title}: {signed} answer(s) signed in {time.perf_counter() - started:.2f} s")
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,18 @@
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.utils.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = "Remove media files left behind by saves whose transaction rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=1, help="Age after which an uncommitted save is undone.")
+
+    def handle(self, *args, **options):
+        storage = storages["default"]
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError("The default storage is not ContentAddressedStorage.")
+        handled = storage.sweep_pending(options["hours"] * 60 * 60)
+        self.stdout.write(self.style.SUCCESS(f"Swept {handled} uncommitted save(s)."))
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_student_count(apps, schema_editor):
+    Classroom = apps.get_model('courses', 'Classroom')
+    counts = (
+        Classroom.students.through.objects
+        .values('classroom_id')
+        .annotate(n=models.Count('pk'))
+        .values_list('classroom_id', 'n')
+    )
+    for classroom_id, n in counts:
+        Classroom.objects.filter(pk=classroom_id).update(student_count=n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_assignment_max_upload_size_uploadsession'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classroom',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='courses.classroom')),
+                ('student', models.ForeignKey(limit_choices_to={'role': 'student'}, on_delete=django.db.models.deletion.CASCADE, related_name='waitlisted_classes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'pk'],
+                'unique_together': {('classroom', 'student')},
+            },
+        ),
+        migrations.RunPython(backfill_student_count, migrations.RunPython.noop),
+    ]
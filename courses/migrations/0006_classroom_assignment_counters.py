@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:37
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def _count_of(queryset, field):
+    counted = (
+        queryset.filter(**{field: models.OuterRef('pk')})
+        .order_by().values(field).annotate(n=models.Count('pk')).values('n')
+    )
+    return Coalesce(models.Subquery(counted, output_field=models.IntegerField()), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    Classroom = apps.get_model('courses', 'Classroom')
+    Assignment = apps.get_model('courses', 'Assignment')
+    Session = apps.get_model('courses', 'Session')
+    Submission = apps.get_model('courses', 'Submission')
+    Grade = apps.get_model('grades', 'Grade')
+    Classroom.objects.update(session_count=_count_of(Session.objects.all(), 'classroom_id'))
+    Assignment.objects.update(
+        submission_count=_count_of(Submission.objects.all(), 'assignment_id'),
+        graded_count=_count_of(Grade.objects.filter(graded_at__isnull=False), 'assignment_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_classroom_student_count_waitlistentry'),
+        ('grades', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='graded_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='submission_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='classroom',
+            name='session_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
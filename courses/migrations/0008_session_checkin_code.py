@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_calendar_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='checkin_code',
+            field=models.CharField(blank=True, default='', max_length=12),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    Attendance = apps.get_model('courses', 'Attendance')
+    AttendanceRollup = apps.get_model('courses', 'AttendanceRollup')
+    statuses = {'present': 'present', 'late': 'late', 'excused': 'excused', 'absent': 'absent'}
+    rows = (
+        Attendance.objects.order_by().values('session__classroom_id', 'student_id')
+        .annotate(**{field: models.Count('pk', filter=models.Q(status=status)) for status, field in statuses.items()})
+    )
+    AttendanceRollup.objects.bulk_create(
+        [
+            AttendanceRollup(
+                classroom_id=row['session__classroom_id'], student_id=row['student_id'],
+                **{field: row[field] for field in statuses.values()},
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_session_checkin_code'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('excused', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='courses.classroom')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('classroom', 'student')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
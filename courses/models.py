@@ -3,6 +3,7 @@ from django.conf import settings
 from django.forms import ValidationError
 from django.utils.translation import gettext_lazy as _
 import os
+import uuid
 from django.utils import timezone
 # Create your models here.
 
@@ -11,6 +12,23 @@ def submission_upload_to(instance, filename):
     return os.path.join("assignments",str(instance.assignment.id),str(instance.student.id),filename)
 
 
+class CounterFieldsMixin:
+    """
+    Leave ``counter_fields`` out of a plain ``save()`` of an existing row, so
+    a stale in-memory copy never overwrites counts the signal handlers have
+    moved on since it was loaded.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
 class Course(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True,null=True)
@@ -20,7 +38,7 @@ class Course(models.Model):
     def __str__(self):
         return self.title
 
-class Classroom(models.Model):
+class Classroom(CounterFieldsMixin, models.Model):
     course = models.ForeignKey('Course', on_delete=models.CASCADE, related_name='classes')
     instructor = models.ForeignKey(settings.AUTH_USER_MODEL,
                                    on_delete=models.CASCADE,
@@ -35,12 +53,40 @@ class Classroom(models.Model):
                                       blank=True,
                                       limit_choices_to={'role': 'student'})
     capacity = models.PositiveIntegerField(null=True, blank=True)
+    # Denormalized counters, see courses.counters. Seat checks in
+    # courses.enrollment are a single conditional UPDATE on student_count.
+    student_count = models.PositiveIntegerField(default=0, editable=False)
+    session_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    counter_fields = ('student_count', 'session_count')
+
     def __str__(self):
         return f"{self.course.title} — {self.title}"
 
+    @property
+    def available_seats(self):
+        if self.capacity is None:
+            return None
+        return max(self.capacity - self.student_count, 0)
+
+
+class WaitlistEntry(models.Model):
+    classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='waitlist')
+    student = models.ForeignKey(settings.AUTH_USER_MODEL,
+                                on_delete=models.CASCADE,
+                                limit_choices_to={'role': 'student'},
+                                related_name='waitlisted_classes')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('classroom', 'student')
+        ordering = ['created_at', 'pk']
+
+    def __str__(self):
+        return f"{self.student} waiting for {self.classroom}"
+
 
 
 
@@ -57,6 +103,9 @@ class Session(models.Model):
     start_time = models.DateTimeField(null=True, blank=True)
     end_time = models.DateTimeField(null=True, blank=True)
 
+    # Set while students may check themselves in (see courses/checkin.py).
+    checkin_code = models.CharField(max_length=12, blank=True, default="")
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -93,6 +142,7 @@ class Session(models.Model):
 
     class Meta:
         ordering = ["start_time"]
+        indexes = [models.Index(fields=["classroom", "start_time"])]
 
     def __str__(self):
         if not self.classroom_id:
@@ -137,8 +187,36 @@ class Attendance(models.Model):
         if not classroom.students.filter(pk=self.student.pk).exists():
             raise ValidationError(_('Student is not enrolled in this classroom.'))
 
+
+class AttendanceRollup(models.Model):
+    """
+    Attendance totals per student and classroom, kept in step with Attendance
+    writes by courses.signals and courses.rollups.
+    """
+    classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='attendance_rollups')
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='attendance_rollups')
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    excused = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('classroom', 'student')
+
+    def __str__(self):
+        return f"{self.student} in {self.classroom}: {self.attended}/{self.total}"
+
+    @property
+    def total(self):
+        return self.present + self.late + self.excused + self.absent
+
+    @property
+    def attended(self):
+        return self.present + self.late
+
 # Assignment Model
-class Assignment(models.Model):
+class Assignment(CounterFieldsMixin, models.Model):
     course = models.ForeignKey('Course', on_delete=models.CASCADE, related_name='assignments')
     session = models.ForeignKey(Session, on_delete=models.SET_NULL, null=True, blank=True, related_name="assignments")
         
@@ -147,9 +225,18 @@ class Assignment(models.Model):
     attachment = models.FileField(upload_to="assignments/attachments/", null=True, blank=True)
     due_date = models.DateTimeField(null=True, blank=True)
     max_score = models.PositiveIntegerField(default=100)
+    max_upload_size = models.PositiveIntegerField(null=True, blank=True, help_text="Maximum submission file size in MB (empty = site default)")
     is_published = models.BooleanField(default=True)
+    # Maintained by courses.signals / grades.signals, see courses.counters.
+    submission_count = models.PositiveIntegerField(default=0, editable=False)
+    graded_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    counter_fields = ('submission_count', 'graded_count')
+
+    class Meta:
+        indexes = [models.Index(fields=["course", "due_date"])]
     
     def __str__(self):
         return f"{self.course.title} — {self.title}"
@@ -157,6 +244,11 @@ class Assignment(models.Model):
     def clean(self):
         if self.due_date and self.created_at and self.due_date <= self.created_at:
             raise ValidationError(_("Due date must be after creation date."))
+
+    @property
+    def upload_limit_bytes(self):
+        megabytes = self.max_upload_size or getattr(settings, "SUBMISSION_MAX_UPLOAD_MB", 50)
+        return megabytes * 1024 * 1024
         
         
 # Submission Model
@@ -192,4 +284,94 @@ class Submission(models.Model):
             if timezone.now() > self.assignment.due_date:
                 raise ValidationError(_("The deadline for this assignment has passed."))
 
-    
\ No newline at end of file
+
+# Resumable chunked submission upload (see courses/uploads.py)
+class UploadSession(models.Model):
+    STATUS_ACTIVE = "active"
+    STATUS_WRITING = "writing"
+    STATUS_COMPLETING = "completing"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_ACTIVE, "Active"),
+        (STATUS_WRITING, "Writing chunk"),
+        (STATUS_COMPLETING, "Completing"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name="upload_sessions")
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    checksum = models.CharField(max_length=64, help_text="SHA-256 of the whole file (hex)")
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["assignment", "student", "checksum"])]
+
+    def __str__(self):
+        return f"Upload {self.filename} by {self.student} ({self.received}/{self.size})"
+
+
+# Content-addressed storage bookkeeping (see courses/utils/storage.py)
+class StoredBlob(models.Model):
+    digest = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]}… ({self.refcount} refs)"
+
+
+class StoredFile(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    blob = models.ForeignKey(StoredBlob, on_delete=models.PROTECT, related_name="files")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+# Near-duplicate detection (see courses/similarity.py)
+class TextSignature(models.Model):
+    KIND_ANSWER = "answer"
+    KIND_SUBMISSION = "submission"
+    KIND_CHOICES = [
+        (KIND_ANSWER, "Exam answer"),
+        (KIND_SUBMISSION, "Assignment submission"),
+    ]
+
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    # Texts are only compared within a group: the question of an exam answer,
+    # the assignment of a submission.
+    group_id = models.PositiveIntegerField()
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="text_signatures")
+    text_hash = models.CharField(max_length=32)
+    words = models.PositiveIntegerField(default=0)
+    signature = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("kind", "group_id", "student")
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.group_id} by {self.student_id}"
+
+
+# Calendar subscriptions (see courses/calendar_feed.py)
+class CalendarFeedKey(models.Model):
+    """The secret in a user's feed URL; replacing it revokes every copy of the old URL."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="calendar_feed_key")
+    key = models.CharField(max_length=32)
+    rotated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Calendar feed key of {self.user_id}"
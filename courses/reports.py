@@ -0,0 +1,153 @@
+"""
+Report page helpers.
+
+The reports dashboard lists every classroom with its sessions. Its class grid
+is rendered from one annotated classroom query plus one prefetch query and
+kept in the cache until a Classroom, Session or Attendance write bumps the
+listing version (see ``courses.signals``). With a shared cache backend the
+bump is seen by every worker; with the default per-process cache the timeout
+bounds how stale another worker's copy can get.
+
+The session report (roster, marks and totals of one session) is built the
+same way for its HTML, PDF and spreadsheet outputs: one LEFT JOIN from the
+class roster to that session's attendance for the rows, one conditional
+aggregate over the same join for the totals, cached under the session's
+attendance version and the class's roster version.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, FilteredRelation, Prefetch, Q
+from django.template.loader import render_to_string
+
+from .models import Attendance, Classroom, Session
+
+
+DASHBOARD_VERSION_KEY = "reports:dashboard:version"
+
+
+def _dashboard_timeout():
+    return getattr(settings, "REPORTS_DASHBOARD_CACHE_TIMEOUT", 60 * 5)
+
+
+def _session_timeout():
+    return getattr(settings, "REPORTS_SESSION_CACHE_TIMEOUT", 60 * 10)
+
+
+def dashboard_classes():
+    """Classrooms annotated with how many of their sessions have attendance recorded."""
+    sessions = Session.objects.only("id", "classroom_id", "title", "start_time").order_by("start_time")
+    return (
+        Classroom.objects
+        .select_related("course")
+        .annotate(marked_sessions=Count("sessions", filter=Q(sessions__attendances__isnull=False), distinct=True))
+        .prefetch_related(Prefetch("sessions", queryset=sessions))
+        .order_by("-start_date")
+    )
+
+
+def _with_completion(classes):
+    for cls in classes:
+        cls.attendance_completion = round(100 * cls.marked_sessions / cls.session_count) if cls.session_count else 0
+        yield cls
+
+
+def _new_version():
+    # Never restart from a small number after the version key was evicted,
+    # or an old listing stored under that number could be served again.
+    return int(time.time() * 1000)
+
+
+def _version(key):
+    return cache.get_or_set(key, _new_version, None)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def dashboard_listing():
+    """Return ``(class_count, grid_html)`` for the reports dashboard, cached."""
+    key = f"reports:dashboard:{_version(DASHBOARD_VERSION_KEY)}"
+    cached = cache.get(key)
+    if cached is None:
+        classes = list(_with_completion(dashboard_classes()))
+        cached = (len(classes), render_to_string("courses/reports/_dashboard_classes.html", {"classes": classes}))
+        cache.set(key, cached, _dashboard_timeout())
+    return cached
+
+
+def invalidate_dashboard():
+    _bump(DASHBOARD_VERSION_KEY)
+
+
+# session report
+
+def _session_version_key(session_id):
+    return f"reports:session:{session_id}:version"
+
+
+def _roster_version_key(classroom_id):
+    return f"reports:roster:{classroom_id}:version"
+
+
+def invalidate_session_report(session_id):
+    _bump(_session_version_key(session_id))
+
+
+def invalidate_roster(classroom_id):
+    _bump(_roster_version_key(classroom_id))
+
+
+def _build_session_report(session):
+    roster = (
+        get_user_model().objects
+        .filter(enrolled_classes=session.classroom_id)
+        .annotate(mark=FilteredRelation("attendances", condition=Q(attendances__session_id=session.pk)))
+    )
+    rows = [
+        {
+            "student_id": pk,
+            "name": f"{first_name or ''} {last_name or ''}".strip(),
+            "email": email,
+            # No mark for the session counts as absent.
+            "status": status or Attendance.STATUS_ABSENT,
+            "note": note or "",
+        }
+        for pk, first_name, last_name, email, status, note in (
+            roster.order_by("first_name", "last_name", "pk")
+            .values_list("pk", "first_name", "last_name", "email", "mark__status", "mark__note")
+        )
+    ]
+    totals = roster.aggregate(
+        total=Count("pk"),
+        present_count=Count("pk", filter=Q(mark__status=Attendance.STATUS_PRESENT)),
+        late_count=Count("pk", filter=Q(mark__status=Attendance.STATUS_LATE)),
+        excused_count=Count("pk", filter=Q(mark__status=Attendance.STATUS_EXCUSED)),
+        absent_count=Count("pk", filter=Q(mark__status=Attendance.STATUS_ABSENT) | Q(mark__isnull=True)),
+    )
+    attended = totals["present_count"] + totals["late_count"]
+    totals["attendance_rate"] = round(attended / totals["total"] * 100, 2) if totals["total"] else 0
+    return {"rows": rows, **totals}
+
+
+def session_report(session):
+    """
+    Rows (``student_id``, ``name``, ``email``, ``status``, ``note``) and totals
+    (``present_count`` ... ``attendance_rate``) for ``session``, cached.
+    """
+    key = "reports:session:{}:{}:{}".format(
+        session.pk,
+        _version(_session_version_key(session.pk)),
+        _version(_roster_version_key(session.classroom_id)),
+    )
+    report = cache.get(key)
+    if report is None:
+        report = _build_session_report(session)
+        cache.set(key, report, _session_timeout())
+    return report
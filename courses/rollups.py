@@ -0,0 +1,257 @@
+"""
+Attendance rollups and the early-warning list.
+
+``AttendanceRollup`` holds present/late/excused/absent totals per
+(classroom, student). Single Attendance saves and deletes move one count with
+an F() update (see ``courses.signals``); bulk writes such as self check-in
+batches call ``rebuild`` for the rows they touched, which recounts them with
+one grouped query. ``rebuild()`` with no arguments recomputes everything and
+backs ``manage.py repair_counters``.
+
+``listing`` is the one query behind the early-warning page: rollups annotated
+with the attendance rate, filtered and sorted in the database. The rate is
+taken over the sessions the class has held so far, excused ones left out,
+so a held session without a mark counts as an absence (self check-in only
+writes marks for students who come) and a future one does not count at all.
+``attendance_rate`` is the same definition in Python, used by the class
+attendance export. Students enrolled without any mark get an all-zero rollup
+(``fill_enrolled``) so they are listed too. ``risk_scores``
+takes the same rows and scores every student at once with numpy, combining
+the attendance rate with the student's grade average in the class's course.
+"""
+import numpy as np
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case, Count, Exists, ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils import timezone
+
+from . import enrollment
+from .models import Attendance, AttendanceRollup, Session
+
+
+STATUS_FIELDS = {
+    Attendance.STATUS_PRESENT: "present",
+    Attendance.STATUS_LATE: "late",
+    Attendance.STATUS_EXCUSED: "excused",
+    Attendance.STATUS_ABSENT: "absent",
+}
+
+SORTS = {
+    "risk": None,
+    "rate": ("attendance_rate", "student__last_name"),
+    "-rate": ("-attendance_rate", "student__last_name"),
+    "absent": ("-missed", "student__last_name"),
+    "student": ("student__last_name", "student__first_name", "classroom__title"),
+    "classroom": ("classroom__title", "student__last_name", "student__first_name"),
+}
+
+
+# incremental maintenance
+
+def apply(classroom_id, student_id, old_status=None, new_status=None):
+    """Move one mark from ``old_status`` to ``new_status`` (either may be None)."""
+    if old_status == new_status:
+        return
+    changes = {}
+    if old_status in STATUS_FIELDS:
+        changes[STATUS_FIELDS[old_status]] = F(STATUS_FIELDS[old_status]) - 1
+    if new_status in STATUS_FIELDS:
+        changes[STATUS_FIELDS[new_status]] = F(STATUS_FIELDS[new_status]) + 1
+        AttendanceRollup.objects.bulk_create(
+            [AttendanceRollup(classroom_id=classroom_id, student_id=student_id)], ignore_conflicts=True,
+        )
+    if changes:
+        AttendanceRollup.objects.filter(classroom_id=classroom_id, student_id=student_id).update(**changes)
+
+
+def _counts(attendance):
+    return (
+        attendance.order_by()
+        .values("session__classroom_id", "student_id")
+        .annotate(**{
+            field: Count("pk", filter=Q(status=status))
+            for status, field in STATUS_FIELDS.items()
+        })
+    )
+
+
+def rebuild(classroom_ids=None, student_ids=None):
+    """
+    Recount the rollups of ``classroom_ids`` x ``student_ids`` (None means all)
+    from Attendance; returns the number of rollup rows written.
+    """
+    attendance = Attendance.objects.all()
+    rollups = AttendanceRollup.objects.all()
+    if classroom_ids is not None:
+        attendance = attendance.filter(session__classroom_id__in=list(classroom_ids))
+        rollups = rollups.filter(classroom_id__in=list(classroom_ids))
+    if student_ids is not None:
+        attendance = attendance.filter(student_id__in=list(student_ids))
+        rollups = rollups.filter(student_id__in=list(student_ids))
+
+    with transaction.atomic():
+        rows = [
+            AttendanceRollup(
+                classroom_id=row["session__classroom_id"], student_id=row["student_id"],
+                **{field: row[field] for field in STATUS_FIELDS.values()},
+            )
+            for row in _counts(attendance)
+        ]
+        rollups.delete()
+        AttendanceRollup.objects.bulk_create(rows, batch_size=1000)
+        filled = fill_enrolled(classroom_ids, student_ids)
+    return len(rows) + filled
+
+
+def fill_enrolled(classroom_ids=None, student_ids=None):
+    """
+    Create the all-zero rollups of enrolled students who have no mark in
+    their class yet; returns the number created.
+    """
+    Through, classroom_field, student_field = enrollment._through()
+    enrolled = Through.objects.filter(~Exists(AttendanceRollup.objects.filter(
+        classroom_id=OuterRef(f"{classroom_field}_id"), student_id=OuterRef(f"{student_field}_id"),
+    )))
+    if classroom_ids is not None:
+        enrolled = enrolled.filter(**{f"{classroom_field}_id__in": list(classroom_ids)})
+    if student_ids is not None:
+        enrolled = enrolled.filter(**{f"{student_field}_id__in": list(student_ids)})
+    rows = [
+        AttendanceRollup(classroom_id=classroom_id, student_id=student_id)
+        for classroom_id, student_id in enrolled.values_list(f"{classroom_field}_id", f"{student_field}_id")
+    ]
+    AttendanceRollup.objects.bulk_create(rows, ignore_conflicts=True, batch_size=1000)
+    return len(rows)
+
+
+def rebuild_for_sessions(session_ids, student_ids):
+    classroom_ids = set(Session.objects.filter(pk__in=list(session_ids)).values_list("classroom_id", flat=True))
+    if classroom_ids:
+        rebuild(classroom_ids, student_ids)
+
+
+# the early-warning list
+
+def attendance_rate(present, late, absent, excused, held):
+    """
+    Present + late over the counted sessions (0-1), or None if none count:
+    the ``held`` sessions less the excused ones, never fewer than the marks.
+    ``listing`` computes the same in SQL.
+    """
+    counted = max(held - excused, present + late + absent)
+    return (present + late) / counted if counted > 0 else None
+
+
+def _held_sessions(now):
+    """Subquery: sessions of the row's classroom that started by ``now``."""
+    return Coalesce(
+        Subquery(
+            Session.objects.filter(classroom_id=OuterRef("classroom_id"), start_time__lte=now)
+            .order_by().values("classroom_id").annotate(n=Count("pk")).values("n"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def listing(classrooms=None, max_rate=None, min_marked=0, sort="rate", now=None):
+    """
+    Rollups of enrolled students annotated with ``counted`` (sessions held
+    so far, excused ones not counted, and never fewer than the marks),
+    ``missed`` (counted sessions not attended, marked absent or not marked
+    at all) and ``attendance_rate`` (present + late over counted, 0-1).
+    ``max_rate`` keeps students at or below that rate; ``min_marked`` those
+    with at least that many counted sessions.
+    """
+    fill_enrolled([c.pk for c in classrooms] if classrooms is not None else None)
+    counted = Greatest(
+        ExpressionWrapper(_held_sessions(now or timezone.now()) - F("excused"), output_field=IntegerField()),
+        ExpressionWrapper(F("present") + F("late") + F("absent"), output_field=IntegerField()),
+    )
+    queryset = (
+        AttendanceRollup.objects
+        .filter(student__enrolled_classes=F("classroom"))
+        .select_related("student", "classroom", "classroom__course")
+        .annotate(counted=counted)
+        .annotate(missed=ExpressionWrapper(F("counted") - F("present") - F("late"), output_field=IntegerField()))
+        .annotate(attendance_rate=Case(
+            When(counted__lte=0, then=Value(None)),
+            default=Cast(F("present") + F("late"), FloatField()) / Cast(F("counted"), FloatField()),
+            output_field=FloatField(),
+        ))
+        .filter(counted__gte=min_marked)
+    )
+    if classrooms is not None:
+        queryset = queryset.filter(classroom__in=classrooms)
+    if max_rate is not None:
+        queryset = queryset.filter(attendance_rate__lte=max_rate)
+    return queryset.order_by(*(SORTS.get(sort) or SORTS["rate"]))
+
+
+def _grade_averages(student_ids, course_ids):
+    """``{(student_id, course_id): weighted percentage}`` in one grouped query."""
+    Grade = apps.get_model("grades", "Grade")
+    rows = (
+        Grade.objects
+        .filter(student_id__in=student_ids, course_id__in=course_ids, max_score__gt=0)
+        .order_by()
+        .values("student_id", "course_id")
+        .annotate(
+            weighted=Sum(Cast(F("score"), FloatField()) * 100 / Cast(F("max_score"), FloatField()) * Cast(F("weight"), FloatField())),
+            weights=Sum(Cast(F("weight"), FloatField())),
+        )
+    )
+    return {
+        (row["student_id"], row["course_id"]): row["weighted"] / row["weights"]
+        for row in rows if row["weights"]
+    }
+
+
+def risk_scores(rollups):
+    """
+    Score ``rollups`` (a list of annotated rows from ``listing``) from 0 (no
+    concern) to 100. Missing attendance or grades fall back to the other
+    signal; a row with neither scores NaN. Returns ``(scores, grade_averages)``
+    as numpy arrays aligned with ``rollups``.
+    """
+    if not rollups:
+        return np.empty(0), np.empty(0)
+    averages = _grade_averages(
+        {r.student_id for r in rollups}, {r.classroom.course_id for r in rollups},
+    )
+    rate = np.array(
+        [np.nan if r.attendance_rate is None else r.attendance_rate for r in rollups], dtype=float,
+    )
+    grade = np.array(
+        [averages.get((r.student_id, r.classroom.course_id), np.nan) for r in rollups], dtype=float,
+    ) / 100.0
+
+    attendance_weight = getattr(settings, "RISK_ATTENDANCE_WEIGHT", 0.6)
+    grade_weight = getattr(settings, "RISK_GRADE_WEIGHT", 0.4)
+    has_rate, has_grade = ~np.isnan(rate), ~np.isnan(grade)
+    weights = attendance_weight * has_rate + grade_weight * has_grade
+    concern = (
+        attendance_weight * np.where(has_rate, 1.0 - rate, 0.0)
+        + grade_weight * np.where(has_grade, 1.0 - np.clip(grade, 0.0, 1.0), 0.0)
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = np.round(100.0 * concern / weights, 1)
+    return scores, grade * 100.0
+
+
+def ranked(rollups, sort):
+    """Attach ``risk`` and ``grade_average`` to each row; reorder by risk if asked."""
+    rollups = list(rollups)
+    scores, grades = risk_scores(rollups)
+    for row, score, grade in zip(rollups, scores.tolist(), grades.tolist()):
+        row.risk = None if np.isnan(score) else score
+        row.grade_average = None if np.isnan(grade) else round(grade, 1)
+    if sort == "risk":
+        # Highest risk first, unscored rows last; argsort is stable.
+        order = np.argsort(np.where(np.isnan(scores), np.inf, -scores), kind="stable")
+        rollups = [rollups[i] for i in order]
+    return rollups
@@ -0,0 +1,190 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F, FileField
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from . import checkin, counters, reports, rollups, similarity
+from .models import Assignment, Attendance, Classroom, Course, Session, Submission, TextSignature
+from .utils.storage import ContentAddressedStorage
+
+
+@receiver(m2m_changed, sender=Classroom.students.through)
+def update_student_count(sender, instance, action, reverse, pk_set, **kwargs):
+    # Bulk enrollment writes to the through table directly and keeps the
+    # counter itself; this covers forms, the admin and .add()/.remove() calls.
+    if reverse:
+        # instance is the student; remember its classes before a clear.
+        if action == "pre_clear":
+            instance._cleared_classroom_ids = list(instance.enrolled_classes.values_list("pk", flat=True))
+            return
+        if action == "post_clear":
+            classroom_ids = getattr(instance, "_cleared_classroom_ids", [])
+        elif action in ("post_add", "post_remove"):
+            classroom_ids = pk_set
+        else:
+            return
+    elif action in ("post_add", "post_remove", "post_clear"):
+        # Recount rather than add len(pk_set): two concurrent adds of the same
+        # student both see it missing, and only one row is inserted.
+        classroom_ids = [instance.pk] if pk_set or action == "post_clear" else []
+    else:
+        return
+    if classroom_ids:
+        counters.refresh_student_counts(classroom_ids)
+        for classroom_id in classroom_ids:
+            checkin.forget_roster(classroom_id)
+            reports.invalidate_roster(classroom_id)
+
+
+@receiver(post_init, sender=Session)
+def remember_session_classroom(sender, instance, **kwargs):
+    # The classroom as loaded, so a save that moves the session moves its count.
+    instance._counted_classroom_id = instance.__dict__.get("classroom_id")
+
+
+def _increment_session_count(classroom_id):
+    Classroom.objects.filter(pk=classroom_id).update(session_count=F("session_count") + 1)
+
+
+def _decrement_session_count(classroom_id):
+    Classroom.objects.filter(pk=classroom_id, session_count__gt=0).update(session_count=F("session_count") - 1)
+
+
+@receiver(post_save, sender=Session)
+def update_session_count(sender, instance, created, **kwargs):
+    if created:
+        _increment_session_count(instance.classroom_id)
+    elif instance._counted_classroom_id != instance.classroom_id:
+        _decrement_session_count(instance._counted_classroom_id)
+        _increment_session_count(instance.classroom_id)
+    instance._counted_classroom_id = instance.classroom_id
+
+
+@receiver(post_delete, sender=Session)
+def decrement_session_count(sender, instance, **kwargs):
+    _decrement_session_count(instance.classroom_id)
+
+
+@receiver(post_save, sender=Session)
+@receiver(post_delete, sender=Session)
+def forget_checkin_session(sender, instance, **kwargs):
+    checkin.forget_session(instance.pk)
+
+
+@receiver(post_save, sender=Submission)
+def increment_submission_count(sender, instance, created, **kwargs):
+    if created:
+        Assignment.objects.filter(pk=instance.assignment_id).update(
+            submission_count=F("submission_count") + 1
+        )
+
+
+@receiver(post_delete, sender=Submission)
+def decrement_submission_count(sender, instance, **kwargs):
+    Assignment.objects.filter(pk=instance.assignment_id, submission_count__gt=0).update(
+        submission_count=F("submission_count") - 1
+    )
+
+
+@receiver(post_save, sender=Submission)
+def sign_submission(sender, instance, **kwargs):
+    similarity.sign_submission_later(instance.pk)
+
+
+@receiver(post_delete, sender=Submission)
+def forget_submission_signature(sender, instance, **kwargs):
+    similarity.forget(TextSignature.KIND_SUBMISSION, instance.assignment_id, instance.student_id)
+
+
+@receiver(post_init, sender=Attendance)
+def remember_attendance_status(sender, instance, **kwargs):
+    # The status as loaded, so a later save knows which rollup count to move.
+    # Read from __dict__ so a deferred status isn't fetched for every row.
+    instance._rollup_status = instance.__dict__.get("status")
+
+
+def _classroom_id_of(attendance):
+    if Attendance.session.is_cached(attendance):
+        return attendance.session.classroom_id
+    return Session.objects.filter(pk=attendance.session_id).values_list("classroom_id", flat=True).first()
+
+
+@receiver(post_save, sender=Attendance)
+def update_attendance_rollup(sender, instance, created, **kwargs):
+    old_status = None if created else instance._rollup_status
+    if old_status != instance.status:
+        rollups.apply(_classroom_id_of(instance), instance.student_id, old_status, instance.status)
+    instance._rollup_status = instance.status
+
+
+@receiver(post_delete, sender=Attendance)
+def remove_from_attendance_rollup(sender, instance, **kwargs):
+    classroom_id = _classroom_id_of(instance)
+    if classroom_id is not None:
+        rollups.apply(classroom_id, instance.student_id, instance._rollup_status, None)
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def invalidate_session_report(sender, instance, **kwargs):
+    reports.invalidate_session_report(instance.session_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Classroom)
+@receiver(post_delete, sender=Classroom)
+@receiver(post_save, sender=Session)
+@receiver(post_delete, sender=Session)
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def invalidate_reports_dashboard(sender, **kwargs):
+    reports.invalidate_dashboard()
+
+
+# Content-addressed storage: release the stored name a FileField stops using.
+
+def _stored_file_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def _release_file(model, field, name, pk):
+    # Cloned rows and field defaults share a name with other rows; only the last user releases it.
+    if not name or name == field.default:
+        return
+
+    def release():
+        if not model._base_manager.filter(**{field.attname: name}).exclude(pk=pk).exists():
+            field.storage.delete(name)
+    transaction.on_commit(release)
+
+
+def release_replaced_files(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding:
+        return
+    fields = [
+        field for field in _stored_file_fields(sender)
+        if update_fields is None or field.name in update_fields
+    ]
+    if not fields:
+        return
+    old = sender._base_manager.filter(pk=instance.pk).values(*[field.attname for field in fields]).first() or {}
+    for field in fields:
+        old_name = old.get(field.attname)
+        if old_name and old_name != getattr(instance, field.attname).name:
+            _release_file(sender, field, old_name, instance.pk)
+
+
+def release_deleted_files(sender, instance, **kwargs):
+    for field in _stored_file_fields(sender):
+        _release_file(sender, field, getattr(instance, field.attname).name, instance.pk)
+
+
+for _model in apps.get_models():
+    if _stored_file_fields(_model):
+        pre_save.connect(release_replaced_files, sender=_model, dispatch_uid=f"release_replaced_files:{_model._meta.label}")
+        post_delete.connect(release_deleted_files, sender=_model, dispatch_uid=f"release_deleted_files:{_model._meta.label}")
@@ -0,0 +1,189 @@
+"""
+Near-duplicate detection for written work.
+
+Every text submission (``Submission.content``) and every written exam answer
+is reduced to a MinHash signature (``courses/utils/minhash.py``) when it
+arrives: exam answers when the attempt is submitted or swept (see
+``exams.similarity``), so autosaved drafts are not signed; submissions once
+their save commits, on a small local thread pool rather than in the request.
+A signature lost with its process is written by the next save of the
+submission or by ``manage.py sign_texts``. The signatures are stored in
+``TextSignature``, one per student and group (the assignment, or the exam
+question), and re-signed only when the normalized text changed. ``record``
+takes its entries ``CHUNK_SIZE`` at a time, so a backfill over every
+submission holds one chunk in memory.
+
+A report loads the signatures of the groups asked for and finds the pairs
+of the same group whose estimated similarity reaches
+``SIMILARITY_THRESHOLD`` through LSH banding, in time close to linear in
+the number of texts rather than comparing every pair. Texts shorter than
+``SIMILARITY_MIN_WORDS`` are signed but left out of reports: short answers
+are alike by nature.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Submission, TextSignature
+from .utils import minhash
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+
+_executor = None
+_lock = threading.Lock()
+
+
+def threshold():
+    return getattr(settings, "SIMILARITY_THRESHOLD", 0.8)
+
+
+def min_words():
+    return getattr(settings, "SIMILARITY_MIN_WORDS", 30)
+
+
+def record(kind, entries):
+    """
+    Sign ``entries``, an iterable of ``(group_id, student_id, text)``, and
+    store what changed; empty texts drop their signature. Returns the number
+    of signatures written.
+    """
+    iterator = iter(entries)
+    signed = 0
+    while chunk := list(islice(iterator, CHUNK_SIZE)):
+        signed += _record_chunk(kind, chunk)
+    return signed
+
+
+def _record_chunk(kind, entries):
+    existing = dict(
+        ((group_id, student_id), text_hash)
+        for group_id, student_id, text_hash in TextSignature.objects.filter(
+            kind=kind,
+            group_id__in={group_id for group_id, _, _ in entries},
+            student_id__in={student_id for _, student_id, _ in entries},
+        ).values_list("group_id", "student_id", "text_hash")
+    )
+
+    signed, emptied = [], []
+    for group_id, student_id, text in entries:
+        digest = minhash.text_hash(text)
+        if existing.get((group_id, student_id)) == digest:
+            continue
+        signature = minhash.signature(text)
+        if signature is None:
+            if (group_id, student_id) in existing:
+                emptied.append((group_id, student_id))
+            continue
+        signed.append(TextSignature(
+            kind=kind, group_id=group_id, student_id=student_id, text_hash=digest,
+            words=len(minhash.words(text)), signature=signature.tobytes(),
+        ))
+
+    TextSignature.objects.bulk_create(
+        signed,
+        update_conflicts=True,
+        unique_fields=["kind", "group_id", "student"],
+        update_fields=["text_hash", "words", "signature", "updated_at"],
+        batch_size=500,
+    )
+    if emptied:
+        pairs = Q()
+        for group_id, student_id in emptied:
+            pairs |= Q(group_id=group_id, student_id=student_id)
+        TextSignature.objects.filter(pairs, kind=kind).delete()
+    return len(signed)
+
+
+def forget(kind, group_id, student_id=None):
+    signatures = TextSignature.objects.filter(kind=kind, group_id=group_id)
+    if student_id is not None:
+        signatures = signatures.filter(student_id=student_id)
+    signatures.delete()
+
+
+def flagged_pairs(kind, group_ids):
+    """
+    ``[(group_id, student_a, student_b, similarity)]`` for the texts of
+    ``group_ids`` that look alike, most similar first.
+    """
+    rows = list(
+        TextSignature.objects.filter(kind=kind, group_id__in=list(group_ids), words__gte=min_words())
+        .order_by("group_id", "student_id").values_list("group_id", "student_id", "signature")
+    )
+    if len(rows) < 2:
+        return []
+    groups = np.array([group_id for group_id, _, _ in rows], dtype=np.int64)
+    signatures = np.stack([np.frombuffer(signature, dtype=np.uint32) for _, _, signature in rows])
+    return [
+        (rows[i][0], rows[i][1], rows[j][1], round(score, 2))
+        for i, j, score in minhash.similar_pairs(signatures, groups, threshold())
+    ]
+
+
+def describe(pairs, extra=None):
+    """``flagged_pairs`` as dicts with both students loaded (and ``extra[group_id]`` merged in)."""
+    students = get_user_model().objects.in_bulk(
+        {student_id for _, a, b, _ in pairs for student_id in (a, b)}
+    )
+    return [
+        {
+            "group_id": group_id,
+            "student_a": students.get(a),
+            "student_b": students.get(b),
+            "similarity": score,
+            **((extra or {}).get(group_id) or {}),
+        }
+        for group_id, a, b, score in pairs
+    ]
+
+
+def sign_submission(submission_id):
+    """Sign the stored text of a submission."""
+    row = Submission.objects.filter(pk=submission_id).values_list("assignment_id", "student_id", "content").first()
+    if row is not None:
+        record(TextSignature.KIND_SUBMISSION, [row])
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "SIMILARITY_WORKERS", 1),
+                thread_name_prefix="similarity",
+            )
+        return _executor
+
+
+def _sign_job(submission_id):
+    try:
+        sign_submission(submission_id)
+    except Exception:
+        logger.exception("Could not sign submission %s", submission_id)
+    finally:
+        connection.close()
+
+
+def sign_submission_later(submission_id):
+    """Sign the submission on the worker pool once the current transaction commits."""
+    transaction.on_commit(lambda: _get_executor().submit(_sign_job, submission_id))
+
+
+def submission_report(assignment):
+    """Flagged pairs of ``assignment``'s text submissions, each with both submissions' ids."""
+    pairs = flagged_pairs(TextSignature.KIND_SUBMISSION, [assignment.pk])
+    submission_ids = dict(Submission.objects.filter(assignment=assignment).values_list("student_id", "pk"))
+    return [
+        {**row, "submission_a": submission_ids.get(a), "submission_b": submission_ids.get(b)}
+        for row, (_, a, b, _) in zip(describe(pairs), pairs)
+    ]
@@ -0,0 +1,31 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.getElementById('checkinForm');
+    const result = document.getElementById('checkinResult');
+    if (!form) return;
+
+    form.addEventListener('submit', function(event) {
+        event.preventDefault();
+        const button = form.querySelector('button[type="submit"]');
+        button.disabled = true;
+
+        fetch(form.action, {
+            method: 'POST',
+            body: new FormData(form),
+            headers: { 'X-Requested-With': 'XMLHttpRequest' },
+        })
+            .then(response => response.json())
+            .then(data => {
+                const ok = data.result === 'ok' || data.result === 'already_checked_in';
+                result.className = 'alert mt-3 ' + (ok ? 'alert-success' : 'alert-danger');
+                result.textContent = ok && data.status
+                    ? data.message + ' Marked ' + data.status + '.'
+                    : data.message;
+                button.disabled = ok;
+            })
+            .catch(() => {
+                result.className = 'alert mt-3 alert-danger';
+                result.textContent = 'Check-in failed. Please try again.';
+                button.disabled = false;
+            });
+    });
+});
@@ -0,0 +1,39 @@
+import os
+import shutil
+import tempfile
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+
+from courses.models import Classroom, Course
+
+User = get_user_model()
+
+
+def make_users(role, count, prefix=None):
+    prefix = prefix or role
+    return [
+        User.objects.create_user(email=f"{prefix}{n}@example.com", password="x", role=role)
+        for n in range(count)
+    ]
+
+
+def make_classroom(instructor=None, course=None, **fields):
+    return Classroom.objects.create(
+        course=course or Course.objects.create(title="Course"),
+        instructor=instructor or make_users("instructor", 1, prefix="teacher")[0],
+        title=fields.pop("title", "Class"),
+        start_date=fields.pop("start_date", date.today()),
+        **fields,
+    )
+
+
+def use_temp_dirs(test_case, **names):
+    """Point the ``names`` settings (e.g. ``MEDIA_ROOT="media"``) at a temp dir for one test."""
+    tmp = tempfile.mkdtemp()
+    test_case.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+    settings = override_settings(**{name: os.path.join(tmp, sub) for name, sub in names.items()})
+    settings.enable()
+    test_case.addCleanup(settings.disable)
+    return tmp
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from django.core import signing
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from courses import calendar_feed
+from courses.models import Assignment, Session
+
+from .helpers import make_classroom, make_users
+
+
+class CalendarTestCase(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom(title="Algebra")
+        self.student = make_users("student", 1)[0]
+        self.classroom.students.add(self.student)
+        self.now = timezone.now()
+
+    def session(self, hours, classroom=None, title="Class"):
+        start = self.now + timedelta(hours=hours)
+        return Session.objects.create(
+            classroom=classroom or self.classroom, title=title, start_time=start, end_time=start + timedelta(hours=1)
+        )
+
+
+class EventsTests(CalendarTestCase):
+    def test_sources_are_merged_in_time_order_and_scoped_to_the_user(self):
+        later = self.session(5, title="Later")
+        sooner = self.session(1, title="Sooner")
+        essay = Assignment.objects.create(
+            course=self.classroom.course, title="Essay", due_date=self.now + timedelta(hours=3), is_published=True
+        )
+        Assignment.objects.create(
+            course=self.classroom.course, title="Draft", due_date=self.now + timedelta(hours=2), is_published=False
+        )
+        self.session(2, classroom=make_classroom(instructor=self.classroom.instructor, title="Other"))
+
+        events = list(calendar_feed.events(self.student, self.now, self.now + timedelta(days=1)))
+
+        self.assertEqual(
+            [event.uid for event in events],
+            [f"session-{sooner.pk}", f"assignment-{essay.pk}", f"session-{later.pk}"],
+        )
+        self.assertEqual(events[1].title, "Due: Essay")
+
+    def test_the_window_is_clamped(self):
+        start, end, days = calendar_feed.window(self.now, days=500)
+        self.assertEqual(days, calendar_feed.MAX_WINDOW_DAYS)
+        self.assertEqual(end - start, timedelta(days=calendar_feed.MAX_WINDOW_DAYS))
+
+
+class FeedTests(CalendarTestCase):
+    def feed_url(self, user=None):
+        return reverse("courses:calendar_feed", kwargs={"token": calendar_feed.feed_token(user or self.student)})
+
+    def test_an_unchanged_feed_is_answered_with_304(self):
+        self.session(1, title="Lecture")
+        url = self.feed_url()
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"SUMMARY:Lecture", response.content)
+
+        with self.assertNumQueries(4):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_edits_change_the_etag(self):
+        session = self.session(1)
+        before = calendar_feed.feed_etag(self.student)
+
+        Session.objects.filter(pk=session.pk).update(updated_at=self.now + timedelta(minutes=1))
+        self.assertNotEqual(calendar_feed.feed_etag(self.student), before)
+
+    def test_the_token_is_stable_until_it_is_rotated(self):
+        url = self.feed_url()
+        self.assertEqual(self.feed_url(), url)
+
+        self.client.force_login(self.student)
+        response = self.client.post(reverse("courses:calendar_feed_reset"))
+        self.assertRedirects(response, reverse("courses:calendar"))
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertNotEqual(self.feed_url(), url)
+        self.assertEqual(self.client.get(self.feed_url()).status_code, 200)
+
+    def test_forged_and_inactive_tokens_are_refused(self):
+        url = self.feed_url()
+        legacy = signing.Signer(salt=calendar_feed.FEED_SALT).sign(str(self.student.pk))
+        self.assertIsNone(calendar_feed.user_from_token(legacy))
+        self.assertIsNone(calendar_feed.user_from_token(f"{self.student.pk}:guess:sig"))
+
+        self.student.is_active = False
+        self.student.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
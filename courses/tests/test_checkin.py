@@ -0,0 +1,114 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from courses import checkin, reports
+from courses.models import Attendance, Session
+from courses.utils.group_commit import GroupCommit
+
+from .helpers import make_classroom, make_users
+
+
+class GroupCommitTests(SimpleTestCase):
+    def submit_all(self, batcher, rows):
+        errors = []
+
+        def submit(row):
+            try:
+                batcher.submit(row)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=submit, args=(row,)) for row in rows]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return errors
+
+    def test_concurrent_rows_are_written_in_few_batches(self):
+        written = []
+        batcher = GroupCommit(written.append, max_batch=10, max_delay=0.2)
+
+        self.assertEqual(self.submit_all(batcher, range(25)), [])
+
+        self.assertEqual(sorted(row for batch in written for row in batch), list(range(25)))
+        self.assertTrue(all(len(batch) <= 10 for batch in written))
+        self.assertLess(batcher.batches, 25)
+        self.assertEqual(batcher.rows, 25)
+
+    def test_a_failed_write_is_raised_in_every_waiter(self):
+        def write(rows):
+            raise RuntimeError("disk full")
+
+        batcher = GroupCommit(write, max_batch=5, max_delay=0.2)
+        errors = self.submit_all(batcher, range(5))
+
+        self.assertEqual(len(errors), 5)
+        self.assertTrue(all(str(e) == "disk full" for e in errors))
+
+    def test_a_lone_row_is_written_after_the_delay(self):
+        written = []
+        GroupCommit(written.append, max_batch=10, max_delay=0.01).submit("row")
+        self.assertEqual(written, [["row"]])
+
+
+class CheckInTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.classroom = make_classroom()
+        self.students = make_users("student", 3)
+        self.classroom.students.add(*self.students[:2])
+        self.start = timezone.now()
+        self.session = Session.objects.create(
+            classroom=self.classroom, title="Lecture", start_time=self.start, end_time=self.start + timedelta(hours=1)
+        )
+        self.code = checkin.open_checkin(self.session)
+
+    def check_in(self, student, code=None, minutes=0):
+        return checkin.check_in(self.session.pk, student.pk, code or self.code, now=self.start + timedelta(minutes=minutes))
+
+    def test_results(self):
+        self.assertEqual(self.check_in(self.students[0], code=self.code.lower()), (checkin.OK, Attendance.STATUS_PRESENT))
+        self.assertEqual(self.check_in(self.students[0]), (checkin.ALREADY_CHECKED_IN, Attendance.STATUS_PRESENT))
+        self.assertEqual(self.check_in(self.students[1], minutes=30), (checkin.OK, Attendance.STATUS_LATE))
+        self.assertEqual(self.check_in(self.students[1], code="WRONG1"), (checkin.BAD_CODE, None))
+        self.assertEqual(self.check_in(self.students[2]), (checkin.NOT_ENROLLED, None))
+        self.assertEqual(self.check_in(self.students[0], minutes=90), (checkin.CLOSED, None))
+
+        checkin.close_checkin(self.session)
+        self.assertEqual(self.check_in(self.students[0]), (checkin.CLOSED, None))
+
+    def test_instructor_marks_are_kept(self):
+        Attendance.objects.create(session=self.session, student=self.students[0], status=Attendance.STATUS_EXCUSED)
+        Attendance.objects.create(session=self.session, student=self.students[1], status=Attendance.STATUS_ABSENT)
+
+        checkin.write_batch([
+            (self.session.pk, self.students[0].pk, Attendance.STATUS_PRESENT),
+            (self.session.pk, self.students[1].pk, Attendance.STATUS_LATE),
+        ])
+
+        self.assertEqual(
+            list(Attendance.objects.order_by("student_id").values_list("status", flat=True)),
+            [Attendance.STATUS_EXCUSED, Attendance.STATUS_LATE],
+        )
+
+    def test_only_the_first_batch_of_a_session_bumps_the_dashboard(self):
+        with mock.patch.object(reports, "invalidate_dashboard") as invalidate:
+            checkin.write_batch([(self.session.pk, self.students[0].pk, Attendance.STATUS_PRESENT)])
+            checkin.write_batch([(self.session.pk, self.students[1].pk, Attendance.STATUS_PRESENT)])
+        self.assertEqual(invalidate.call_count, 1)
+
+        checkin.open_checkin(self.session)
+        with mock.patch.object(reports, "invalidate_dashboard") as invalidate:
+            checkin.write_batch([(self.session.pk, self.students[1].pk, Attendance.STATUS_LATE)])
+        self.assertEqual(invalidate.call_count, 1)
+
+    def test_the_dashboard_shows_the_checked_in_session(self):
+        reports.dashboard_listing()
+        self.check_in(self.students[0])
+        self.assertIn("Attendance taken for 1 of 1", reports.dashboard_listing()[1])
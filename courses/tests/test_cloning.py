@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from courses import cloning
+from courses.models import Assignment, Classroom, Session
+from exams.models import Choice, Exam, Question
+
+from .helpers import make_classroom, make_users
+
+
+class CloneCourseTests(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom(title="Monday group")
+        self.course = self.classroom.course
+        self.classroom.students.add(*make_users("student", 2))
+        self.start = timezone.now()
+        self.session = Session.objects.create(
+            classroom=self.classroom, title="Intro", checkin_code="ABC123",
+            start_time=self.start, end_time=self.start + timedelta(hours=1),
+        )
+        Assignment.objects.create(
+            course=self.course, session=self.session, title="Essay", due_date=self.start + timedelta(days=7)
+        )
+        self.exam = Exam.objects.create(
+            course=self.course, instructor=self.classroom.instructor, title="Midterm", duration=60,
+            start_time=self.start, end_time=self.start + timedelta(hours=2),
+        )
+        question = Question.objects.create(exam=self.exam, text="Capital?", points=2)
+        Choice.objects.create(question=question, text="Paris", is_correct=True)
+        Choice.objects.create(question=question, text="Lyon")
+
+    def test_the_graph_is_copied_with_shifted_dates(self):
+        shift = timedelta(days=140)
+        with self.captureOnCommitCallbacks(execute=True):
+            new_course = cloning.clone_course(self.course, shift, title="Next term")
+
+        classroom = Classroom.objects.get(course=new_course)
+        self.assertEqual(classroom.title, "Monday group")
+        self.assertEqual(classroom.start_date, self.classroom.start_date + shift)
+        self.assertEqual((classroom.student_count, classroom.session_count), (0, 1))
+        self.assertFalse(classroom.students.exists())
+
+        session = Session.objects.get(classroom=classroom)
+        self.assertEqual(session.start_time, self.start + shift)
+        self.assertEqual(session.checkin_code, "")
+
+        assignment = Assignment.objects.get(course=new_course)
+        self.assertEqual(assignment.session_id, session.pk)
+        self.assertEqual(assignment.due_date, self.start + timedelta(days=7) + shift)
+        self.assertEqual(assignment.submission_count, 0)
+
+        exam = Exam.objects.get(course=new_course)
+        self.assertEqual(exam.start_time, self.start + shift)
+        question = exam.questions.get()
+        self.assertEqual(
+            list(question.choices.order_by("pk").values_list("text", "is_correct")),
+            [("Paris", True), ("Lyon", False)],
+        )
+
+    def test_queries_do_not_grow_with_the_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            cloning.clone_course(self.course, timedelta(days=7))
+
+        for n in range(5):
+            start = self.start + timedelta(days=n + 1)
+            Session.objects.create(classroom=self.classroom, title=f"S{n}", start_time=start, end_time=start + timedelta(hours=1))
+        make_classroom(instructor=self.classroom.instructor, course=self.course, title="Tuesday group")
+
+        with self.assertNumQueries(len(small)):
+            cloning.clone_course(self.course, timedelta(days=7))
+
+    def test_exams_can_be_left_out(self):
+        new_course = cloning.clone_course(self.course, timedelta(0), include_exams=False)
+        self.assertFalse(Exam.objects.filter(course=new_course).exists())
+        self.assertTrue(Session.objects.filter(classroom__course=new_course).exists())
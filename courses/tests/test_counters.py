@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.db.models.signals import m2m_changed
+from django.test import TestCase
+from django.utils import timezone
+
+from courses import counters
+from courses.models import Assignment, Classroom, Session, Submission
+
+from .helpers import make_classroom, make_users
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom()
+        self.other = make_classroom(instructor=self.classroom.instructor, course=self.classroom.course)
+
+    def counts(self, field):
+        return list(Classroom.objects.filter(pk__in=[self.classroom.pk, self.other.pk]).order_by("pk").values_list(field, flat=True))
+
+    def session(self, classroom, hours=0):
+        start = timezone.now() + timedelta(hours=hours)
+        return Session.objects.create(classroom=classroom, title="Class", start_time=start, end_time=start + timedelta(hours=1))
+
+    def test_sessions_are_counted_on_create_move_and_delete(self):
+        moved = self.session(self.classroom)
+        self.session(self.classroom, hours=2)
+        self.assertEqual(self.counts("session_count"), [2, 0])
+
+        moved = Session.objects.get(pk=moved.pk)
+        moved.classroom = self.other
+        moved.save()
+        moved.title = "Renamed"
+        moved.save()
+        self.assertEqual(self.counts("session_count"), [1, 1])
+
+        moved.delete()
+        self.assertEqual(self.counts("session_count"), [1, 0])
+
+    def test_students_are_recounted_from_the_roster(self):
+        students = make_users("student", 3)
+        self.classroom.students.add(*students)
+        self.classroom.students.remove(students[0])
+        self.assertEqual(self.counts("student_count"), [2, 0])
+
+        # A concurrent add of a student another request just inserted reports it again.
+        m2m_changed.send(
+            sender=Classroom.students.through, instance=self.classroom, action="post_add",
+            reverse=False, model=type(students[1]), pk_set={students[1].pk},
+        )
+        self.assertEqual(self.counts("student_count"), [2, 0])
+
+        students[2].enrolled_classes.add(self.other)
+        students[2].enrolled_classes.clear()
+        self.assertEqual(self.counts("student_count"), [1, 0])
+
+    def test_submissions_are_counted(self):
+        assignment = Assignment.objects.create(course=self.classroom.course, title="Essay")
+        students = make_users("student", 2)
+        first = Submission.objects.create(assignment=assignment, student=students[0], content="a")
+        Submission.objects.create(assignment=assignment, student=students[1], content="b")
+        first.delete()
+        assignment.refresh_from_db()
+        self.assertEqual(assignment.submission_count, 1)
+
+    def test_repair_recomputes_drifted_counters(self):
+        self.session(self.classroom)
+        self.classroom.students.add(*make_users("student", 2))
+        Classroom.objects.update(student_count=9, session_count=9)
+
+        counters.repair_all()
+
+        self.assertEqual(self.counts("student_count"), [2, 0])
+        self.assertEqual(self.counts("session_count"), [1, 0])
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+
+from courses import enrollment
+from courses.models import Classroom, WaitlistEntry
+
+from .helpers import make_classroom, make_users
+
+
+class EnrollmentCapacityTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.classroom = make_classroom(capacity=3)
+
+    def test_concurrent_enrollments_respect_capacity(self):
+        students = make_users("student", 8)
+        barrier = threading.Barrier(len(students))
+        outcomes, errors = [], []
+
+        def sign_up(student):
+            try:
+                barrier.wait()
+                for _ in range(500):
+                    try:
+                        outcomes.append(enrollment.enroll(self.classroom, student))
+                        return
+                    except OperationalError:
+                        # SQLite's in-memory test database locks whole tables; retry like a client would.
+                        time.sleep(0.01)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=sign_up, args=(student,)) for student in students]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(outcomes), len(students))
+        self.assertEqual(outcomes.count(enrollment.ENROLLED), 3)
+        self.assertEqual(outcomes.count(enrollment.WAITLISTED), 5)
+        self.classroom.refresh_from_db()
+        self.assertEqual(self.classroom.students.count(), 3)
+        self.assertEqual(self.classroom.student_count, 3)
+        self.assertEqual(WaitlistEntry.objects.filter(classroom=self.classroom).count(), 5)
+
+    def test_withdraw_promotes_the_head_of_the_waitlist(self):
+        students = make_users("student", 5)
+        for student in students:
+            enrollment.enroll(self.classroom, student)
+        self.assertEqual(enrollment.waitlist_position(self.classroom, students[4]), 2)
+
+        promoted = enrollment.withdraw(self.classroom, students[0])
+
+        self.assertEqual(promoted, [students[3]])
+        self.assertEqual(set(self.classroom.students.all()), set(students[1:4]))
+        self.assertEqual(enrollment.waitlist_position(self.classroom, students[4]), 1)
+        self.classroom.refresh_from_db()
+        self.assertEqual(self.classroom.student_count, 3)
+
+    def test_repeated_enroll_does_not_take_a_second_seat(self):
+        student = make_users("student", 1)[0]
+        self.assertEqual(enrollment.enroll(self.classroom, student), enrollment.ENROLLED)
+        self.assertEqual(enrollment.enroll(self.classroom, student), enrollment.ALREADY_ENROLLED)
+        self.classroom.refresh_from_db()
+        self.assertEqual(self.classroom.student_count, 1)
+
+    def test_growing_capacity_fills_from_the_waitlist(self):
+        students = make_users("student", 5)
+        for student in students:
+            enrollment.enroll(self.classroom, student)
+        Classroom.objects.filter(pk=self.classroom.pk).update(capacity=4)
+
+        self.assertEqual(enrollment.fill_from_waitlist(self.classroom), [students[3]])
+        self.assertEqual(self.classroom.students.count(), 4)
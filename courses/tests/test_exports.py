@@ -0,0 +1,111 @@
+import io
+import math
+import zipfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from courses import exports, rollups
+from courses.models import Attendance, Session
+from courses.utils import table_export
+
+from .helpers import make_classroom, make_users
+
+SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def read_xlsx(chunks):
+    """The cells of the first sheet, as text, row by row."""
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+    return [
+        ["".join(cell.itertext()) for cell in row.findall("s:c", SHEET_NS)]
+        for row in sheet.iter(f"{{{SHEET_NS['s']}}}row")
+    ]
+
+
+class TableExportTests(SimpleTestCase):
+    header = ["Name", "Score", "Note"]
+
+    def test_csv_is_streamed_with_a_bom_and_formula_safe_text(self):
+        rows = iter([("Ann", 5, "=HYPERLINK()"), ("Bob", -1, None)])
+        chunks = list(table_export.stream_csv(self.header, rows))
+
+        self.assertEqual(
+            "".join(chunks),
+            "\ufeffName,Score,Note\r\nAnn,5,'=HYPERLINK()\r\nBob,-1,\r\n",
+        )
+
+    def test_csv_rows_are_flushed_in_pieces(self):
+        rows = (("x" * 1000, n, "") for n in range(200))
+        self.assertGreater(len(list(table_export.stream_csv(self.header, rows))), 1)
+
+    def test_xlsx_cells(self):
+        rows = [
+            ("Ann", 5, True),
+            ("Bob", 2.5, "<b>&</b>"),
+            ("Cy", math.nan, math.inf),
+            ("Di", Decimal("NaN"), Decimal("1.50")),
+        ]
+        cells = read_xlsx(table_export.stream_xlsx(self.header, iter(rows)))
+
+        self.assertEqual(cells[0], ["Name", "Score", "Note"])
+        self.assertEqual(cells[1], ["Ann", "5", "1"])
+        self.assertEqual(cells[2], ["Bob", "2.5", "<b>&</b>"])
+        self.assertEqual(cells[3], ["Cy", "", ""])
+        self.assertEqual(cells[4], ["Di", "", "1.50"])
+
+
+class AttendanceMatrixTests(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom()
+        self.students = make_users("student", 2)
+        self.classroom.students.add(*self.students)
+        self.now = timezone.now()
+        self.sessions = [self.session(days) for days in (-3, -2, -1, 7)]
+
+    def session(self, days):
+        start = self.now + timedelta(days=days)
+        return Session.objects.create(
+            classroom=self.classroom, title="Class", start_time=start, end_time=start + timedelta(hours=1)
+        )
+
+    def matrix(self):
+        header, rows = exports.attendance_matrix(self.classroom, now=self.now)
+        return header, {row[1]: row for row in rows}
+
+    def test_future_sessions_and_excused_marks_are_not_counted(self):
+        student = self.students[0]
+        Attendance.objects.create(session=self.sessions[0], student=student, status=Attendance.STATUS_PRESENT)
+        Attendance.objects.create(session=self.sessions[1], student=student, status=Attendance.STATUS_EXCUSED)
+
+        header, rows = self.matrix()
+
+        self.assertEqual(len(header), 2 + 4 + 5)
+        self.assertEqual(
+            rows[student.email][2:],
+            ("present", "excused", "absent", "", 1, 0, 1, 1, 50.0),
+        )
+        self.assertEqual(rows[self.students[1].email][2:], ("absent", "absent", "absent", "", 0, 0, 0, 3, 0.0))
+
+    def test_the_rate_matches_the_early_warning_listing(self):
+        statuses = ["late", "absent", "excused", "present"]
+        for session, status in zip(self.sessions, statuses):
+            Attendance.objects.create(session=session, student=self.students[0], status=status)
+
+        _, rows = self.matrix()
+        listed = {row.student_id: row for row in rollups.listing(classrooms=[self.classroom], now=self.now)}
+
+        for student in self.students:
+            self.assertEqual(rows[student.email][-1], round(100 * listed[student.pk].attendance_rate, 1))
+
+    def test_marks_are_fetched_one_chunk_of_students_at_a_time(self):
+        self.classroom.students.add(*make_users("student", 3, prefix="more"))
+        _, rows = exports.attendance_matrix(self.classroom, now=self.now)
+
+        with mock.patch.object(exports, "CHUNK_SIZE", 2), self.assertNumQueries(1 + 3):
+            self.assertEqual(len(list(rows)), 5)
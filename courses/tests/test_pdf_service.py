@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from courses.utils import pdf_service
+
+from .helpers import make_users
+
+
+class PDFServiceTestCase(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings = override_settings(PDF_CACHE_DIR=self.cache_dir, PDF_CACHE_TIMEOUT=600, PDF_RENDER_TIMEOUT=300)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def touch(self, name, age=0):
+        path = os.path.join(self.cache_dir, name)
+        open(path, "wb").close()
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+        return path
+
+
+class CacheKeyTests(PDFServiceTestCase):
+    def test_digest_follows_the_rendered_fields(self):
+        student = make_users("student", 1)[0]
+        before = pdf_service.context_digest("t.html", {"students": [student]})
+        self.assertEqual(pdf_service.context_digest("t.html", {"students": [student]}), before)
+
+        student.first_name = "Renamed"
+        student.save()
+
+        self.assertNotEqual(pdf_service.context_digest("t.html", {"students": [student]}), before)
+
+    def test_volatile_keys_do_not_change_the_digest(self):
+        self.assertEqual(
+            pdf_service.context_digest("t.html", {"a": 1, "generated_date": 1}),
+            pdf_service.context_digest("t.html", {"a": 1, "generated_date": 2}),
+        )
+
+
+class PruneTests(PDFServiceTestCase):
+    def test_prunes_only_expired_files(self):
+        digest = "a" * 64
+        expired = [self.touch(f"{digest}.pdf", 700), self.touch(f"{digest}.err", 700), self.touch("b" * 64 + ".job", 400)]
+        kept = [self.touch("c" * 64 + ".pdf", 10), self.touch("d" * 64 + ".job", 10), self.touch("notes.txt", 9999)]
+
+        self.assertEqual(pdf_service.prune_cache(), 3)
+
+        self.assertFalse(any(os.path.exists(path) for path in expired))
+        self.assertTrue(all(os.path.exists(path) for path in kept))
+
+    def test_jobs_queued_here_are_left_alone(self):
+        digest = "e" * 64
+        path = self.touch(f"{digest}.job", 400)
+        with mock.patch.dict(pdf_service._pending, {digest: None}):
+            self.assertEqual(pdf_service.prune_cache(), 0)
+        self.assertTrue(os.path.exists(path))
+
+
+class PrunedFileTests(PDFServiceTestCase):
+    def request(self, path="/courses/report/1/pdf/"):
+        request = RequestFactory().get(path)
+        request.session = {}
+        request.user = make_users("manager", 1)[0]
+        return request
+
+    def test_a_file_pruned_after_the_status_check_is_queued_again(self):
+        request = self.request()
+        with mock.patch.object(pdf_service, "job_status", return_value=pdf_service.STATUS_DONE), \
+                mock.patch.object(pdf_service, "enqueue") as enqueue:
+            response = pdf_service.pdf_response(request, "t.html", {"a": 1}, "report")
+
+        self.assertEqual(response.status_code, 302)
+        enqueue.assert_called_once()
+        self.assertIn("source=%2Fcourses%2Freport%2F1%2Fpdf%2F", response["Location"])
+
+    def test_the_polling_view_sends_the_client_back_to_the_report(self):
+        digest = "f" * 64
+        self.client.force_login(make_users("employee", 1)[0])
+        session = self.client.session
+        session[pdf_service.SESSION_KEY] = [digest]
+        session.save()
+        url = reverse("courses:pdf_job", kwargs={"digest": digest})
+
+        with mock.patch.object(pdf_service, "job_status", return_value=pdf_service.STATUS_DONE):
+            response = self.client.get(url, {"filename": "report", "source": "/courses/report/1/pdf/"})
+            offsite = self.client.get(url, {"filename": "report", "source": "https://example.org/"})
+
+        self.assertRedirects(response, "/courses/report/1/pdf/", fetch_redirect_response=False)
+        self.assertEqual(offsite.status_code, 500)
+
+
+class _Template:
+    def render(self, context):
+        return "<p>{row_offset}:{rows}:{part_first}:{part_last}</p>".format(**{"rows": "", **context})
+
+
+class ChunkedRenderTests(PDFServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(mock.patch.object(pdf_service, "get_template", return_value=_Template()))
+
+    def parts(self, rows, chunk_rows):
+        return pdf_service.render_parts("t.html", {"rows": rows}, "rows", chunk_rows=chunk_rows)
+
+    def test_parts_are_rendered_lazily_one_slice_at_a_time(self):
+        parts = self.parts(list(range(5)), 2)
+        self.assertEqual(next(parts), "<p>0:[0, 1]:True:False</p>")
+        self.assertEqual(list(parts), ["<p>2:[2, 3]:False:False</p>", "<p>4:[4]:False:True</p>"])
+
+    def test_an_empty_roster_still_renders_one_part(self):
+        self.assertEqual(list(self.parts([], 2)), ["<p>0:[]:True:True</p>"])
+
+    def test_parts_are_merged_into_one_pdf(self):
+        from pypdf import PdfReader
+
+        path = os.path.join(self.cache_dir, "out.pdf")
+        html = '<div style="page-break-after: always">{}</div>'
+        self.assertTrue(pdf_service.write_pdf((html.format(n) for n in range(3)), path))
+
+        self.assertEqual(len(PdfReader(path).pages), 3)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ["out.pdf"])
@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from courses import reports
+from courses.models import Attendance, Session
+
+from .helpers import make_classroom, make_users
+
+
+class DashboardListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.classroom = make_classroom(title="Algebra")
+        self.student = make_users("student", 1)[0]
+        self.sessions = [self.session(hours) for hours in (0, 2, 4, 6)]
+
+    def session(self, hours):
+        start = timezone.now() + timedelta(hours=hours)
+        return Session.objects.create(
+            classroom=self.classroom, title="Class", start_time=start, end_time=start + timedelta(hours=1)
+        )
+
+    def mark(self, session):
+        return Attendance.objects.create(session=session, student=self.student, status=Attendance.STATUS_PRESENT)
+
+    def test_classes_are_annotated_with_their_marked_sessions(self):
+        self.mark(self.sessions[0])
+        other = make_users("student", 1, prefix="other")[0]
+        Attendance.objects.create(session=self.sessions[0], student=other)
+        self.mark(self.sessions[1])
+
+        with self.assertNumQueries(2):
+            classes = list(reports._with_completion(reports.dashboard_classes()))
+            [list(cls.sessions.all()) for cls in classes]
+
+        self.assertEqual(classes[0].marked_sessions, 2)
+        self.assertEqual(classes[0].attendance_completion, 50)
+
+    def test_the_listing_is_served_from_the_cache(self):
+        count, html = reports.dashboard_listing()
+        self.assertEqual(count, 1)
+        self.assertIn("Algebra", html)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(reports.dashboard_listing(), (count, html))
+
+    def test_writes_invalidate_the_listing(self):
+        _, before = reports.dashboard_listing()
+        self.assertIn("Attendance taken for 0 of 4", before)
+
+        self.mark(self.sessions[0])
+        _, after = reports.dashboard_listing()
+        self.assertIn("Attendance taken for 1 of 4", after)
+
+        self.classroom.title = "Geometry"
+        self.classroom.save()
+        self.assertIn("Geometry", reports.dashboard_listing()[1])
+
+    def test_a_lost_version_key_does_not_bring_back_an_old_listing(self):
+        reports.dashboard_listing()
+        cache.delete(reports.DASHBOARD_VERSION_KEY)
+        self.mark(self.sessions[0])
+
+        self.assertIn("Attendance taken for 1 of 4", reports.dashboard_listing()[1])
+
+
+class SessionReportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.classroom = make_classroom()
+        self.students = make_users("student", 4)
+        for student, name in zip(self.students, ["Dan", "Ann", "Cy", "Bea"]):
+            student.first_name = name
+            student.save()
+        self.classroom.students.add(*self.students)
+        start = timezone.now()
+        self.session = Session.objects.create(
+            classroom=self.classroom, title="Lecture", start_time=start, end_time=start + timedelta(hours=1)
+        )
+
+    def mark(self, student, status, note=None):
+        return Attendance.objects.create(session=self.session, student=student, status=status, note=note)
+
+    def test_rows_and_totals(self):
+        self.mark(self.students[0], Attendance.STATUS_PRESENT)
+        self.mark(self.students[1], Attendance.STATUS_LATE, note="bus")
+        self.mark(self.students[2], Attendance.STATUS_EXCUSED)
+
+        with self.assertNumQueries(2):
+            report = reports.session_report(self.session)
+
+        self.assertEqual(
+            [(row["name"], row["status"], row["note"]) for row in report["rows"]],
+            [("Ann", "late", "bus"), ("Bea", "absent", ""), ("Cy", "excused", ""), ("Dan", "present", "")],
+        )
+        self.assertEqual(
+            [report[key] for key in ("total", "present_count", "late_count", "excused_count", "absent_count")],
+            [4, 1, 1, 1, 1],
+        )
+        self.assertEqual(report["attendance_rate"], 50.0)
+
+    def test_the_report_is_cached_until_a_mark_or_the_roster_changes(self):
+        reports.session_report(self.session)
+        with self.assertNumQueries(0):
+            reports.session_report(self.session)
+
+        mark = self.mark(self.students[0], Attendance.STATUS_PRESENT)
+        self.assertEqual(reports.session_report(self.session)["present_count"], 1)
+
+        mark.delete()
+        self.assertEqual(reports.session_report(self.session)["present_count"], 0)
+
+        self.classroom.students.remove(self.students[3])
+        self.assertEqual(reports.session_report(self.session)["total"], 3)
+
+    def test_an_empty_roster(self):
+        self.classroom.students.clear()
+        report = reports.session_report(self.session)
+        self.assertEqual((report["rows"], report["total"], report["attendance_rate"]), ([], 0, 0))
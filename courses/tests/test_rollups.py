@@ -0,0 +1,131 @@
+import math
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from courses import rollups
+from courses.models import Assignment, Attendance, AttendanceRollup, Session
+from grades.models import Grade
+
+from .helpers import make_classroom, make_users
+
+
+class RollupTestCase(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom()
+        self.students = make_users("student", 3)
+        self.classroom.students.add(*self.students)
+        self.now = timezone.now()
+        # Four sessions held so far and one next week.
+        self.sessions = [self.session(days) for days in (-4, -3, -2, -1, 7)]
+
+    def session(self, days):
+        start = self.now + timedelta(days=days)
+        return Session.objects.create(
+            classroom=self.classroom, title="Class", start_time=start, end_time=start + timedelta(hours=1)
+        )
+
+    def mark(self, student, statuses):
+        for session, status in zip(self.sessions, statuses):
+            Attendance.objects.create(session=session, student=student, status=status)
+
+    def rows(self, **kwargs):
+        return {row.student_id: row for row in rollups.listing(classrooms=[self.classroom], now=self.now, **kwargs)}
+
+
+class MaintenanceTests(RollupTestCase):
+    def counts(self, student):
+        rollup = AttendanceRollup.objects.get(classroom=self.classroom, student=student)
+        return rollup.present, rollup.late, rollup.excused, rollup.absent
+
+    def test_saves_and_deletes_move_one_count(self):
+        mark = Attendance.objects.create(session=self.sessions[0], student=self.students[0], status=Attendance.STATUS_ABSENT)
+        self.assertEqual(self.counts(self.students[0]), (0, 0, 0, 1))
+
+        mark.status = Attendance.STATUS_LATE
+        mark.save()
+        self.assertEqual(self.counts(self.students[0]), (0, 1, 0, 0))
+
+        mark.delete()
+        self.assertEqual(self.counts(self.students[0]), (0, 0, 0, 0))
+
+    def test_rebuild_matches_the_incremental_counts(self):
+        self.mark(self.students[0], ["present", "late", "excused", "absent"])
+        self.mark(self.students[1], ["late", "late"])
+        rollups.fill_enrolled()
+        before = sorted(AttendanceRollup.objects.values_list("student_id", "present", "late", "excused", "absent"))
+
+        AttendanceRollup.objects.all().delete()
+        rollups.rebuild()
+
+        after = sorted(AttendanceRollup.objects.values_list("student_id", "present", "late", "excused", "absent"))
+        self.assertEqual(after, before)
+
+
+class ListingTests(RollupTestCase):
+    def test_the_rate_is_taken_over_held_sessions_without_excused_ones(self):
+        self.mark(self.students[0], ["present", "late", "excused", "absent"])
+        self.mark(self.students[1], ["present", "present"])
+
+        rows = self.rows()
+
+        self.assertEqual((rows[self.students[0].pk].counted, rows[self.students[0].pk].missed), (3, 1))
+        self.assertAlmostEqual(rows[self.students[0].pk].attendance_rate, 2 / 3)
+        # Sessions without a mark count as absences; next week's session does not.
+        self.assertEqual((rows[self.students[1].pk].counted, rows[self.students[1].pk].missed), (4, 2))
+        self.assertAlmostEqual(rows[self.students[1].pk].attendance_rate, 0.5)
+
+    def test_students_without_marks_are_listed(self):
+        rows = self.rows()
+        self.assertEqual(rows[self.students[2].pk].attendance_rate, 0.0)
+        self.assertEqual(rows[self.students[2].pk].missed, 4)
+
+    def test_withdrawn_students_are_not_listed(self):
+        self.mark(self.students[0], ["present"])
+        self.classroom.students.remove(self.students[0])
+        self.assertNotIn(self.students[0].pk, self.rows())
+
+    def test_filters(self):
+        self.mark(self.students[0], ["present", "present", "present", "absent"])
+        self.mark(self.students[1], ["present", "absent", "absent", "absent"])
+
+        self.assertEqual(set(self.rows(max_rate=0.5)), {self.students[1].pk, self.students[2].pk})
+        self.assertEqual(
+            [row.student_id for row in rollups.listing(classrooms=[self.classroom], now=self.now, sort="-rate")][0],
+            self.students[0].pk,
+        )
+
+
+class RiskTests(RollupTestCase):
+    def test_scores_combine_attendance_and_grades(self):
+        self.mark(self.students[0], ["present"] * 4)
+        self.mark(self.students[1], ["absent"] * 4)
+        assignment = Assignment.objects.create(course=self.classroom.course, title="Quiz")
+        Grade.objects.create(
+            student=self.students[1], course=self.classroom.course, assignment=assignment,
+            score=100, max_score=100, grade_type="quiz",
+        )
+        rows = sorted(rollups.listing(classrooms=[self.classroom], now=self.now), key=lambda row: row.student_id)
+
+        scores, grades = rollups.risk_scores(rows)
+
+        self.assertEqual(scores.tolist(), [0.0, 60.0, 100.0])
+        self.assertTrue(math.isnan(grades[0]))
+        self.assertEqual(grades[1], 100.0)
+
+    def test_rows_with_neither_signal_are_not_scored(self):
+        before_term = rollups.listing(classrooms=[self.classroom], now=self.now - timedelta(days=30))
+
+        scores, _ = rollups.risk_scores(list(before_term))
+
+        self.assertTrue(all(math.isnan(score) for score in scores))
+
+    def test_ranked_puts_the_highest_risk_first(self):
+        self.mark(self.students[0], ["present"] * 4)
+        self.mark(self.students[1], ["absent"] * 4)
+
+        ranked = rollups.ranked(rollups.listing(classrooms=[self.classroom], now=self.now), "risk")
+
+        self.assertEqual(ranked[-1].student_id, self.students[0].pk)
+        self.assertEqual(ranked[0].risk, 100.0)
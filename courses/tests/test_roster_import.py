@@ -0,0 +1,51 @@
+import io
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from courses import enrollment
+from courses.models import WaitlistEntry
+
+from .helpers import make_classroom, make_users
+
+
+class ParseRosterTests(TestCase):
+    def parse(self, text):
+        return enrollment.parse_roster_csv(io.BytesIO(text.encode("utf-8-sig")))
+
+    def test_uses_the_email_column_of_a_header(self):
+        emails = self.parse("name,Email\nAda,ADA@example.com\nBob,bob@example.com\nAda again,ada@example.com\n")
+        self.assertEqual(emails, ["ada@example.com", "bob@example.com"])
+
+    def test_without_a_header_the_first_column_is_read(self):
+        self.assertEqual(self.parse("ada@example.com,x\n\nnot an email\nbob@example.com\n"), [
+            "ada@example.com", "bob@example.com",
+        ])
+
+
+class ImportRosterTests(TestCase):
+    def setUp(self):
+        self.students = make_users("student", 4)
+        self.classroom = make_classroom(capacity=3)
+
+    def test_enrolls_known_students_and_reports_the_rest(self):
+        self.classroom.students.add(self.students[0])
+        WaitlistEntry.objects.create(classroom=self.classroom, student=self.students[1])
+
+        result = enrollment.import_roster(self.classroom, [
+            "student0@example.com", "student1@example.com", "nobody@example.com",
+        ])
+
+        self.assertEqual(result, {
+            "added": ["student1@example.com"],
+            "already_enrolled": ["student0@example.com"],
+            "unknown": ["nobody@example.com"],
+        })
+        self.classroom.refresh_from_db()
+        self.assertEqual(self.classroom.student_count, 2)
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_an_import_past_capacity_is_rejected_whole(self):
+        with self.assertRaises(ValidationError):
+            enrollment.import_roster(self.classroom, [s.email for s in self.students])
+        self.assertEqual(self.classroom.students.count(), 0)
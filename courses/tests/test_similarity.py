@@ -0,0 +1,98 @@
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from courses import similarity
+from courses.models import Assignment, Course, Submission, TextSignature
+from courses.utils import minhash
+
+from .helpers import make_users
+
+ESSAY = (
+    "The industrial revolution changed how people worked and lived. Factories drew families from the "
+    "countryside into crowded towns, where wages were low and hours were long. Over the following "
+    "decades reformers pushed for shorter shifts, safer machines and schooling for the children who "
+    "had been sent to work."
+)
+OTHER = (
+    "Photosynthesis lets plants turn light into chemical energy. Chlorophyll in the leaves absorbs "
+    "sunlight, and the plant combines carbon dioxide from the air with water drawn up by its roots to "
+    "build sugars, releasing oxygen as a by-product that most animals depend on to breathe."
+)
+
+
+class MinHashTests(SimpleTestCase):
+    def test_normalized_text_hashes_alike(self):
+        self.assertEqual(minhash.text_hash("Hello,  World!"), minhash.text_hash("hello world"))
+        self.assertIsNone(minhash.signature(" ... "))
+
+    def test_similarity_tracks_shared_shingles(self):
+        essay = minhash.signature(ESSAY)
+        self.assertEqual(minhash.similarity(essay, minhash.signature(ESSAY.upper())), 1.0)
+        self.assertGreater(minhash.similarity(essay, minhash.signature(ESSAY.replace("low", "poor"))), 0.7)
+        self.assertLess(minhash.similarity(essay, minhash.signature(OTHER)), 0.2)
+
+    def test_only_pairs_of_the_same_group_are_compared(self):
+        signatures = np.stack([minhash.signature(text) for text in (ESSAY, ESSAY, OTHER, ESSAY)])
+        pairs = minhash.similar_pairs(signatures, np.array([1, 1, 1, 2]), 0.8)
+        self.assertEqual([(i, j) for i, j, _ in pairs], [(0, 1)])
+
+
+class SubmissionSimilarityTests(TestCase):
+    def setUp(self):
+        self.assignment = Assignment.objects.create(course=Course.objects.create(title="History"), title="Essay")
+        self.students = make_users("student", 3)
+
+    def save(self, submission):
+        """Save ``submission`` and run the signing job it queues in this thread."""
+        with mock.patch.object(similarity, "_get_executor") as executor, \
+                self.captureOnCommitCallbacks(execute=True):
+            executor.return_value.submit.side_effect = lambda job, pk: similarity.sign_submission(pk)
+            submission.save()
+        return submission
+
+    def submit(self, student, content):
+        return self.save(Submission(assignment=self.assignment, student=student, content=content))
+
+    def test_copied_submissions_are_reported(self):
+        a = self.submit(self.students[0], ESSAY)
+        b = self.submit(self.students[1], ESSAY.replace("towns", "cities"))
+        self.submit(self.students[2], OTHER)
+
+        report = similarity.submission_report(self.assignment)
+
+        self.assertEqual(len(report), 1)
+        self.assertEqual({report[0]["submission_a"], report[0]["submission_b"]}, {a.pk, b.pk})
+
+    def test_signing_waits_for_the_commit_and_leaves_the_request(self):
+        with mock.patch.object(similarity, "_get_executor") as executor:
+            with self.captureOnCommitCallbacks() as callbacks:
+                submission = Submission.objects.create(assignment=self.assignment, student=self.students[0], content=ESSAY)
+            executor.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        executor.return_value.submit.assert_called_once_with(similarity._sign_job, submission.pk)
+        self.assertFalse(TextSignature.objects.exists())
+
+    def test_texts_are_resigned_only_when_they_change(self):
+        submission = self.submit(self.students[0], ESSAY)
+        entry = (self.assignment.pk, self.students[0].pk, ESSAY.upper() + "  ")
+
+        self.assertEqual(similarity.record(TextSignature.KIND_SUBMISSION, [entry]), 0)
+
+        submission.content = ""
+        self.save(submission)
+        self.assertFalse(TextSignature.objects.exists())
+
+    def test_entries_are_recorded_one_chunk_at_a_time(self):
+        entries = (
+            (self.assignment.pk, student.pk, text)
+            for student, text in zip(self.students, [ESSAY, OTHER, ESSAY])
+        )
+        with mock.patch.object(similarity, "CHUNK_SIZE", 2), \
+                mock.patch.object(similarity, "_record_chunk", wraps=similarity._record_chunk) as record_chunk:
+            self.assertEqual(similarity.record(TextSignature.KIND_SUBMISSION, entries), 3)
+
+        self.assertEqual([len(call.args[1]) for call in record_chunk.call_args_list], [2, 1])
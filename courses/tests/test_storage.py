@@ -0,0 +1,120 @@
+import hashlib
+import os
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.test import TestCase
+
+from courses.models import Assignment, Course, StoredBlob, StoredFile
+
+from .helpers import use_temp_dirs
+
+
+def digest_of(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class StorageTestCase(TestCase):
+    def setUp(self):
+        use_temp_dirs(self, MEDIA_ROOT="media")
+
+    def blob_exists(self, data):
+        return os.path.exists(default_storage.blob_path(digest_of(data)))
+
+
+class RefcountTests(StorageTestCase):
+    def test_identical_uploads_share_one_blob(self):
+        first = default_storage.save("a/one.txt", ContentFile(b"same bytes"))
+        second = default_storage.save("b/two.txt", ContentFile(b"same bytes"))
+
+        self.assertEqual(StoredBlob.objects.get(pk=digest_of(b"same bytes")).refcount, 2)
+        self.assertEqual(os.stat(default_storage.path(first)).st_ino, os.stat(default_storage.path(second)).st_ino)
+
+    def test_the_blob_goes_with_its_last_name(self):
+        first = default_storage.save("a/one.txt", ContentFile(b"same bytes"))
+        second = default_storage.save("b/two.txt", ContentFile(b"same bytes"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            default_storage.delete(first)
+        self.assertFalse(default_storage.exists(first))
+        self.assertTrue(self.blob_exists(b"same bytes"))
+        self.assertEqual(StoredBlob.objects.get(pk=digest_of(b"same bytes")).refcount, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            default_storage.delete(second)
+        self.assertFalse(self.blob_exists(b"same bytes"))
+        self.assertFalse(StoredBlob.objects.exists())
+
+    def test_files_stay_until_the_delete_commits(self):
+        name = default_storage.save("a/one.txt", ContentFile(b"bytes"))
+        with self.captureOnCommitCallbacks() as callbacks:
+            default_storage.delete(name)
+            self.assertTrue(default_storage.exists(name))
+        self.assertEqual(len(callbacks), 1)
+
+
+class RollbackTests(StorageTestCase):
+    def test_a_failed_save_leaves_nothing_on_disk(self):
+        with mock.patch.object(StoredFile.objects, "create", side_effect=RuntimeError("insert failed")):
+            with self.assertRaises(RuntimeError):
+                default_storage.save("a/one.txt", ContentFile(b"bytes"))
+
+        self.assertFalse(default_storage.exists("a/one.txt"))
+        self.assertFalse(self.blob_exists(b"bytes"))
+
+    def test_saves_rolled_back_by_the_caller_are_swept(self):
+        kept = default_storage.save("a/kept.txt", ContentFile(b"shared"))
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            lost = default_storage.save("a/lost.txt", ContentFile(b"lost"))
+            shared = default_storage.save("a/shared.txt", ContentFile(b"shared"))
+            raise RuntimeError("the caller failed")
+
+        default_storage.sweep_pending(max_age=0)
+
+        self.assertFalse(default_storage.exists(lost))
+        self.assertFalse(self.blob_exists(b"lost"))
+        self.assertFalse(default_storage.exists(shared))
+        self.assertTrue(default_storage.exists(kept))
+        self.assertTrue(self.blob_exists(b"shared"))
+
+
+class FileFieldReleaseTests(StorageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = Course.objects.create(title="Course")
+
+    def assignment(self, data):
+        assignment = Assignment(course=self.course, title="Essay")
+        assignment.attachment.save("brief.txt", ContentFile(data), save=False)
+        assignment.save()
+        return assignment
+
+    def test_replacing_an_attachment_releases_the_old_file(self):
+        assignment = self.assignment(b"first brief")
+        old_name = assignment.attachment.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            assignment.attachment.save("brief.txt", ContentFile(b"second brief"))
+
+        self.assertFalse(StoredFile.objects.filter(name=old_name).exists())
+        self.assertFalse(self.blob_exists(b"first brief"))
+        self.assertTrue(self.blob_exists(b"second brief"))
+
+    def test_deleting_the_row_releases_its_file(self):
+        assignment = self.assignment(b"brief")
+        with self.captureOnCommitCallbacks(execute=True):
+            assignment.delete()
+        self.assertFalse(StoredFile.objects.exists())
+        self.assertFalse(self.blob_exists(b"brief"))
+
+    def test_a_name_shared_with_a_cloned_row_is_kept(self):
+        original = self.assignment(b"brief")
+        clone = Assignment.objects.create(course=self.course, title="Copy", attachment=original.attachment.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            clone.delete()
+
+        self.assertTrue(default_storage.exists(original.attachment.name))
+        self.assertTrue(self.blob_exists(b"brief"))
@@ -0,0 +1,71 @@
+import io
+import zipfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from django.urls import reverse
+
+from courses.models import Assignment, Submission
+from courses.utils.zip_stream import stream_zip_chunks
+
+from .helpers import make_classroom, make_users, use_temp_dirs
+
+
+class StreamZipTests(TestCase):
+    def test_chunks_form_a_valid_archive(self):
+        members = [("a.txt", iter([b"hello ", b"world"])), ("dir/b.bin", iter([bytes(range(256)) * 100]))]
+        data = b"".join(stream_zip_chunks(members, compression=zipfile.ZIP_DEFLATED))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.read("a.txt"), b"hello world")
+            self.assertEqual(archive.read("dir/b.bin"), bytes(range(256)) * 100)
+
+
+class SubmissionDownloadAllTests(TestCase):
+    def setUp(self):
+        use_temp_dirs(self, MEDIA_ROOT="media")
+        self.instructor = make_users("instructor", 1)[0]
+        self.students = make_users("student", 3)
+        classroom = make_classroom(instructor=self.instructor)
+        self.assignment = Assignment.objects.create(course=classroom.course, title="Essay")
+        self.url = reverse("courses:submission_download_all", args=[self.assignment.pk])
+
+    def submit(self, student, data):
+        submission = Submission(assignment=self.assignment, student=student)
+        if data is not None:
+            submission.file.save("essay.txt", ContentFile(data), save=False)
+        submission.save()
+        return submission
+
+    def download(self, user):
+        self.client.force_login(user)
+        return self.client.get(self.url)
+
+    def test_every_submitted_file_is_in_the_archive(self):
+        self.submit(self.students[0], b"first")
+        self.submit(self.students[1], b"second")
+        self.submit(self.students[2], None)
+
+        response = self.download(self.instructor)
+
+        self.assertTrue(response.streaming)
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+            self.assertEqual(
+                {name: archive.read(name) for name in archive.namelist()},
+                {
+                    f"assignments/{self.assignment.pk}/{self.students[0].pk}/essay.txt": b"first",
+                    f"assignments/{self.assignment.pk}/{self.students[1].pk}/essay.txt": b"second",
+                },
+            )
+
+    def test_missing_files_are_skipped(self):
+        kept = self.submit(self.students[0], b"first")
+        lost = self.submit(self.students[1], b"second")
+        Submission.objects.filter(pk=lost.pk).update(file="assignments/gone.txt")
+
+        with zipfile.ZipFile(io.BytesIO(b"".join(self.download(self.instructor).streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), [kept.file.name])
+
+    def test_other_instructors_are_refused(self):
+        self.assertEqual(self.download(make_users("instructor", 1, prefix="other")[0]).status_code, 403)
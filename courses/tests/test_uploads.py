@@ -0,0 +1,103 @@
+import hashlib
+import io
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from courses import uploads
+from courses.models import Assignment, StoredBlob, StoredFile, Submission, UploadSession
+
+from .helpers import make_classroom, make_users, use_temp_dirs
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        use_temp_dirs(self, MEDIA_ROOT="media", UPLOAD_CHUNK_DIR="chunks")
+        self.student = make_users("student", 1)[0]
+        classroom = make_classroom()
+        classroom.students.add(self.student)
+        self.assignment = Assignment.objects.create(
+            course=classroom.course, title="Essay", due_date=timezone.now() + timedelta(days=1),
+        )
+
+    def start(self, data, checksum=None):
+        return uploads.start_upload(
+            self.student, self.assignment, "essay.txt", len(data),
+            checksum or hashlib.sha256(data).hexdigest(),
+        )
+
+    def send(self, upload, data, offset, end):
+        return uploads.append_chunk(upload, offset, io.BytesIO(data[offset:end]), end - offset)
+
+    def test_resume_continues_at_the_received_offset(self):
+        data = b"0123456789" * 1000
+        upload = self.send(self.start(data), data, 0, 4000)
+
+        # The client reconnects and asks for the same file again.
+        resumed = self.start(data)
+        self.assertEqual(resumed.pk, upload.pk)
+        self.assertEqual(resumed.received, 4000)
+        with self.assertRaises(uploads.UploadError) as raised:
+            self.send(resumed, data, 0, 4000)
+        self.assertEqual(raised.exception.status, 409)
+
+        # A process that never saw the first chunk hashes it from disk.
+        uploads._forget_hasher(upload.pk)
+        resumed = self.send(resumed, data, 4000, len(data))
+        submission = uploads.complete_upload(resumed)
+
+        self.assertEqual(submission.file.read(), data)
+        self.assertEqual(UploadSession.objects.get(pk=upload.pk).status, UploadSession.STATUS_DONE)
+
+    def test_checksum_mismatch_fails_the_upload(self):
+        data = b"the real file"
+        upload = self.start(data, checksum=hashlib.sha256(b"another file").hexdigest())
+        upload = self.send(upload, data, 0, len(data))
+
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.complete_upload(upload)
+
+        self.assertEqual(raised.exception.status, 422)
+        self.assertEqual(UploadSession.objects.get(pk=upload.pk).status, UploadSession.STATUS_FAILED)
+        self.assertFalse(Submission.objects.filter(assignment=self.assignment).exists())
+
+    def test_resubmission_releases_the_replaced_file(self):
+        first, second = b"first draft", b"second draft"
+        with self.captureOnCommitCallbacks(execute=True):
+            old_name = uploads.complete_upload(self.send(self.start(first), first, 0, len(first))).file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            submission = uploads.complete_upload(self.send(self.start(second), second, 0, len(second)))
+
+        self.assertFalse(StoredFile.objects.filter(name=old_name).exists())
+        self.assertFalse(StoredBlob.objects.filter(pk=hashlib.sha256(first).hexdigest()).exists())
+        self.assertEqual(submission.file.read(), second)
+
+    def test_failed_completion_can_be_retried(self):
+        data = b"some answers"
+        upload = self.send(self.start(data), data, 0, len(data))
+        with mock.patch.object(Submission, "save", side_effect=RuntimeError("database went away")):
+            with self.assertRaises(RuntimeError):
+                uploads.complete_upload(upload)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, UploadSession.STATUS_ACTIVE)
+        self.assertEqual(uploads.complete_upload(upload).file.read(), data)
+
+    def test_purge_removes_idle_sessions_and_their_temp_files(self):
+        data = b"half a file"
+        idle = self.send(self.start(data), data, 0, 4)
+        fresh = uploads.start_upload(
+            self.student, self.assignment, "other.txt", 3, hashlib.sha256(b"new").hexdigest(),
+        )
+        UploadSession.objects.filter(pk=idle.pk).update(updated_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(uploads.purge_stale(timedelta(days=1)), 1)
+
+        self.assertFalse(UploadSession.objects.filter(pk=idle.pk).exists())
+        self.assertFalse(os.path.exists(uploads.temp_path(idle)))
+        self.assertTrue(os.path.exists(uploads.temp_path(fresh)))
@@ -0,0 +1,332 @@
+"""
+Chunked, resumable submission uploads.
+
+A client starts an upload by declaring the file name, size and SHA-256, then
+appends raw chunks at the offset the server reports and finally asks for the
+upload to be completed. Chunks go straight from the request stream into a
+temp file under ``UPLOAD_CHUNK_DIR``; nothing is buffered in memory beyond
+one read block.
+
+The whole-file digest is computed while chunks arrive. Each process keeps the
+running hash for the uploads it has seen, so completing normally needs no
+second pass over the file; a process that missed some chunks (for example
+after a reconnect that landed on another worker) only hashes the bytes it has
+not seen yet. The verified temp file is then handed to storage as-is.
+"""
+import hashlib
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import Classroom, Submission, UploadSession
+
+
+READ_BLOCK = 64 * 1024
+MAX_TRACKED_HASHERS = 1000
+
+# A chunk write that has not finished after this long is considered dead and
+# its claim on the upload may be taken over by a retry.
+WRITE_LEASE = timedelta(minutes=2)
+
+_SHA256_RE = re.compile(r"[0-9a-f]{64}")
+
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.extra = extra
+
+
+class VerifiedUpload(File):
+    """A finished temp file whose SHA-256 has already been checked."""
+
+    def __init__(self, path, name, sha256):
+        super().__init__(open(path, "rb"), name=name)
+        self.sha256 = sha256
+        self._temporary_path = path
+
+    def temporary_file_path(self):
+        return self._temporary_path
+
+
+def chunk_dir():
+    path = str(getattr(settings, "UPLOAD_CHUNK_DIR", os.path.join(settings.BASE_DIR, "upload_chunks")))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def max_chunk_size():
+    return getattr(settings, "UPLOAD_MAX_CHUNK_SIZE", 8 * 1024 * 1024)
+
+
+def temp_path(upload):
+    return os.path.join(chunk_dir(), f"{upload.pk}.part")
+
+
+def describe(upload):
+    return {
+        "id": str(upload.pk),
+        "filename": upload.filename,
+        "size": upload.size,
+        "offset": upload.received,
+        "status": upload.status,
+        "max_chunk_size": max_chunk_size(),
+    }
+
+
+def can_submit(user, assignment):
+    if getattr(user, "role", None) != "student":
+        return False
+    return Classroom.objects.filter(course_id=assignment.course_id, students=user).exists()
+
+
+def _deadline_passed(assignment, when=None):
+    return bool(assignment.due_date and (when or timezone.now()) > assignment.due_date)
+
+
+def _hasher_at(upload, offset):
+    """Return a sha256 object that covers the first ``offset`` bytes of the upload."""
+    with _hashers_lock:
+        state = _hashers.pop(upload.pk, None)
+    hashed, hasher = state if state and state[0] <= offset else (0, hashlib.sha256())
+
+    if hashed < offset:
+        with open(temp_path(upload), "rb") as fh:
+            fh.seek(hashed)
+            remaining = offset - hashed
+            while remaining:
+                data = fh.read(min(READ_BLOCK, remaining))
+                if not data:
+                    break
+                hasher.update(data)
+                remaining -= len(data)
+    return hasher
+
+
+def _keep_hasher(upload_id, offset, hasher):
+    with _hashers_lock:
+        _hashers[upload_id] = (offset, hasher)
+        _hashers.move_to_end(upload_id)
+        while len(_hashers) > MAX_TRACKED_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def _forget_hasher(upload_id):
+    with _hashers_lock:
+        _hashers.pop(upload_id, None)
+
+
+def start_upload(user, assignment, filename, size, checksum):
+    """Create an upload session, or return the unfinished one for the same file."""
+    if not can_submit(user, assignment):
+        raise UploadError("You are not enrolled in this assignment's course.", status=403)
+    if _deadline_passed(assignment):
+        raise UploadError("Deadline has passed. You cannot submit.", status=403)
+
+    checksum = (checksum or "").lower()
+    if not _SHA256_RE.fullmatch(checksum):
+        raise UploadError("checksum must be a hex SHA-256 digest.")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("size must be an integer.")
+    if size <= 0:
+        raise UploadError("size must be positive.")
+    if size > assignment.upload_limit_bytes:
+        raise UploadError("File is larger than this assignment allows.", status=413, limit=assignment.upload_limit_bytes)
+
+    filename = get_valid_filename(os.path.basename(filename or "")) or "submission"
+
+    existing = (
+        UploadSession.objects
+        .filter(
+            assignment=assignment, student=user, checksum=checksum, size=size,
+            status__in=[UploadSession.STATUS_ACTIVE, UploadSession.STATUS_WRITING],
+        )
+        .first()
+    )
+    if existing and os.path.exists(temp_path(existing)):
+        return existing
+
+    upload = UploadSession.objects.create(
+        assignment=assignment, student=user, filename=filename, size=size, checksum=checksum,
+    )
+    open(temp_path(upload), "wb").close()
+    return upload
+
+
+def append_chunk(upload, offset, stream, length, chunk_checksum=None):
+    """
+    Write ``length`` bytes from ``stream`` at ``offset``. The offset must match
+    what the server has already received, which is what makes retries after a
+    disconnect safe.
+    """
+    if upload.status not in (UploadSession.STATUS_ACTIVE, UploadSession.STATUS_WRITING):
+        raise UploadError("Upload is no longer accepting data.", status=409, offset=upload.received)
+    if offset != upload.received:
+        raise UploadError("Offset does not match the received size.", status=409, offset=upload.received)
+    if length <= 0:
+        raise UploadError("Empty chunk.")
+    if length > max_chunk_size():
+        raise UploadError("Chunk is too large.", status=413, max_chunk_size=max_chunk_size())
+    if offset + length > upload.size:
+        raise UploadError("Chunk goes past the declared file size.", status=413)
+
+    now = timezone.now()
+    claimed = (
+        UploadSession.objects
+        .filter(pk=upload.pk, received=offset)
+        .filter(
+            Q(status=UploadSession.STATUS_ACTIVE)
+            | Q(status=UploadSession.STATUS_WRITING, updated_at__lt=now - WRITE_LEASE)
+        )
+        .update(status=UploadSession.STATUS_WRITING, updated_at=now)
+    )
+    if not claimed:
+        upload.refresh_from_db()
+        raise UploadError("Another chunk is being written.", status=409, offset=upload.received)
+
+    path = temp_path(upload)
+    written = 0
+    try:
+        hasher = _hasher_at(upload, offset)
+        chunk_hasher = hashlib.sha256() if chunk_checksum else None
+        with open(path, "r+b") as fh:
+            fh.seek(offset)
+            fh.truncate()
+            while written < length:
+                data = stream.read(min(READ_BLOCK, length - written))
+                if not data:
+                    break
+                fh.write(data)
+                hasher.update(data)
+                if chunk_hasher:
+                    chunk_hasher.update(data)
+                written += len(data)
+        if written != length:
+            raise UploadError("Chunk ended early.", offset=offset)
+        if chunk_hasher and chunk_hasher.hexdigest() != chunk_checksum.lower():
+            raise UploadError("Chunk checksum mismatch.", offset=offset)
+    except BaseException:
+        with open(path, "r+b") as fh:
+            fh.truncate(offset)
+        UploadSession.objects.filter(pk=upload.pk).update(status=UploadSession.STATUS_ACTIVE, updated_at=timezone.now())
+        raise
+
+    upload.received = offset + written
+    upload.status = UploadSession.STATUS_ACTIVE
+    UploadSession.objects.filter(pk=upload.pk).update(
+        received=upload.received, status=upload.status, updated_at=timezone.now()
+    )
+    _keep_hasher(upload.pk, upload.received, hasher)
+    return upload
+
+
+def _fail(upload, message, status):
+    UploadSession.objects.filter(pk=upload.pk).update(status=UploadSession.STATUS_FAILED, updated_at=timezone.now())
+    _forget_hasher(upload.pk)
+    try:
+        os.remove(temp_path(upload))
+    except OSError:
+        pass
+    raise UploadError(message, status=status)
+
+
+def complete_upload(upload):
+    """Verify the checksum and attach the file to the student's Submission."""
+    if upload.received != upload.size:
+        raise UploadError("Upload is not complete yet.", status=409, offset=upload.received)
+
+    claimed = (
+        UploadSession.objects
+        .filter(pk=upload.pk, status=UploadSession.STATUS_ACTIVE, received=upload.size)
+        .update(status=UploadSession.STATUS_COMPLETING, updated_at=timezone.now())
+    )
+    if not claimed:
+        raise UploadError("Upload is already being completed.", status=409)
+
+    try:
+        submission = _attach(upload)
+    except UploadError:
+        raise
+    except BaseException:
+        # Let the client retry instead of leaving the session stuck in COMPLETING.
+        UploadSession.objects.filter(pk=upload.pk, status=UploadSession.STATUS_COMPLETING).update(
+            status=UploadSession.STATUS_ACTIVE, updated_at=timezone.now(),
+        )
+        raise
+    upload.status = UploadSession.STATUS_DONE
+    return submission
+
+
+def _attach(upload):
+    digest = _hasher_at(upload, upload.size).hexdigest()
+    _forget_hasher(upload.pk)
+    if digest != upload.checksum:
+        _fail(upload, "Checksum mismatch, please upload the file again.", status=422)
+
+    # An upload started before the deadline may finish after it.
+    assignment = upload.assignment
+    if _deadline_passed(assignment, upload.created_at):
+        _fail(upload, "Deadline has passed. You cannot submit.", status=403)
+
+    submission = (
+        Submission.objects.filter(assignment=assignment, student=upload.student).first()
+        or Submission(assignment=assignment, student=upload.student)
+    )
+    verified = VerifiedUpload(temp_path(upload), upload.filename, digest)
+    try:
+        submission.file.save(upload.filename, verified, save=False)
+    finally:
+        verified.close()
+    new_name = submission.file.name
+    try:
+        with transaction.atomic():
+            submission.save()
+            UploadSession.objects.filter(pk=upload.pk).update(
+                status=UploadSession.STATUS_DONE, updated_at=timezone.now(),
+            )
+    except BaseException:
+        # Storage moved the temp file into place; put it back so a retry can complete.
+        with submission.file.storage.open(new_name, "rb") as src, open(temp_path(upload), "wb") as dst:
+            shutil.copyfileobj(src, dst, READ_BLOCK)
+        submission.file.storage.delete(new_name)
+        raise
+    # The replaced file is released by the FileField pre_save hook (courses.signals).
+    return submission
+
+
+def purge_stale(max_age):
+    """
+    Delete every upload session untouched for ``max_age``, in any state, and
+    its temp file. Unfinished ones can no longer be resumed by then; finished
+    and failed ones are only a record of the attempt, the file itself lives
+    on the Submission.
+    """
+    cutoff = timezone.now() - max_age
+    stale = UploadSession.objects.filter(updated_at__lt=cutoff)
+    removed = 0
+    for upload in stale.only("pk").iterator():
+        _forget_hasher(upload.pk)
+        try:
+            os.remove(temp_path(upload))
+        except OSError:
+            pass
+        removed += 1
+    stale.delete()
+    return removed
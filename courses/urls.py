@@ -18,6 +18,7 @@ urlpatterns = [
     path('create/', views.CourseCreateView.as_view(), name='course_create'),
     path('<int:pk>/update/', views.CourseUpdateView.as_view(), name='course_update'),
     path('<int:pk>/delete/', views.CourseDeleteView.as_view(), name='course_delete'),
+    path('<int:pk>/clone/', views.CourseCloneView.as_view(), name='course_clone'),
 
     # -------------------------------
     # Classes CRUD
@@ -27,6 +28,9 @@ urlpatterns = [
     path('classes/<int:pk>/', views.ClassDetailView.as_view(), name='class_detail'),
     path('classes/<int:pk>/update/', views.ClassUpdateView.as_view(), name='class_update'),
     path('classes/<int:pk>/delete/', views.ClassDeleteView.as_view(), name='class_delete'),
+    path('classes/<int:pk>/enroll/', views.ClassEnrollView.as_view(), name='class_enroll'),
+    path('classes/<int:pk>/withdraw/', views.ClassWithdrawView.as_view(), name='class_withdraw'),
+    path('classes/<int:pk>/roster/import/', views.ClassRosterImportView.as_view(), name='roster_import'),
 
     # -------------------------------
     # Sessions CRUD
@@ -35,6 +39,8 @@ urlpatterns = [
     path('classroom/<int:classroom_id>/sessions/create/', views.SessionCreateView.as_view(), name='session_create'),
     path('sessions/<int:pk>/update/', views.SessionUpdateView.as_view(), name='session_update'),
     path('sessions/<int:pk>/delete/', views.SessionDeleteView.as_view(), name='session_delete'),
+    path('sessions/<int:pk>/checkin/', views.SessionCheckInView.as_view(), name='session_checkin'),
+    path('sessions/<int:pk>/checkin/toggle/', views.SessionCheckInToggleView.as_view(), name='session_checkin_toggle'),
 
     # -------------------------------
     # Assignments CRUD
@@ -48,8 +54,14 @@ urlpatterns = [
     # Submissions
     # -------------------------------
     path('assignments/<int:assignment_pk>/submissions/', views.SubmissionListView.as_view(), name='submission_list'),
+    path('assignments/<int:assignment_pk>/submissions/download/', views.SubmissionDownloadAllView.as_view(), name='submission_download_all'),
+    path('assignments/<int:assignment_pk>/submissions/export/', views.SubmissionExportView.as_view(), name='submission_export'),
+    path('assignments/<int:assignment_pk>/submissions/similarity/', views.SubmissionSimilarityView.as_view(), name='submission_similarity'),
     path('assignments/<int:assignment_pk>/submit/', views.SubmissionCreateView.as_view(), name='submission_create'),
     path('submissions/<int:pk>/', views.SubmissionUpdateView.as_view(), name='submission_update'),
+    path('assignments/<int:assignment_pk>/uploads/', views.SubmissionUploadStartView.as_view(), name='submission_upload_start'),
+    path('uploads/<uuid:upload_id>/', views.SubmissionUploadView.as_view(), name='submission_upload'),
+    path('uploads/<uuid:upload_id>/complete/', views.SubmissionUploadCompleteView.as_view(), name='submission_upload_complete'),
 
     # -------------------------------
     # Instructor Views
@@ -69,9 +81,22 @@ urlpatterns = [
     path("reports/", views.ReportsDashboardView.as_view(), name="reports_dashboard"),
     path("reports/class/<int:class_id>/", views.ReportClassView.as_view(), name="report_class"),
     path("reports/class/<int:class_id>/pdf/", views.ReportClassPDFView.as_view(), name="report_class_pdf"),
+    path("reports/class/<int:class_id>/export/", views.ReportClassExportView.as_view(), name="report_class_export"),
     path("reports/class/<int:class_id>/students/pdf/", views.StudentListPDFView.as_view(), name="student_list_pdf"),
+    path("reports/class/<int:class_id>/students/export/", views.StudentListExportView.as_view(), name="student_list_export"),
     path("reports/session/<int:session_id>/", views.ReportSessionView.as_view(), name="report_session"),
     path("reports/session/<int:session_id>/pdf/", views.ReportSessionPDFView.as_view(), name="report_session_pdf"),
+    path("reports/session/<int:session_id>/export/", views.ReportSessionExportView.as_view(), name="report_session_export"),
+    path("reports/pdf/<slug:digest>/", views.PDFJobView.as_view(), name="pdf_job"),
+    path("reports/attendance-risk/", views.AttendanceRiskView.as_view(), name="report_attendance_risk"),
+
+    # -------------------------------
+    # Calendar
+    # -------------------------------
+    path("calendar/", views.CalendarView.as_view(), name="calendar"),
+    path("calendar/events/", views.CalendarEventsView.as_view(), name="calendar_events"),
+    path("calendar/feed/reset/", views.CalendarFeedResetView.as_view(), name="calendar_feed_reset"),
+    path("calendar/feed/<str:token>.ics", views.CalendarFeedView.as_view(), name="calendar_feed"),
     
 
     ]
\ No newline at end of file
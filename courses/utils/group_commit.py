@@ -0,0 +1,80 @@
+"""
+Group commit for bursts of small writes.
+
+Request threads hand their row to a shared ``GroupCommit`` and wait. The
+first waiter becomes the leader: it collects rows for up to ``max_delay``
+seconds (or until ``max_batch`` are queued), writes them all with one call of
+``write`` and wakes the others, handing leadership to the first row of the
+next batch. A burst of N requests then costs a few transactions instead of
+N, which matters most where writes serialize (SQLite) and every transaction
+waits for the previous one.
+"""
+import threading
+import time
+
+
+class GroupCommit:
+    """
+    ``submit`` blocks until the row has been written (or raises what the
+    write raised). Rows are written by the submitting request threads
+    themselves, one leader per batch, so no extra thread or database
+    connection is involved.
+    """
+
+    def __init__(self, write, max_batch, max_delay):
+        self._write = write
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._pending = []
+        self._leader = False
+        self.batches = 0
+        self.rows = 0
+
+    def submit(self, row):
+        slot = {"row": row, "wake": threading.Event(), "lead": False, "done": False, "error": None}
+        with self._cond:
+            self._pending.append(slot)
+            if not self._leader:
+                self._leader = slot["lead"] = True
+            elif len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+        while not slot["done"]:
+            if slot["lead"]:
+                slot["lead"] = False
+                self._lead()
+            else:
+                slot["wake"].wait()
+                slot["wake"].clear()
+        if slot["error"] is not None:
+            raise slot["error"]
+
+    def _lead(self):
+        deadline = time.monotonic() + self.max_delay
+        with self._cond:
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            # The next batch starts collecting while this one is written.
+            if self._pending:
+                successor = self._pending[0]
+                successor["lead"] = True
+                successor["wake"].set()
+            else:
+                self._leader = False
+
+        error = None
+        try:
+            self._write([slot["row"] for slot in batch])
+        except Exception as e:
+            error = e
+        with self._cond:
+            self.batches += 1
+            self.rows += len(batch)
+        for slot in batch:
+            slot["error"] = error
+            slot["done"] = True
+            slot["wake"].set()
@@ -0,0 +1,103 @@
+"""
+MinHash signatures and LSH banding for near-duplicate texts.
+
+A text is reduced to its set of word ``SHINGLE_WORDS``-grams; the Jaccard
+similarity of two such sets is estimated by the share of positions where
+their MinHash signatures agree. Each of the ``PERMUTATIONS`` positions is
+the minimum of one universal hash ``(a * x + b) mod p`` over the shingles'
+CRC32s, with ``p`` a prime just above 2**32, so every product fits an
+unsigned 64-bit integer.
+
+To find similar pairs without comparing every pair, signatures are cut into
+``BANDS`` bands of ``ROWS`` positions and texts are bucketed by each band:
+two texts become candidates when one of their bands is identical, which
+happens with probability ``1 - (1 - s**ROWS)**BANDS`` for similarity ``s``
+(about 0.95 at 0.8, and 0.2 at 0.5). Candidates are then scored on their
+whole signatures.
+
+Stored signatures depend on every constant here; changing one means signing
+all texts again.
+"""
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+
+SHINGLE_WORDS = 3
+PERMUTATIONS = 128
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(20261019)
+_A = _rng.integers(1, 2 ** 32, size=PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 2 ** 32, size=PERMUTATIONS, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text):
+    return _WORD.findall((text or "").lower())
+
+
+def text_hash(text):
+    """Fingerprint of the normalized text, to skip signing it again when it has not changed."""
+    return hashlib.blake2b(" ".join(words(text)).encode(), digest_size=16).hexdigest()
+
+
+def signature(text):
+    """``(PERMUTATIONS,)`` uint32 MinHash signature of ``text``; None if it has no words."""
+    tokens = words(text)
+    if not tokens:
+        return None
+    size = min(SHINGLE_WORDS, len(tokens))
+    shingles = {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    values = (np.outer(hashes, _A) + _B) % _PRIME
+    return (values.min(axis=0) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def candidate_pairs(signatures, groups=None):
+    """
+    Index pairs ``(i, j)``, ``i < j``, of rows of the ``(n, PERMUTATIONS)``
+    array ``signatures`` that share at least one band; with ``groups`` (one
+    label per row) only rows of the same group are paired.
+    """
+    n = len(signatures)
+    if n < 2:
+        return set()
+    groups = np.zeros(n, dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+    pairs = set()
+    for band in range(BANDS):
+        keys = np.ascontiguousarray(np.column_stack([
+            groups.astype(np.uint32), signatures[:, band * ROWS:(band + 1) * ROWS],
+        ]).astype(np.uint32))
+        keys = keys.view(np.dtype((np.void, 4 * (ROWS + 1)))).ravel()
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1], True])
+        for start, end in zip(starts[:-1], starts[1:]):
+            if end - start > 1:
+                members = np.sort(order[start:end]).tolist()
+                for x in range(len(members)):
+                    for y in range(x + 1, len(members)):
+                        pairs.add((members[x], members[y]))
+    return pairs
+
+
+def similar_pairs(signatures, groups=None, threshold=0.8):
+    """``[(i, j, similarity)]`` of candidate pairs at least ``threshold`` similar, most similar first."""
+    found = []
+    for i, j in candidate_pairs(signatures, groups):
+        score = similarity(signatures[i], signatures[j])
+        if score >= threshold:
+            found.append((i, j, score))
+    found.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+    return found
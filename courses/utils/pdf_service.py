@@ -0,0 +1,352 @@
+"""
+Background PDF rendering for report downloads.
+
+The report template is rendered to HTML inside the request (so every database
+access happens on the request's own connection) and the slow xhtml2pdf pass is
+handed to a small local thread pool. Finished files are written to
+``PDF_CACHE_DIR`` under a digest of the template name and context, which makes
+the cache shared between worker processes and lets the polling view pick up a
+job no matter which process rendered it. Files past their timeout are pruned
+by ``prune_cache``, which ``enqueue`` runs at most once per cache timeout and
+the ``purge_pdf_cache`` command runs on demand.
+
+Long tables can be rendered in parts: when ``rows_key`` names a list in the
+context that is longer than ``PDF_CHUNK_ROWS``, each slice is rendered to HTML
+and laid out in its own xhtml2pdf pass, one at a time in the worker, and the
+parts are merged on disk, so peak memory is bounded by the chunk size rather
+than by the roster. The rows themselves are still read in the request; their
+template should only use what the view loaded with them.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models
+from django.http import FileResponse
+from django.shortcuts import redirect
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.text import get_valid_filename
+
+from .pdf_utils import merge_pdf_files, render_pdf_to_file
+
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# Context entries that change on every request and must not bust the cache.
+VOLATILE_KEYS = ("generated_date",)
+
+SESSION_KEY = "pdf_jobs"
+MAX_SESSION_JOBS = 20
+
+_DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+
+_executor = None
+_pending = {}
+_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def _cache_dir():
+    path = str(getattr(settings, "PDF_CACHE_DIR", os.path.join(settings.BASE_DIR, "pdf_cache")))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _cache_timeout():
+    return getattr(settings, "PDF_CACHE_TIMEOUT", 60 * 10)
+
+
+def _render_timeout():
+    return getattr(settings, "PDF_RENDER_TIMEOUT", 60 * 5)
+
+
+def _chunk_rows():
+    return getattr(settings, "PDF_CHUNK_ROWS", 250)
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "PDF_RENDER_WORKERS", 2),
+                thread_name_prefix="pdf-render",
+            )
+        return _executor
+
+
+def _path(digest, ext):
+    return os.path.join(_cache_dir(), f"{digest}.{ext}")
+
+
+def _age(path):
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class _ContextEncoder(DjangoJSONEncoder):
+    """
+    Serialize model instances by their field values and those of the related
+    objects loaded with them (``select_related``), so an edit to anything a
+    template can print changes the digest, whether or not the model has an
+    ``updated_at``.
+    """
+
+    @staticmethod
+    def _fields(o):
+        return [o._meta.label, {f.attname: f.value_from_object(o) for f in o._meta.concrete_fields}]
+
+    def default(self, o):
+        if isinstance(o, models.Model):
+            # One level of related objects: a reverse one-to-one caches its owner again.
+            related = {
+                name: self._fields(value) if isinstance(value, models.Model) else value
+                for name, value in o._state.fields_cache.items()
+            }
+            return [*self._fields(o), related]
+        if isinstance(o, models.QuerySet):
+            return list(o)
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+def context_digest(template_src, context):
+    data = {k: v for k, v in context.items() if k not in VOLATILE_KEYS}
+    # No ``default=``: it would replace the encoder's own ``default``.
+    payload = json.dumps([template_src, data], cls=_ContextEncoder, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_valid_digest(digest):
+    return bool(_DIGEST_RE.fullmatch(digest or ""))
+
+
+def job_status(digest):
+    age = _age(_path(digest, "pdf"))
+    if age is not None and age < _cache_timeout():
+        return STATUS_DONE
+    if os.path.exists(_path(digest, "err")):
+        return STATUS_FAILED
+
+    with _lock:
+        if digest in _pending:
+            return STATUS_PENDING
+
+    # The job may be running in another worker process; give up once its
+    # marker is older than the render timeout.
+    age = _age(_path(digest, "job"))
+    if age is not None and age < _render_timeout():
+        return STATUS_PENDING
+    return STATUS_FAILED
+
+
+def prune_cache():
+    """
+    Delete cached PDFs and failure markers older than ``PDF_CACHE_TIMEOUT``,
+    and job markers and half-written files older than ``PDF_RENDER_TIMEOUT``.
+    Jobs still queued in this process are left alone. Returns how many files
+    were removed.
+    """
+    limits = {"pdf": _cache_timeout(), "err": _cache_timeout()}
+    limits.update(dict.fromkeys(("job", "tmp", "part"), _render_timeout()))
+    with _lock:
+        pending = set(_pending)
+    removed = 0
+    with os.scandir(_cache_dir()) as entries:
+        for entry in entries:
+            stem, _, ext = entry.name.rpartition(".")
+            if ext not in limits or stem in pending or not entry.is_file():
+                continue
+            age = _age(entry.path)
+            if age is None or age < limits[ext]:
+                continue
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            removed += 1
+    return removed
+
+
+def _maybe_prune():
+    global _last_prune
+    now = time.monotonic()
+    with _lock:
+        if _last_prune and now - _last_prune < _cache_timeout():
+            return
+        _last_prune = now
+    prune_cache()
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def render_parts(template_src, context, rows_key=None, chunk_rows=None):
+    """
+    Yield the template rendered once per slice of ``context[rows_key]``, one
+    part at a time as the consumer asks for it.
+
+    Every part gets ``row_offset``, ``row_count``, ``part_first`` and
+    ``part_last`` so the template can number rows continuously and print its
+    header and summary only once. Without ``rows_key`` a single part is
+    yielded.
+    """
+    template = get_template(template_src)
+    if not rows_key:
+        yield template.render({**context, "row_offset": 0, "part_first": True, "part_last": True})
+        return
+
+    rows = context[rows_key]
+    size = chunk_rows or _chunk_rows()
+    starts = range(0, len(rows), size) if rows else [0]
+    for start in starts:
+        yield template.render({
+            **context,
+            rows_key: rows[start:start + size],
+            "row_offset": start,
+            "row_count": len(rows),
+            "part_first": start == 0,
+            "part_last": start + size >= len(rows),
+        })
+
+
+def write_pdf(parts, path):
+    """
+    Lay out each HTML part of the iterable ``parts`` into its own temporary
+    PDF as it is produced and merge them into ``path``, so only one part's
+    markup and layout are alive at a time. Returns False if xhtml2pdf
+    reported an error.
+    """
+    directory = os.path.dirname(path)
+    part_paths = []
+    tmp = None
+    try:
+        for html in parts:
+            part_fd, part_path = tempfile.mkstemp(dir=directory, suffix=".part")
+            part_paths.append(part_path)
+            with os.fdopen(part_fd, "wb") as fh:
+                ok = render_pdf_to_file(html, fh)
+            del html
+            if not ok:
+                return False
+        if len(part_paths) == 1:
+            os.replace(part_paths.pop(), path)
+            return True
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            merge_pdf_files(part_paths, fh)
+        os.replace(tmp, path)
+        return True
+    finally:
+        for leftover in part_paths + ([tmp] if tmp else []):
+            try:
+                os.remove(leftover)
+            except OSError:
+                pass
+
+
+def _render_job(digest, parts):
+    try:
+        if not write_pdf(parts, _path(digest, "pdf")):
+            _write_atomic(_path(digest, "err"), b"")
+    except Exception:
+        _write_atomic(_path(digest, "err"), b"")
+        raise
+    finally:
+        with _lock:
+            _pending.pop(digest, None)
+        try:
+            os.remove(_path(digest, "job"))
+        except OSError:
+            pass
+        # Chunk templates may have queried on this thread's own connection.
+        connection.close()
+
+
+def enqueue(digest, template_src, context, rows_key=None):
+    """Queue a render unless the same digest is already in flight."""
+    with _lock:
+        if digest in _pending:
+            return
+        _pending[digest] = None
+
+    try:
+        if rows_key:
+            # Read the rows here; their parts are rendered by the worker.
+            parts = render_parts(template_src, {**context, rows_key: list(context[rows_key])}, rows_key)
+        else:
+            parts = list(render_parts(template_src, context))
+        for ext in ("err", "pdf"):
+            try:
+                os.remove(_path(digest, ext))
+            except OSError:
+                pass
+        _write_atomic(_path(digest, "job"), b"")
+        future = _get_executor().submit(_render_job, digest, parts)
+    except Exception:
+        with _lock:
+            _pending.pop(digest, None)
+        raise
+
+    with _lock:
+        if digest in _pending:
+            _pending[digest] = future
+    _maybe_prune()
+
+
+def remember_job(request, digest):
+    jobs = [d for d in request.session.get(SESSION_KEY, []) if d != digest]
+    jobs.append(digest)
+    request.session[SESSION_KEY] = jobs[-MAX_SESSION_JOBS:]
+
+
+def owns_job(request, digest):
+    return digest in request.session.get(SESSION_KEY, [])
+
+
+def file_response(digest, filename):
+    return FileResponse(
+        open(_path(digest, "pdf"), "rb"),
+        as_attachment=True,
+        filename=f"{get_valid_filename(filename)}.pdf",
+        content_type="application/pdf",
+    )
+
+
+def pdf_response(request, template_src, context, filename, rows_key=None):
+    """
+    Serve a cached PDF straight away, otherwise queue it and redirect the
+    client to the polling view which hands out the file once it is ready
+    (and sends the client back here if the file is pruned before that).
+    Pass ``rows_key`` to render the named row list in bounded chunks.
+    """
+    digest = context_digest(template_src, context)
+    if job_status(digest) == STATUS_DONE:
+        try:
+            return file_response(digest, filename)
+        except FileNotFoundError:
+            pass  # pruned since the check; render it again
+
+    enqueue(digest, template_src, context, rows_key)
+    remember_job(request, digest)
+    url = reverse("courses:pdf_job", kwargs={"digest": digest})
+    return redirect(f"{url}?{urlencode({'filename': filename, 'source': request.get_full_path()})}")
@@ -1,23 +1,44 @@
 from io import BytesIO
 from django.http import HttpResponse
 from django.template.loader import get_template
+from pypdf import PdfWriter
 from xhtml2pdf import pisa
 
-def render_to_pdf(template_src, context_dict={}):
-    template = get_template(template_src)
-    html = template.render(context_dict)
+
+def render_pdf_bytes(html):
     result = BytesIO()
-    
+
     pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
-    
+
     if not pdf.err:
-        return HttpResponse(result.getvalue(), content_type='application/pdf')
+        return result.getvalue()
+    return None
+
+def render_pdf_to_file(html, dest):
+    """Run xhtml2pdf straight into an open binary file; returns False on error."""
+    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), dest)
+    return not pdf.err
+
+def merge_pdf_files(paths, dest):
+    """Concatenate the PDFs at ``paths`` into the open binary file ``dest``."""
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    writer.write(dest)
+    writer.close()
+
+def render_to_pdf(template_src, context_dict=None):
+    template = get_template(template_src)
+    html = template.render(context_dict or {})
+    pdf = render_pdf_bytes(html)
+
+    if pdf is not None:
+        return HttpResponse(pdf, content_type='application/pdf')
     return None
 
 def generate_pdf_response(template_src, context_dict, filename):
-    pdf = render_to_pdf(template_src, context_dict)
-    if pdf:
-        response = HttpResponse(pdf, content_type='application/pdf')
+    response = render_to_pdf(template_src, context_dict)
+    if response:
         response['Content-Disposition'] = f'attachment; filename="{filename}.pdf"'
         return response
-    return HttpResponse("Error generating PDF", status=500)
\ No newline at end of file
+    return HttpResponse("Error generating PDF", status=500)
@@ -0,0 +1,236 @@
+"""
+Content-addressed media storage.
+
+Every upload is hashed while it is streamed to a temporary file and the bytes
+are kept once under ``blobs/<aa>/<digest>``. The logical name produced by the
+field's ``upload_to`` is then hard-linked to that blob, so ``path()``,
+``url()`` and every caller that opens files by name keep working while
+identical uploads share one copy on disk. Content that arrives as a temp
+file with a known ``sha256`` attribute is moved into place without being
+read again. ``StoredFile`` maps logical names to blobs and
+``StoredBlob.refcount`` counts the links; the blob is removed when its last
+name is deleted.
+
+The rows decide what stays on disk. Saving and deleting first write the
+blob's row, which locks it (SQLite takes its write lock there), and only
+then touch the blob, so a delete cannot remove a blob that a concurrent save
+of the same content is about to link. Deletes remove files once their
+transaction commits. A save inside a larger transaction leaves a journal
+entry under ``blobs/pending`` until that transaction commits; if it rolls
+back instead, ``sweep_pending`` (``manage.py sweep_media``) later removes
+the links and blobs the rows no longer account for.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, transaction
+from django.db.models import F
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    blob_dir = "blobs"
+
+    def _models(self):
+        from courses.models import StoredBlob, StoredFile
+        return StoredBlob, StoredFile
+
+    def blob_path(self, digest):
+        return self.path(os.path.join(self.blob_dir, digest[:2], digest))
+
+    def _spool(self, content):
+        """Copy ``content`` to a temp file next to the blobs, hashing as it goes."""
+        tmp_dir = self.path(os.path.join(self.blob_dir, "tmp"))
+        os.makedirs(tmp_dir, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in content.chunks():
+                    hasher.update(chunk)
+                    fh.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path, hasher.hexdigest(), size
+
+    def _link(self, blob_path, name):
+        """Create ``name`` as a link to the blob, picking a free name on clashes."""
+        while True:
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            try:
+                os.link(blob_path, full_path)
+            except FileExistsError:
+                name = self.get_available_name(name)
+                continue
+            except OSError:
+                # No hard links on this filesystem: fall back to a plain copy.
+                if os.path.exists(full_path):
+                    name = self.get_available_name(name)
+                    continue
+                shutil.copyfile(blob_path, full_path)
+            if self.file_permissions_mode is not None:
+                os.chmod(full_path, self.file_permissions_mode)
+            return name
+
+    def _lock_blob(self, digest, size=None):
+        """
+        Write the blob's row (creating it with ``size``) so the caller's
+        transaction holds its lock; returns False if it does not exist.
+        """
+        StoredBlob, _ = self._models()
+        if size is not None:
+            StoredBlob.objects.get_or_create(digest=digest, defaults={"size": size})
+        return bool(StoredBlob.objects.filter(pk=digest).update(refcount=F("refcount")))
+
+    def _place_blob(self, tmp_path, digest):
+        """Move a spooled file into the blob store (or drop it if already there)."""
+        blob_path = self.blob_path(digest)
+        if os.path.exists(blob_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            shutil.move(tmp_path, blob_path)
+        return blob_path
+
+    def _discard(self, digest, names=()):
+        """Remove the ``names`` and the blob from disk unless their rows still exist."""
+        _, StoredFile = self._models()
+        with transaction.atomic():
+            blob_kept = self._lock_blob(digest)
+            for name in names:
+                if not StoredFile.objects.filter(name=name).exists():
+                    super().delete(name)
+            if not blob_kept:
+                try:
+                    os.remove(self.blob_path(digest))
+                except FileNotFoundError:
+                    pass
+
+    def _pending_dir(self):
+        return self.path(os.path.join(self.blob_dir, "pending"))
+
+    def _journal(self, digest, names):
+        """
+        Until the surrounding transaction commits, remember what this save
+        put on disk, so ``sweep_pending`` can undo it if it rolls back.
+        """
+        if not connection.in_atomic_block:
+            return
+        os.makedirs(self._pending_dir(), exist_ok=True)
+        path = os.path.join(self._pending_dir(), f"{uuid.uuid4().hex}.json")
+        with open(path, "w") as fh:
+            json.dump({"digest": digest, "names": names}, fh)
+
+        def done():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        transaction.on_commit(done)
+
+    def sweep_pending(self, max_age):
+        """
+        Undo the saves journaled more than ``max_age`` seconds ago whose
+        transaction never committed; returns how many entries were handled.
+        """
+        try:
+            entries = list(os.scandir(self._pending_dir()))
+        except FileNotFoundError:
+            return 0
+        handled = 0
+        for entry in entries:
+            try:
+                if time.time() - entry.stat().st_mtime < max_age:
+                    continue
+                with open(entry.path) as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            self._discard(data["digest"], data["names"])
+            os.remove(entry.path)
+            handled += 1
+        return handled
+
+    def _save(self, name, content):
+        StoredBlob, StoredFile = self._models()
+        digest = getattr(content, "sha256", None)
+        if digest and hasattr(content, "temporary_file_path"):
+            # Already hashed on the way in (chunked uploads): move, don't copy.
+            tmp_path, size = content.temporary_file_path(), content.size
+            content.close()
+        else:
+            tmp_path, digest, size = self._spool(content)
+        linked = []
+        try:
+            with transaction.atomic():
+                self._lock_blob(digest, size)
+                blob_path = self._place_blob(tmp_path, digest)
+                name = self._link(blob_path, name).replace("\\", "/")
+                linked.append(name)
+                StoredFile.objects.create(name=name, blob_id=digest)
+                StoredBlob.objects.filter(pk=digest).update(refcount=F("refcount") + 1)
+        except BaseException:
+            self._discard(digest, linked)
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._journal(digest, linked)
+        return name
+
+    def adopt(self, name):
+        """
+        Move an existing plain file into the blob store and replace it with a
+        link. Returns False if ``name`` is already tracked.
+        """
+        StoredBlob, StoredFile = self._models()
+        if StoredFile.objects.filter(name=name).exists():
+            return False
+        with self.open(name, "rb") as content:
+            tmp_path, digest, size = self._spool(content)
+        try:
+            with transaction.atomic():
+                self._lock_blob(digest, size)
+                blob_path = self._place_blob(tmp_path, digest)
+                full_path = self.path(name)
+                link_tmp = f"{full_path}.cas-tmp"
+                try:
+                    os.link(blob_path, link_tmp)
+                except OSError:
+                    shutil.copyfile(blob_path, link_tmp)
+                # The link has the file's own bytes, so it may stay even if this rolls back.
+                os.replace(link_tmp, full_path)
+                StoredFile.objects.create(name=name, blob_id=digest)
+                StoredBlob.objects.filter(pk=digest).update(refcount=F("refcount") + 1)
+        except BaseException:
+            self._discard(digest)
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._journal(digest, [])
+        return True
+
+    def delete(self, name):
+        StoredBlob, StoredFile = self._models()
+        with transaction.atomic():
+            record = StoredFile.objects.filter(name=name).first()
+            if record is None:
+                # Not tracked (a plain file from before the blob store).
+                transaction.on_commit(lambda: FileSystemStorage.delete(self, name))
+                return
+            digest = record.blob_id
+            self._lock_blob(digest)
+            record.delete()
+            StoredBlob.objects.filter(pk=digest, refcount__gt=0).update(refcount=F("refcount") - 1)
+            StoredBlob.objects.filter(pk=digest, refcount=0).delete()
+            transaction.on_commit(lambda: self._discard(digest, [name]))
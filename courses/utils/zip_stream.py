@@ -0,0 +1,74 @@
+"""
+Streaming ZIP archives.
+
+``zipfile`` can write to a non-seekable file object, in which case every
+member carries a trailing data descriptor instead of having its header patched
+afterwards. ``_ZipBuffer`` is such an object: it only remembers the bytes
+written since the last drain, so the generator below yields the archive piece
+by piece and never holds more than one file chunk in memory.
+"""
+import zipfile
+
+
+class _ZipBuffer:
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip_chunks(members, compression=zipfile.ZIP_STORED):
+    """
+    Yield a ZIP archive built from ``members``, an iterable of
+    ``(arcname, chunks)`` pairs where ``chunks`` yields the member's bytes.
+    """
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=compression, allowZip64=True) as archive:
+        for arcname, chunks in members:
+            with archive.open(arcname, mode="w", force_zip64=True) as dest:
+                for chunk in chunks:
+                    dest.write(chunk)
+                    # A deflating member may buffer a whole chunk without output.
+                    if data := buffer.drain():
+                        yield data
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def _file_chunks(field_file):
+    try:
+        yield from field_file.chunks()
+    finally:
+        field_file.close()
+
+
+def stream_zip(members, compression=zipfile.ZIP_STORED):
+    """
+    Yield a ZIP archive built from ``members``, an iterable of
+    ``(arcname, file)`` pairs where ``file`` is a Django ``File``/``FieldFile``.
+    Members whose file cannot be opened are skipped.
+    """
+    def opened():
+        for arcname, field_file in members:
+            try:
+                field_file.open("rb")
+            except OSError:
+                continue
+            yield arcname, _file_chunks(field_file)
+
+    return stream_zip_chunks(opened(), compression)
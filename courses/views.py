@@ -3,14 +3,25 @@ from django.contrib.auth.mixins import LoginRequiredMixin , UserPassesTestMixin
 from django.urls import reverse, reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView, View
 from config import settings
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.utils import timezone 
-from .models import Course, Classroom, Session, Attendance, Assignment, Submission
-from .forms import ClassForm, SessionForm, AttendanceForm, AssignmentForm, SubmissionForm
+from django.utils.safestring import mark_safe
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.dateparse import parse_date
+from django.utils.http import url_has_allowed_host_and_scheme
+from .models import Course, Classroom, Session, Attendance, Assignment, Submission, UploadSession, submission_upload_to
+from .forms import AttendanceRiskFilterForm, ClassForm, CourseCloneForm, RosterImportForm, SessionForm, AttendanceForm, AssignmentForm, SubmissionForm
 from django.forms import modelformset_factory
 from django.contrib import messages
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views import View
-from .utils.pdf_utils import generate_pdf_response
+from . import calendar_feed, checkin, cloning, enrollment, exports, reports, rollups, similarity, uploads
+from .utils import pdf_service, table_export
+from .utils.zip_stream import stream_zip
+import datetime
+import itertools
+import json
+import os
 
 
 
@@ -85,6 +96,33 @@ class CourseDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         )
 
 
+class CourseCloneView(LoginRequiredMixin, UserPassesTestMixin, View):
+    template_name = "courses/course_clone.html"
+
+    def test_func(self):
+        return self.request.user.role in ["manager", "employee"]
+
+    def get(self, request, pk):
+        course = get_object_or_404(Course, pk=pk)
+        form = CourseCloneForm(initial={"title": f"{course.title} (copy)"})
+        return render(request, self.template_name, {"course": course, "form": form})
+
+    def post(self, request, pk):
+        course = get_object_or_404(Course, pk=pk)
+        form = CourseCloneForm(request.POST)
+        if not form.is_valid():
+            return render(request, self.template_name, {"course": course, "form": form})
+
+        new_course = cloning.clone_course(
+            course,
+            shift=datetime.timedelta(weeks=form.cleaned_data["shift_weeks"]),
+            title=form.cleaned_data["title"],
+            include_exams=form.cleaned_data["include_exams"],
+        )
+        messages.success(request, f'"{course.title}" was copied to "{new_course.title}".')
+        return redirect("courses:course_detail", pk=new_course.pk)
+
+
 # Classroom views
 
 class ClassListView(LoginRequiredMixin, ListView):
@@ -134,6 +172,10 @@ class ClassDetailView(LoginRequiredMixin, DetailView):
 
         ctx['selected_session'] = selected_session
         ctx['attendance_rows'] = attendance_rows
+
+        if getattr(self.request.user, 'role', None) == 'student':
+            ctx['is_enrolled'] = students_qs.filter(pk=self.request.user.pk).exists()
+            ctx['waitlist_position'] = enrollment.waitlist_position(classroom, self.request.user)
         
         
 
@@ -182,10 +224,73 @@ class ClassUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         user = self.request.user
         return user.role in ['manager', 'employee']
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        enrollment.fill_from_waitlist(self.object)
+        return response
+
     def get_success_url(self):
         return reverse("courses:class_detail", kwargs={"pk": self.object.pk})
 
 
+class ClassEnrollView(LoginRequiredMixin, UserPassesTestMixin, View):
+    def test_func(self):
+        return getattr(self.request.user, 'role', None) == 'student'
+
+    def post(self, request, pk):
+        classroom = get_object_or_404(Classroom, pk=pk)
+        status = enrollment.enroll(classroom, request.user)
+        if status == enrollment.ENROLLED:
+            messages.success(request, "You are now enrolled in this class.")
+        elif status == enrollment.ALREADY_ENROLLED:
+            messages.info(request, "You are already enrolled in this class.")
+        else:
+            position = enrollment.waitlist_position(classroom, request.user)
+            messages.warning(request, f"The class is full. You are number {position} on the waitlist.")
+        return redirect("courses:class_detail", pk=classroom.pk)
+
+
+class ClassWithdrawView(LoginRequiredMixin, UserPassesTestMixin, View):
+    def test_func(self):
+        return getattr(self.request.user, 'role', None) == 'student'
+
+    def post(self, request, pk):
+        classroom = get_object_or_404(Classroom, pk=pk)
+        enrollment.withdraw(classroom, request.user)
+        messages.success(request, "You have left this class.")
+        return redirect("courses:class_detail", pk=classroom.pk)
+
+
+class ClassRosterImportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    template_name = 'courses/roster_import.html'
+
+    def test_func(self):
+        return getattr(self.request.user, 'role', None) in ['manager', 'employee']
+
+    def get(self, request, pk):
+        classroom = get_object_or_404(Classroom, pk=pk)
+        return render(request, self.template_name, {"class_obj": classroom, "form": RosterImportForm()})
+
+    def post(self, request, pk):
+        classroom = get_object_or_404(Classroom, pk=pk)
+        form = RosterImportForm(request.POST, request.FILES)
+        result = None
+        if form.is_valid():
+            try:
+                emails = enrollment.parse_roster_csv(form.cleaned_data["file"])
+            except UnicodeDecodeError:
+                form.add_error("file", "The file must be UTF-8 encoded text.")
+            else:
+                try:
+                    result = enrollment.import_roster(classroom, emails)
+                except ValidationError as e:
+                    form.add_error(None, e)
+                else:
+                    classroom.refresh_from_db(fields=["student_count"])
+                    messages.success(request, f"{len(result['added'])} student(s) enrolled.")
+        return render(request, self.template_name, {"class_obj": classroom, "form": form, "result": result})
+
+
 class ClassDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     model = Classroom
     template_name = 'courses/class_confirm_delete.html'
@@ -349,7 +454,57 @@ class SessionDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         if user.role in ['manager', 'employee']:
             return True
         return False
-    
+
+
+class SessionCheckInView(LoginRequiredMixin, View):
+    """Students check themselves in with the session code; POST answers in JSON."""
+    template_name = "courses/session_checkin.html"
+
+    result_status = {
+        checkin.OK: 200,
+        checkin.ALREADY_CHECKED_IN: 200,
+        checkin.BAD_CODE: 400,
+        checkin.NOT_ENROLLED: 403,
+        checkin.CLOSED: 409,
+    }
+    result_messages = {
+        checkin.OK: "You are checked in.",
+        checkin.ALREADY_CHECKED_IN: "You have already checked in.",
+        checkin.BAD_CODE: "That code is not correct.",
+        checkin.NOT_ENROLLED: "You are not enrolled in this class.",
+        checkin.CLOSED: "Check-in is not open for this session.",
+    }
+
+    def get(self, request, pk):
+        session = get_object_or_404(Session.objects.select_related("classroom"), pk=pk)
+        return render(request, self.template_name, {"session": session, "code": request.GET.get("code", "")})
+
+    def post(self, request, pk):
+        if getattr(request.user, "role", None) != "student":
+            return JsonResponse({"result": "forbidden", "message": "Only students can check in."}, status=403)
+        # No session lookup here; check_in answers from cache and only writes.
+        result, status = checkin.check_in(pk, request.user.pk, request.POST.get("code", ""))
+        return JsonResponse(
+            {"result": result, "status": status, "message": self.result_messages[result]},
+            status=self.result_status[result],
+        )
+
+
+class SessionCheckInToggleView(LoginRequiredMixin, UserPassesTestMixin, View):
+    def test_func(self):
+        user = self.request.user
+        session = get_object_or_404(Session.objects.select_related("classroom"), pk=self.kwargs["pk"])
+        return user.role in ['manager', 'employee'] or user == session.classroom.instructor
+
+    def post(self, request, pk):
+        session = get_object_or_404(Session, pk=pk)
+        if request.POST.get("action") == "close":
+            checkin.close_checkin(session)
+            messages.info(request, "Check-in closed.")
+        else:
+            code = checkin.open_checkin(session)
+            messages.success(request, f"Check-in is open. Code: {code}")
+        return redirect("courses:session_detail", pk=session.pk)
 
 
 # Assignment views
@@ -512,6 +667,71 @@ class SubmissionCreateView(LoginRequiredMixin, CreateView):
     def get_success_url(self):
         return reverse("assignment_detail", kwargs={"pk": self.assignment.pk})
 
+class SubmissionUploadStartView(LoginRequiredMixin, View):
+    """Start (or resume) a chunked upload: JSON body with filename, size, checksum."""
+
+    def post(self, request, assignment_pk):
+        assignment = get_object_or_404(Assignment, pk=assignment_pk)
+        try:
+            payload = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON."}, status=400)
+
+        try:
+            upload = uploads.start_upload(
+                request.user, assignment,
+                payload.get("filename"), payload.get("size"), payload.get("checksum"),
+            )
+        except uploads.UploadError as e:
+            return JsonResponse({"error": e.message, **e.extra}, status=e.status)
+        return JsonResponse(uploads.describe(upload), status=201)
+
+
+class SubmissionUploadView(LoginRequiredMixin, View):
+    """
+    GET reports the received offset for resuming; PUT appends the raw request
+    body at the ``Upload-Offset`` header (optionally checked against
+    ``Upload-Chunk-Checksum``).
+    """
+
+    def get_upload(self, request, upload_id):
+        return get_object_or_404(UploadSession.objects.select_related("assignment"), pk=upload_id, student=request.user)
+
+    def get(self, request, upload_id):
+        return JsonResponse(uploads.describe(self.get_upload(request, upload_id)))
+
+    def put(self, request, upload_id):
+        upload = self.get_upload(request, upload_id)
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return JsonResponse({"error": "Upload-Offset and Content-Length are required."}, status=400)
+
+        try:
+            upload = uploads.append_chunk(
+                upload, offset, request, length, request.headers.get("Upload-Chunk-Checksum"),
+            )
+        except uploads.UploadError as e:
+            return JsonResponse({"error": e.message, **e.extra}, status=e.status)
+        return JsonResponse(uploads.describe(upload))
+
+
+class SubmissionUploadCompleteView(LoginRequiredMixin, View):
+
+    def post(self, request, upload_id):
+        upload = get_object_or_404(UploadSession.objects.select_related("assignment", "student"), pk=upload_id, student=request.user)
+        try:
+            submission = uploads.complete_upload(upload)
+        except uploads.UploadError as e:
+            return JsonResponse({"error": e.message, **e.extra}, status=e.status)
+        return JsonResponse({
+            **uploads.describe(upload),
+            "submission_id": submission.pk,
+            "redirect": reverse("courses:assignment_detail", kwargs={"pk": submission.assignment_id}),
+        })
+
+
 class SubmissionUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     model = Submission
     form_class = SubmissionForm
@@ -543,11 +763,76 @@ class SubmissionListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
     def test_func(self):
         assignment = get_object_or_404(Assignment, pk=self.kwargs.get("assignment_pk"))
         user = self.request.user
-        return user == assignment.course.instructor or getattr(user, "role", None) in ("manager", "employee")
+        if getattr(user, "role", None) in ("manager", "employee"):
+            return True
+        return assignment.course.classes.filter(instructor=user).exists()
 
     def get_queryset(self):
         return Submission.objects.filter(assignment__pk=self.kwargs.get("assignment_pk")).select_related("student").order_by("-submitted_at")
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["assignment"] = get_object_or_404(Assignment, pk=self.kwargs.get("assignment_pk"))
+        return ctx
+
+
+class SubmissionSimilarityView(SubmissionListView):
+    """Pairs of text submissions to the assignment that look alike (``courses.similarity``)."""
+    template_name = "courses/submission_similarity.html"
+    context_object_name = "pairs"
+
+    def get_queryset(self):
+        return similarity.submission_report(get_object_or_404(Assignment, pk=self.kwargs.get("assignment_pk")))
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["threshold"] = similarity.threshold()
+        ctx["min_words"] = similarity.min_words()
+        return ctx
+
+
+class SubmissionDownloadAllView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Stream every submission file of an assignment as one ZIP archive."""
+    chunk_size = 200
+
+    def test_func(self):
+        assignment = get_object_or_404(Assignment, pk=self.kwargs.get("assignment_pk"))
+        user = self.request.user
+        if getattr(user, "role", None) in ("manager", "employee"):
+            return True
+        return assignment.course.classes.filter(instructor=user).exists()
+
+    def get(self, request, assignment_pk):
+        assignment = get_object_or_404(Assignment, pk=assignment_pk)
+        submissions = (
+            Submission.objects
+            .filter(assignment=assignment)
+            .exclude(file="")
+            .exclude(file__isnull=True)
+            .select_related("assignment", "student")
+            .only("file", "assignment__id", "student__id")
+            .order_by("student_id")
+        )
+        members = (
+            (submission_upload_to(s, os.path.basename(s.file.name)), s.file)
+            for s in submissions.iterator(chunk_size=self.chunk_size)
+        )
+
+        response = StreamingHttpResponse(stream_zip(members), content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="submissions_assignment_{assignment.pk}.zip"'
+        return response
+
+
+class SubmissionExportView(SubmissionDownloadAllView):
+    """The submission list of an assignment as CSV or XLSX (``?format=``)."""
+
+    def get(self, request, assignment_pk):
+        assignment = get_object_or_404(Assignment, pk=assignment_pk)
+        header, rows = exports.submissions(assignment)
+        return table_export.export_response(
+            request.GET.get("format"), f"submissions_assignment_{assignment.pk}", header, rows, assignment.title,
+        )
+
 
 class InstructorCourseListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
     model = Course
@@ -587,10 +872,51 @@ class ReportsDashboardView(LoginRequiredMixin, TemplateView):
         if user.role not in ["manager", "employee"]:
             raise PermissionDenied("You do not have access to reports.")
 
-        ctx["classes"] = Classroom.objects.all().order_by("-start_date")
+        ctx["class_count"], classes_html = reports.dashboard_listing()
+        ctx["classes_html"] = mark_safe(classes_html)
         return ctx
     
     
+class AttendanceRiskView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+    """Students whose attendance (and grades) put them at risk, from the rollups."""
+    template_name = "courses/reports/attendance_risk.html"
+    context_object_name = "rollups"
+    paginate_by = 50
+
+    def test_func(self):
+        return self.request.user.role in ["manager", "employee", "instructor"]
+
+    def get_classrooms(self):
+        if self.request.user.role == "instructor":
+            return Classroom.objects.filter(instructor=self.request.user)
+        return Classroom.objects.all()
+
+    def get_queryset(self):
+        classrooms = self.get_classrooms()
+        data = self.request.GET if self.request.GET else None
+        self.form = AttendanceRiskFilterForm(data, classrooms=classrooms.order_by("title"))
+        filters = self.form.cleaned_data if self.form.is_valid() else {}
+        self.sort = filters.get("sort") or "risk"
+        below = filters.get("below") if data else 70
+        min_marked = filters.get("min_marked") if data else 3
+
+        queryset = rollups.listing(
+            classrooms=[filters["classroom"]] if filters.get("classroom") else classrooms,
+            max_rate=below / 100 if below is not None else None,
+            min_marked=min_marked or 0,
+            sort=self.sort,
+        )
+        # Ranking by risk needs every row scored; other orders come from the database.
+        return rollups.ranked(queryset, "risk") if self.sort == "risk" else queryset
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        if self.sort != "risk":
+            ctx["rollups"] = rollups.ranked(ctx["rollups"], self.sort)
+        ctx["form"] = self.form
+        return ctx
+
+
 class ReportClassView(LoginRequiredMixin, TemplateView):
     template_name = "courses/reports/report_class.html"
 
@@ -710,7 +1036,7 @@ class ReportClassPDFView(LoginRequiredMixin, View):
         }
 
         filename = f"attendance_report_{classroom.title.replace(' ', '_')}_{timezone.now().strftime('%Y%m%d')}"
-        return generate_pdf_response("courses/reports/report_class_pdf.html", context, filename)
+        return pdf_service.pdf_response(request, "courses/reports/report_class_pdf.html", context, filename, rows_key="rows")
     
     
 class ReportSessionView(LoginRequiredMixin, TemplateView):
@@ -718,110 +1044,48 @@ class ReportSessionView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        session_id = kwargs["session_id"]
-
-        session = Session.objects.get(pk=session_id)
-        classroom = session.classroom
+        session = get_object_or_404(Session.objects.select_related("classroom__course"), pk=kwargs["session_id"])
 
         ctx["session"] = session
-        ctx["classroom"] = classroom
-
-        students = classroom.students.all().order_by("first_name")
-        
-        attendance_qs = Attendance.objects.filter(session=session)
-
-        attendance_map = {
-            a.student_id: a.status
-            for a in attendance_qs
-        }
-
-        rows = []
-        present_count = 0
-        late_count = 0
-        excused_count = 0
-        absent_count = 0
-        
-        for student in students:
-            status = attendance_map.get(student.id, "absent")
-            rows.append({
-                "student": student,
-                "status": status
-            })
-            
-            if status == "present":
-                present_count += 1
-            elif status == "late":
-                late_count += 1
-            elif status == "excused":
-                excused_count += 1
-            else:
-                absent_count += 1
-
-        ctx["rows"] = rows
-        ctx["present_count"] = present_count
-        ctx["late_count"] = late_count
-        ctx["excused_count"] = excused_count
-        ctx["absent_count"] = absent_count
-        ctx["attendance_rate"] = round(((present_count + late_count) / len(rows)) * 100, 2) if rows else 0
-        
-        ctx["pdf_url"] = f"/reports/session/{session_id}/pdf/"
-        
+        ctx["classroom"] = session.classroom
+        ctx.update(reports.session_report(session))
+        ctx["pdf_url"] = reverse("courses:report_session_pdf", args=[session.pk])
         return ctx
 
+
 class ReportSessionPDFView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
-        session_id = kwargs["session_id"]
-        
         if request.user.role not in ["manager", "employee"]:
             raise PermissionDenied("You do not have access to reports.")
-        
-        session = Session.objects.get(pk=session_id)
-        classroom = session.classroom
-        students = classroom.students.all().order_by("first_name")
-        
-        attendance_qs = Attendance.objects.filter(session=session)
-        attendance_map = {
-            a.student_id: a.status
-            for a in attendance_qs
-        }
-
-        rows = []
-        present_count = 0
-        late_count = 0
-        excused_count = 0
-        absent_count = 0
-        
-        for student in students:
-            status = attendance_map.get(student.id, "absent")
-            rows.append({
-                "student": student,
-                "status": status
-            })
-            
-            if status == "present":
-                present_count += 1
-            elif status == "late":
-                late_count += 1
-            elif status == "excused":
-                excused_count += 1
-            else:
-                absent_count += 1
 
+        session = get_object_or_404(Session.objects.select_related("classroom__course"), pk=kwargs["session_id"])
+        classroom = session.classroom
         context = {
             "session": session,
             "classroom": classroom,
-            "rows": rows,
-            "present_count": present_count,
-            "late_count": late_count,
-            "excused_count": excused_count,
-            "absent_count": absent_count,
-            "attendance_rate": round(((present_count + late_count) / len(rows)) * 100, 2) if rows else 0,
+            **reports.session_report(session),
             "generated_date": timezone.now()
         }
 
         filename = f"session_attendance_{session.start_time.strftime('%Y%m%d')}_{classroom.title.replace(' ', '_')}"
-        return generate_pdf_response("courses/reports/report_session_pdf.html", context, filename)
+        return pdf_service.pdf_response(request, "courses/reports/report_session_pdf.html", context, filename)
+
+
+class ReportSessionExportView(LoginRequiredMixin, View):
+    """The session report as CSV or XLSX (``?format=``)."""
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role not in ["manager", "employee"]:
+            raise PermissionDenied("You do not have access to reports.")
 
+        session = get_object_or_404(Session.objects.select_related("classroom"), pk=kwargs["session_id"])
+        report = reports.session_report(session)
+        rows = ((row["name"], row["email"], row["status"], row["note"]) for row in report["rows"])
+
+        filename = f"session_attendance_{session.start_time.strftime('%Y%m%d')}_{session.classroom.title.replace(' ', '_')}"
+        return table_export.export_response(
+            request.GET.get("format"), filename, ["Student", "Email", "Status", "Note"], rows, session.title,
+        )
 
 
 class StudentListPDFView(LoginRequiredMixin, View):
@@ -841,9 +1105,9 @@ class StudentListPDFView(LoginRequiredMixin, View):
         students = classroom.students.all().select_related('profile').order_by('first_name', 'last_name')
         
         # Calculate available seats
-        student_count = students.count()
+        student_count = classroom.student_count
         capacity = classroom.capacity or 0
-        available_seats = capacity - student_count if capacity > 0 else None
+        available_seats = classroom.available_seats if capacity > 0 else None
         enrollment_rate = (student_count / capacity * 100) if capacity > 0 else None
 
         context = {
@@ -856,4 +1120,152 @@ class StudentListPDFView(LoginRequiredMixin, View):
         }
 
         filename = f"student_list_{classroom.title.replace(' ', '_')}_{timezone.now().strftime('%Y%m%d')}"
-        return generate_pdf_response("courses/reports/student_list_pdf.html", context, filename)
\ No newline at end of file
+        return pdf_service.pdf_response(request, "courses/reports/student_list_pdf.html", context, filename, rows_key="students")
+
+
+class StudentListExportView(LoginRequiredMixin, View):
+    """The class roster as CSV or XLSX (``?format=``), streamed."""
+
+    def get(self, request, class_id):
+        if request.user.role not in ["manager", "employee", "instructor"]:
+            raise PermissionDenied("You do not have access to student lists.")
+        classroom = get_object_or_404(Classroom, pk=class_id)
+        if request.user.role == "instructor" and classroom.instructor != request.user:
+            raise PermissionDenied("You can only export student lists for your own classes.")
+
+        header, rows = exports.roster(classroom)
+        filename = f"student_list_{classroom.title.replace(' ', '_')}_{timezone.now().strftime('%Y%m%d')}"
+        return table_export.export_response(request.GET.get("format"), filename, header, rows, classroom.title)
+
+
+class ReportClassExportView(LoginRequiredMixin, View):
+    """The class attendance matrix as CSV or XLSX (``?format=``), streamed."""
+
+    def get(self, request, class_id):
+        if request.user.role not in ["manager", "employee"]:
+            raise PermissionDenied("You do not have access to reports.")
+        classroom = get_object_or_404(Classroom, pk=class_id)
+
+        header, rows = exports.attendance_matrix(classroom)
+        filename = f"attendance_report_{classroom.title.replace(' ', '_')}_{timezone.now().strftime('%Y%m%d')}"
+        return table_export.export_response(request.GET.get("format"), filename, header, rows, classroom.title)
+
+
+class PDFJobView(LoginRequiredMixin, View):
+    """Polling endpoint for PDFs queued by ``pdf_service.pdf_response``."""
+    template_name = "courses/reports/pdf_pending.html"
+    poll_interval = 2
+
+    def get(self, request, digest):
+        if not pdf_service.is_valid_digest(digest) or not pdf_service.owns_job(request, digest):
+            raise PermissionDenied("Unknown PDF job.")
+
+        filename = request.GET.get("filename") or "report"
+        status = pdf_service.job_status(digest)
+
+        if status == pdf_service.STATUS_DONE:
+            try:
+                return pdf_service.file_response(digest, filename)
+            except FileNotFoundError:
+                # Pruned since the check; the report view queues it again.
+                source = request.GET.get("source")
+                if source and url_has_allowed_host_and_scheme(source, allowed_hosts={request.get_host()}):
+                    return redirect(source)
+                status = pdf_service.STATUS_FAILED
+        if status == pdf_service.STATUS_FAILED:
+            return HttpResponse("Error generating PDF", status=500)
+
+        response = render(request, self.template_name, {"filename": filename}, status=202)
+        response["Refresh"] = str(self.poll_interval)
+        return response
+
+# calendar views
+
+class CalendarView(LoginRequiredMixin, TemplateView):
+    template_name = "courses/calendar.html"
+
+    def get_window(self):
+        start = None
+        raw = self.request.GET.get("start")
+        if raw:
+            parsed = parse_date(raw)
+            if parsed:
+                start = timezone.make_aware(datetime.datetime.combine(parsed, datetime.time.min))
+        try:
+            days = int(self.request.GET.get("days", 14))
+        except ValueError:
+            days = 14
+        return calendar_feed.window(start, days)
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        start, end, days = self.get_window()
+        ctx["days"] = [
+            (day, list(day_events))
+            for day, day_events in itertools.groupby(
+                calendar_feed.events(self.request.user, start, end),
+                key=lambda event: timezone.localtime(event.start).date(),
+            )
+        ]
+        ctx["window_start"] = start
+        ctx["window_end"] = end - datetime.timedelta(days=1)
+        ctx["window_days"] = days
+        ctx["prev_start"] = (start - datetime.timedelta(days=days)).date()
+        ctx["next_start"] = end.date()
+        ctx["feed_url"] = self.request.build_absolute_uri(
+            reverse("courses:calendar_feed", kwargs={"token": calendar_feed.feed_token(self.request.user)})
+        )
+        return ctx
+
+
+class CalendarEventsView(CalendarView):
+    """The same window as ``CalendarView`` as JSON."""
+
+    def get(self, request, *args, **kwargs):
+        start, end, days = self.get_window()
+        events = [
+            {
+                "start": event.start.isoformat(),
+                "end": event.end.isoformat() if event.end else None,
+                "kind": event.kind,
+                "title": event.title,
+                "context": event.context,
+                "url": event.url,
+                "uid": event.uid,
+            }
+            for event in calendar_feed.events(request.user, start, end)
+        ]
+        return JsonResponse({
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "next": f"{reverse('courses:calendar_events')}?start={end.date()}&days={days}",
+            "events": events,
+        })
+
+
+class CalendarFeedResetView(LoginRequiredMixin, View):
+    """Replace the user's feed URL, revoking the old one."""
+
+    def post(self, request):
+        calendar_feed.rotate_feed_key(request.user)
+        messages.success(request, "Your calendar feed has a new address. Update your calendar app to keep it in sync.")
+        return redirect("courses:calendar")
+
+
+class CalendarFeedView(View):
+    """iCalendar subscription; authenticated by the signed token in the URL."""
+
+    def get(self, request, token):
+        user = calendar_feed.user_from_token(token)
+        if user is None:
+            raise Http404("Unknown calendar feed.")
+        etag = quote_etag(calendar_feed.feed_etag(user))
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        body = calendar_feed.render_ics(user, f"{request.scheme}://{request.get_host()}", request.get_host())
+        response = HttpResponse(body, content_type="text/calendar; charset=utf-8")
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, max-age=300"
+        return response
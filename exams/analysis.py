@@ -0,0 +1,149 @@
+"""
+Item analysis of an exam.
+
+Builds the takers x questions response matrix of the exam's multiple-choice
+questions and reports, per question, its difficulty (p-value: the share of
+takers who chose a correct choice), its discrimination (point-biserial
+correlation between getting it right and the rest of the score), how often
+each choice was picked and how often the question was left blank; and for
+the whole exam the KR-20 reliability.
+
+Responses are loaded with one query of ``(student, choice)`` pairs; the
+choice ids are mapped to (question, correct) with ``searchsorted`` and
+everything else is numpy over the matrix. Takers are the students whose
+attempt is closed, as for scoring (``scoring.closed_student_ids``), whether
+or not they chose anything; attempts still running are left out. The result
+is cached per exam until attempts are scored (``scoring.score_exam``) or a
+question or choice of the exam changes (``forget``); answers saved while an
+attempt runs leave it alone.
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .delivery import MCQ_TYPES
+from .models import Choice, Question
+from .storage import choice_pairs
+
+
+# p-values outside this range and discrimination below the floor are flagged.
+EASY_ABOVE = 0.9
+HARD_BELOW = 0.2
+DISCRIMINATION_FLOOR = 0.2
+
+
+def _cache_key(exam_id):
+    return f"exams:analysis:{exam_id}"
+
+
+def forget(exam_id):
+    cache.delete(_cache_key(exam_id))
+
+
+def _rounded(value, places=3):
+    return None if value is None or np.isnan(value) else round(float(value), places)
+
+
+def _point_biserial(matrix, totals):
+    """Per column, the correlation of the item with the total without that item."""
+    rest = totals[:, None] - matrix
+    item_mean, rest_mean = matrix.mean(axis=0), rest.mean(axis=0)
+    covariance = (matrix * rest).mean(axis=0) - item_mean * rest_mean
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return covariance / (matrix.std(axis=0) * rest.std(axis=0))
+
+
+def _kr20(matrix, totals):
+    items = matrix.shape[1]
+    variance = totals.var()
+    if items < 2 or variance == 0:
+        return None
+    p = matrix.mean(axis=0)
+    return items / (items - 1) * (1 - (p * (1 - p)).sum() / variance)
+
+
+def _build(exam_id):
+    questions = list(
+        Question.objects.filter(exam_id=exam_id, qtype__in=MCQ_TYPES)
+        .order_by("id").values_list("id", "text", "qtype", "points")
+    )
+    choices = list(
+        Choice.objects.filter(question__exam_id=exam_id, question__qtype__in=MCQ_TYPES)
+        .order_by("id").values_list("id", "question_id", "text", "is_correct")
+    )
+    question_index = {question_id: i for i, (question_id, _, _, _) in enumerate(questions)}
+    choice_ids = np.array([choice_id for choice_id, _, _, _ in choices], dtype=np.int64)
+    choice_question = np.array([question_index[question_id] for _, question_id, _, _ in choices], dtype=np.int64)
+    choice_correct = np.array([is_correct for _, _, _, is_correct in choices], dtype=bool)
+
+    from .scoring import closed_student_ids
+
+    closed, exam_over = closed_student_ids(exam_id)
+    pairs = choice_pairs(exam_id)
+    if not exam_over:
+        pairs = pairs[np.isin(pairs[:, 0], closed)]
+    if len(choice_ids) and len(pairs):
+        found = np.minimum(np.searchsorted(choice_ids, pairs[:, 1]), len(choice_ids) - 1)
+        known = choice_ids[found] == pairs[:, 1]
+        pairs, found = pairs[known], found[known]
+    else:
+        pairs, found = pairs[:0], np.zeros(0, dtype=np.int64)
+
+    takers = np.union1d(pairs[:, 0], closed)
+    taker_index = np.searchsorted(takers, pairs[:, 0])
+    taker_count, question_count = len(takers), len(questions)
+
+    matrix = np.zeros((taker_count, question_count))
+    answered = np.zeros((taker_count, question_count), dtype=bool)
+    matrix[taker_index, choice_question[found]] = choice_correct[found]
+    answered[taker_index, choice_question[found]] = True
+    choice_counts = np.bincount(found, minlength=len(choice_ids))
+
+    totals = matrix.sum(axis=1)
+    if taker_count:
+        p_values = matrix.mean(axis=0)
+        omitted = 1 - answered.mean(axis=0)
+        discrimination = _point_biserial(matrix, totals)
+    else:
+        p_values = omitted = discrimination = np.full(question_count, np.nan)
+
+    items = []
+    for i, (question_id, text, qtype, points) in enumerate(questions):
+        p, r = _rounded(p_values[i]), _rounded(discrimination[i])
+        flags = []
+        if p is not None and p > EASY_ABOVE:
+            flags.append("too easy")
+        if p is not None and p < HARD_BELOW:
+            flags.append("too hard")
+        if r is not None and r < DISCRIMINATION_FLOOR:
+            flags.append("low discrimination")
+        items.append({
+            "question_id": question_id, "text": text, "qtype": qtype, "points": points,
+            "p_value": p, "discrimination": r, "omitted": _rounded(omitted[i]), "flags": flags,
+            "choices": [],
+        })
+    for c, (choice_id, question_id, text, is_correct) in enumerate(choices):
+        items[question_index[question_id]]["choices"].append({
+            "choice_id": choice_id, "text": text, "is_correct": is_correct,
+            "count": int(choice_counts[c]),
+            "rate": _rounded(choice_counts[c] / taker_count) if taker_count else None,
+        })
+
+    return {
+        "takers": taker_count,
+        "items": items,
+        "kr20": _rounded(_kr20(matrix, totals)) if taker_count else None,
+        "mean_correct": _rounded(totals.mean(), 2) if taker_count else None,
+        "sd_correct": _rounded(totals.std(), 2) if taker_count else None,
+        "skipped": Question.objects.filter(exam_id=exam_id).exclude(qtype__in=MCQ_TYPES).count(),
+    }
+
+
+def item_analysis(exam_id):
+    """The item analysis of ``exam_id`` as a plain dict, cached."""
+    key = _cache_key(exam_id)
+    report = cache.get(key)
+    if report is None:
+        report = _build(exam_id)
+        cache.set(key, report, getattr(settings, "EXAM_ANALYSIS_CACHE_TIMEOUT", 60 * 60))
+    return report
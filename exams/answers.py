@@ -0,0 +1,131 @@
+"""
+Answer writes.
+
+Every answer is stored with one upsert on (student, question):
+``bulk_create(update_conflicts=True)`` inserts new answers and overwrites the
+choice/text of existing ones in a single statement, for one answer from the
+paged exam views or a whole batch from the autosave endpoint. There is no
+SELECT first, so an autosave of any size is one write. Exams with packed
+answer storage merge the batch into the attempt's row instead (see
+``exams.storage``).
+
+Every write first locks the attempt with ``attempts.lock_open`` in its
+transaction and writes nothing (``AttemptClosed``) once the attempt was
+submitted or ran out of time, whatever this process has cached.
+
+Batches are checked against the exam's cached question/choice map
+(``delivery.choice_map``), so validating them reads nothing from the
+database either. A batch carries the client's sequence number, kept as the
+attempt's ``ExamResult.last_seq`` by the same UPDATE that locks the attempt:
+a batch that arrives after a newer one of the same attempt was saved (a late
+retry or a second tab, on any worker) writes nothing.
+
+The paged exam views post one answer at a time; ``from_form`` checks it
+against the same map.
+"""
+from django.db import transaction
+
+from . import attempts, storage
+from .models import Exam, StudentAnswer
+
+
+class AttemptClosed(Exception):
+    pass
+
+
+class InvalidAnswers(Exception):
+    def __init__(self, errors):
+        super().__init__("Invalid answers.")
+        self.errors = errors
+
+
+def upsert(exam_id, student_id, answers, seq=None):
+    """
+    Store ``answers``, a list of ``(question_id, choice_id, text_answer)`` in
+    ``exam_id``; raises ``AttemptClosed`` if the attempt no longer accepts
+    answers. With ``seq``, the batch is written only if it is newer than
+    every batch saved before; returns False if it was not.
+    """
+    if not answers:
+        return True
+    with transaction.atomic():
+        if not attempts.lock_open(exam_id, student_id, seq):
+            if seq is not None and attempts.lock_open(exam_id, student_id):
+                return False
+            raise AttemptClosed()
+        if storage.answer_storage(exam_id) == Exam.ANSWERS_PACKED:
+            storage.write_packed(exam_id, student_id, answers)
+        else:
+            StudentAnswer.objects.bulk_create(
+                [
+                    StudentAnswer(
+                        student_id=student_id, question_id=question_id, choice_id=choice_id, text_answer=text_answer,
+                    )
+                    for question_id, choice_id, text_answer in answers
+                ],
+                update_conflicts=True,
+                unique_fields=["student", "question"],
+                update_fields=["choice", "text_answer"],
+            )
+    return True
+
+
+def validate(choices, raw):
+    """
+    Turn ``{question_id: {"choice": id} | {"text": str}}`` into upsert rows,
+    checking every entry against ``choices`` (see ``delivery.choice_map``).
+    Raises ``InvalidAnswers`` with ``{question_id: message}`` if any is wrong.
+    """
+    if not isinstance(raw, dict):
+        raise InvalidAnswers({"answers": "Expected an object of question id to answer."})
+    rows, errors = [], {}
+    for key, value in raw.items():
+        try:
+            question_id = int(key)
+        except (TypeError, ValueError):
+            question_id = None
+        if question_id not in choices:
+            errors[key] = "Unknown question."
+            continue
+        if not isinstance(value, dict):
+            errors[key] = "Expected an object."
+            continue
+
+        allowed = choices[question_id]
+        if allowed is None:
+            text = value.get("text")
+            if not isinstance(text, str):
+                errors[key] = "Expected text."
+                continue
+            rows.append((question_id, None, text))
+        else:
+            choice_id = value.get("choice")
+            if isinstance(choice_id, bool) or choice_id not in allowed:
+                errors[key] = "Unknown choice."
+                continue
+            rows.append((question_id, choice_id, None))
+    if errors:
+        raise InvalidAnswers(errors)
+    return rows
+
+
+def from_form(choices, question_id, choice, text_answer):
+    """
+    The upsert row of one question posted by the paged exam views, checked
+    against ``choices`` like ``validate``: an MCQ takes only one of its own
+    choices (none clears the answer), a written question only its text.
+    """
+    allowed = choices.get(question_id, ())
+    if allowed == ():
+        raise InvalidAnswers({question_id: "Unknown question."})
+    if allowed is None:
+        return question_id, None, text_answer
+    if not choice:
+        return question_id, None, None
+    try:
+        choice_id = int(choice)
+    except (TypeError, ValueError):
+        raise InvalidAnswers({question_id: "Unknown choice."})
+    if choice_id not in allowed:
+        raise InvalidAnswers({question_id: "Unknown choice."})
+    return question_id, choice_id, None
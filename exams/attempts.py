@@ -0,0 +1,212 @@
+"""
+Exam attempts.
+
+Every student of the exam's course gets an ExamResult row before the exam
+opens (``provision``; ``manage.py provision_exams`` runs it for exams about
+to start), so starting an attempt is a conditional UPDATE that sets
+``start_time`` only where it is still empty: the burst of students opening
+an exam in the same minute neither inserts rows nor reads them first, and a
+second click cannot move a start time.
+
+Starts are group-committed like self check-in (``GroupCommit``): one
+UPDATE ... WHERE student_id IN (...) AND start_time IS NULL per batch, then
+one INSERT that ignores conflicts for students without a provisioned row
+(enrolled after provisioning, or exams without a course).
+
+Starting also fixes the attempt's ``deadline``: the exam's duration after
+the start, and never later than the exam's end. Views turn late requests
+away early with ``accepts_answers``, which reads the deadline (or the
+submission time, once submitted) from this process's cache. That copy can
+be stale after a submission made through another worker, so the write
+itself is guarded in the database: ``answers.upsert`` first runs
+``lock_open``, a conditional UPDATE of the attempt's row that matches only
+while it is unsubmitted and within its deadline, in the same transaction as
+the answers. A submission made elsewhere is seen at once, and one made
+concurrently waits for the write holding the row. Answers are accepted for
+``grace()`` past the deadline, for saves already on their way when the
+timer ran out, but not after a submission.
+Attempts nobody submits are finalized by ``sweep`` (``manage.py
+sweep_exams``): one query over the (submitted_at, deadline) index finds
+them, and each exam's batch is scored at once. Closing an attempt also
+signs its written answers for near-duplicate detection (``exams.similarity``).
+"""
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from courses.utils.group_commit import GroupCommit
+
+from . import scoring, similarity
+from .models import Exam, ExamResult
+
+
+def enrolled_student_ids(exam):
+    if exam.course_id is None:
+        return []
+    return list(
+        get_user_model().objects
+        .filter(enrolled_classes__course_id=exam.course_id)
+        .order_by().values_list("pk", flat=True).distinct()
+    )
+
+
+def provision(exam):
+    """Create the missing ExamResult rows of ``exam``; returns the number of students covered."""
+    student_ids = enrolled_student_ids(exam)
+    ExamResult.objects.bulk_create(
+        [ExamResult(student_id=student_id, exam=exam) for student_id in student_ids],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+    return len(student_ids)
+
+
+def upcoming(within, now=None):
+    """Exams that open within ``within`` (a timedelta) or are open now."""
+    now = now or timezone.now()
+    return Exam.objects.filter(start_time__lte=now + within, end_time__gte=now).order_by("start_time")
+
+
+def deadline_for(exam, start):
+    return min(start + timedelta(minutes=exam.duration), exam.end_time)
+
+
+def write_starts(rows):
+    """Start the attempts in ``rows`` of ``(exam_id, student_id, now, deadline)`` in one transaction."""
+    groups = {}
+    for exam_id, student_id, now, deadline in rows:
+        students, earliest, first_deadline = groups.get(exam_id, ([], now, deadline))
+        students.append(student_id)
+        groups[exam_id] = (students, min(earliest, now), min(first_deadline, deadline))
+    with transaction.atomic():
+        for exam_id, (student_ids, now, deadline) in groups.items():
+            ExamResult.objects.filter(
+                exam_id=exam_id, student_id__in=student_ids, start_time__isnull=True,
+            ).update(start_time=now, deadline=deadline)
+            ExamResult.objects.bulk_create(
+                [
+                    ExamResult(exam_id=exam_id, student_id=student_id, start_time=now, deadline=deadline)
+                    for student_id in student_ids
+                ],
+                ignore_conflicts=True,
+            )
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def batcher():
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = GroupCommit(
+                write_starts,
+                max_batch=getattr(settings, "EXAM_START_BATCH_SIZE", 200),
+                max_delay=getattr(settings, "EXAM_START_FLUSH_INTERVAL", 0.05),
+            )
+        return _batcher
+
+
+def start(exam, student_id, now=None):
+    """Record that ``student_id`` started ``exam`` at ``now`` unless they already had."""
+    now = now or timezone.now()
+    batcher().submit((exam.pk, student_id, now, deadline_for(exam, now)))
+
+
+def _accepts_key(exam_id, student_id):
+    return f"exams:accepts:{exam_id}:{student_id}"
+
+
+def grace():
+    """How long after the deadline answers already on their way are still accepted."""
+    return timedelta(seconds=getattr(settings, "EXAM_DEADLINE_GRACE_SECONDS", 30))
+
+
+def remember(result):
+    """
+    Cache the last moment the attempt ``result`` accepts answers (its
+    deadline plus ``grace``, or when it was submitted) and return it.
+    """
+    until = result.submitted_at if result.submitted_at is not None else result.deadline + grace()
+    cache.set(
+        _accepts_key(result.exam_id, result.student_id), until,
+        getattr(settings, "EXAM_DEADLINE_CACHE_TIMEOUT", 60 * 60 * 6),
+    )
+    return until
+
+
+def accepts_until(exam_id, student_id):
+    """``remember``'s value for the attempt, from the cache; None if it has not started."""
+    until = cache.get(_accepts_key(exam_id, student_id))
+    if until is None:
+        result = ExamResult.objects.filter(
+            exam_id=exam_id, student_id=student_id, deadline__isnull=False,
+        ).only("exam_id", "student_id", "deadline", "submitted_at").first()
+        if result is None:
+            return None
+        until = remember(result)
+    return until
+
+
+def accepts_answers(exam_id, student_id, now=None):
+    until = accepts_until(exam_id, student_id)
+    return until is not None and (now or timezone.now()) <= until
+
+
+def lock_open(exam_id, student_id, seq=None, now=None):
+    """
+    Lock the attempt's row for the caller's transaction if it still accepts
+    answers; returns False, locking nothing, once it is submitted or past
+    its deadline plus ``grace``. With ``seq`` it also records it as the
+    attempt's ``last_seq``, and returns False if that is already ``seq`` or
+    later, all in the same UPDATE.
+    """
+    now = now or timezone.now()
+    results = ExamResult.objects.filter(
+        exam_id=exam_id, student_id=student_id, submitted_at__isnull=True, deadline__gte=now - grace(),
+    )
+    if seq is None:
+        return bool(results.update(deadline=F("deadline")))
+    return bool(results.filter(Q(last_seq__isnull=True) | Q(last_seq__lt=seq)).update(last_seq=seq))
+
+
+def submit(exam, student_id, now=None):
+    """Close the attempt of ``student_id`` (if still open) and score it; returns the score."""
+    ExamResult.objects.filter(
+        exam=exam, student_id=student_id, start_time__isnull=False, submitted_at__isnull=True,
+    ).update(submitted_at=now or timezone.now())
+    cache.delete(_accepts_key(exam.pk, student_id))
+    similarity.record_attempts(exam.pk, [student_id])
+    return scoring.score_exam(exam, [student_id]).get(student_id, 0)
+
+
+def sweep(now=None):
+    """
+    Finalize the attempts that passed their deadline (plus ``grace``) without
+    being submitted: score them exam by exam and mark them submitted at their
+    deadline. Returns ``{exam_id: attempts finalized}``.
+    """
+    cutoff = (now or timezone.now()) - grace()
+    expired = defaultdict(list)
+    for exam_id, student_id in ExamResult.objects.filter(
+        submitted_at__isnull=True, deadline__lte=cutoff,
+    ).values_list("exam_id", "student_id"):
+        expired[exam_id].append(student_id)
+
+    exams = Exam.objects.in_bulk(list(expired))
+    for exam_id, student_ids in expired.items():
+        with transaction.atomic():
+            scoring.score_exam(exams[exam_id], student_ids)
+            ExamResult.objects.filter(
+                exam_id=exam_id, student_id__in=student_ids, submitted_at__isnull=True,
+            ).update(submitted_at=F("deadline"))
+            similarity.record_attempts(exam_id, student_ids)
+    return {exam_id: len(student_ids) for exam_id, student_ids in expired.items()}
@@ -0,0 +1,91 @@
+"""
+Whole-exam delivery.
+
+An exam in single-page mode is sent to the student as one payload: every
+question with its choices and media URLs, never ``is_correct``. The page
+navigates between questions in the browser and only answer saves reach the
+server, instead of one rendered page per question.
+
+The payload is the same for every student, so it is built with one question
+query and one choice prefetch, serialized once and cached per exam together
+with the question/choice map used to validate answer saves. Question, Choice
+and Exam writes drop it (see ``exams.signals``); the timeout bounds how long
+another worker's per-process copy can lag behind.
+"""
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .models import Choice, Exam, Question
+
+
+MCQ_TYPES = ("mcq", "audio_mcq", "image_mcq")
+
+# json_script's escaping, so the payload can be embedded in a <script> tag.
+_SCRIPT_ESCAPES = {ord("<"): "\\u003C", ord(">"): "\\u003E", ord("&"): "\\u0026"}
+
+
+def _cache_key(exam_id):
+    return f"exams:payload:{exam_id}"
+
+
+def _cache_timeout():
+    return getattr(settings, "EXAM_PAYLOAD_CACHE_TIMEOUT", 60 * 15)
+
+
+def _build(exam_id):
+    exam = Exam.objects.filter(pk=exam_id).values("title", "duration").first()
+    if exam is None:
+        return None
+    questions = (
+        Question.objects.filter(exam_id=exam_id)
+        .order_by("id")
+        .prefetch_related(Prefetch("choices", queryset=Choice.objects.only("id", "question_id", "text").order_by("id")))
+    )
+    payload = {"id": exam_id, "title": exam["title"], "duration": exam["duration"], "questions": []}
+    choice_map = {}
+    for question in questions:
+        choices = [{"id": choice.pk, "text": choice.text} for choice in question.choices.all()]
+        payload["questions"].append({
+            "id": question.pk,
+            "text": question.text,
+            "qtype": question.qtype,
+            "points": question.points,
+            "audio_url": question.audio_file.url if question.audio_file else None,
+            "image_url": question.image_file.url if question.image_file else None,
+            "choices": choices,
+        })
+        # None marks a written answer; MCQs accept only their own choices.
+        choice_map[question.pk] = (
+            frozenset(choice["id"] for choice in choices) if question.qtype in MCQ_TYPES else None
+        )
+    return json.dumps(payload, separators=(",", ":")).translate(_SCRIPT_ESCAPES), choice_map
+
+
+def _cached(exam_id):
+    key = _cache_key(exam_id)
+    cached = cache.get(key)
+    if cached is None:
+        cached = _build(exam_id)
+        if cached is not None:
+            cache.set(key, cached, _cache_timeout())
+    return cached or (None, None)
+
+
+def exam_payload(exam_id):
+    """The exam as JSON text, safe to embed in a ``<script>`` tag, cached."""
+    return _cached(exam_id)[0]
+
+
+def choice_map(exam_id):
+    """
+    ``{question_id: frozenset(choice_ids)}`` with None for written questions,
+    cached; None if the exam does not exist.
+    """
+    return _cached(exam_id)[1]
+
+
+def forget(exam_id):
+    cache.delete(_cache_key(exam_id))
@@ -4,7 +4,7 @@ from .models import Exam, Question, Choice
 class ExamForm(forms.ModelForm):
     class Meta:
         model = Exam
-        fields = ["course", "title", "description", "duration", "start_time", "end_time"]
+        fields = ["course", "title", "description", "duration", "start_time", "end_time", "delivery_mode"]
         widgets = {
             "start_time": forms.DateTimeInput(attrs={"type": "datetime-local"}),
             "end_time": forms.DateTimeInput(attrs={"type": "datetime-local"}),
@@ -21,4 +21,16 @@ class ChoiceForm(forms.ModelForm):
         widgets = {
             "text": forms.TextInput(attrs={"class": "form-control", "placeholder": "Choice text"}),
             "is_correct": forms.CheckboxInput(),
-        }
\ No newline at end of file
+        }
+
+class ExamImportForm(forms.Form):
+    file = forms.FileField(
+        label="Questions file",
+        help_text="A .json or .csv exam export, or a .zip holding exam.json or exam.csv with its media files.",
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data["file"]
+        if not file.name.lower().endswith((".json", ".csv", ".zip")):
+            raise forms.ValidationError("Please upload a .json, .csv or .zip file.")
+        return file
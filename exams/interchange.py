@@ -0,0 +1,347 @@
+"""
+Exam interchange: an exam's questions and choices as JSON or CSV, optionally
+zipped together with their media.
+
+JSON::
+
+    {"format": "learnevo-exam", "version": 1,
+     "exam": {"title": ..., "description": ..., "duration": ..., "total_marks": ...},
+     "questions": [{"text": ..., "qtype": "mcq", "points": 1, "audio": null, "image": null,
+                    "choices": [{"text": ..., "is_correct": true}, ...]}, ...]}
+
+CSV has one row per question: ``question, type, points, audio, image,
+correct, choice 1 ... choice n``, where ``correct`` lists the numbers of the
+correct choices separated by spaces (``2`` or ``1 3``).
+
+``audio`` and ``image`` name files inside the ZIP the JSON or CSV came in
+(``exam.json`` or ``exam.csv`` at its root); the ZIP export stores media
+under their storage names. A plain JSON or CSV file cannot carry media, so
+those exports leave ``audio`` and ``image`` empty and every format imports
+back as it was exported. Media an import names but does not contain is
+skipped with a warning; ZIP members larger than
+``EXAM_IMPORT_MAX_FILE_BYTES`` are refused.
+
+Importing appends the questions to an existing exam in two INSERTs, one
+``bulk_create`` for the questions and one for every choice, which are tied
+to their question in memory through the primary keys the first returns.
+``Exam.total_marks`` is then recomputed once from the points. Bulk inserts
+skip the Question signals, so the exam's cached order and analysis are
+dropped here; saving the exam drops its payload. The media are written
+first, outside that transaction, and deleted again if the import then fails.
+
+Exports stream: the questions are read in chunks and written as they come,
+and the ZIP is built by ``courses.utils.zip_stream``.
+"""
+import csv
+import io
+import json
+import os
+import zipfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch, Sum
+
+from courses.utils.zip_stream import stream_zip_chunks
+
+from . import analysis, ordering
+from .delivery import MCQ_TYPES
+from .models import Choice, Question
+
+
+FORMAT = "learnevo-exam"
+VERSION = 1
+JSON = "json"
+CSV = "csv"
+ZIP = "zip"
+FORMATS = (JSON, CSV, ZIP)
+CONTENT_TYPES = {
+    JSON: "application/json",
+    CSV: "text/csv; charset=utf-8",
+    ZIP: "application/zip",
+}
+
+CSV_COLUMNS = ["question", "type", "points", "audio", "image", "correct"]
+CHUNK_SIZE = 500
+
+_QTYPES = dict(Question.QUESTION_TYPES)
+_CHOICE_TEXT_MAX = Choice._meta.get_field("text").max_length
+
+
+def max_file_bytes():
+    return getattr(settings, "EXAM_IMPORT_MAX_FILE_BYTES", 50 * 1024 * 1024)
+
+
+class InvalidExamFile(Exception):
+    def __init__(self, errors):
+        super().__init__("Invalid exam file.")
+        self.errors = errors
+
+
+# Import
+
+def _read_json(text):
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise InvalidExamFile([f"Not valid JSON: {e}"])
+    if not isinstance(data, dict) or not isinstance(data.get("questions"), list):
+        raise InvalidExamFile(['Expected an object with a "questions" list.'])
+    if data.get("version", VERSION) != VERSION:
+        raise InvalidExamFile([f"Unsupported version {data.get('version')!r}."])
+    return data["questions"]
+
+
+def _read_csv(text):
+    rows = csv.reader(io.StringIO(text, newline=""))
+    header = [cell.strip().lower() for cell in next(rows, [])]
+    if header[:len(CSV_COLUMNS)] != CSV_COLUMNS:
+        raise InvalidExamFile([f"The header must start with: {', '.join(CSV_COLUMNS)}."])
+    questions = []
+    for row in rows:
+        if not any(cell.strip() for cell in row):
+            continue
+        row += [""] * (len(header) - len(row))
+        text, qtype, points, audio, image, correct = row[:len(CSV_COLUMNS)]
+        correct_numbers = set(correct.split())
+        questions.append({
+            "text": text,
+            "qtype": qtype.strip() or "mcq",
+            "points": points.strip() or 1,
+            "audio": audio.strip(),
+            "image": image.strip(),
+            "choices": [
+                {"text": choice, "is_correct": str(number) in correct_numbers}
+                for number, choice in enumerate(row[len(CSV_COLUMNS):], start=1) if choice.strip()
+            ],
+        })
+    return questions
+
+
+def _decode(data):
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise InvalidExamFile(["The file must be UTF-8 encoded text."])
+
+
+def _read_upload(upload):
+    """``(raw questions, archive or None)`` of an uploaded .json, .csv or .zip file."""
+    name = upload.name.lower()
+    if name.endswith(".zip"):
+        try:
+            archive = zipfile.ZipFile(upload)
+        except zipfile.BadZipFile:
+            raise InvalidExamFile(["Not a valid ZIP file."])
+        names = set(archive.namelist())
+        too_large = [
+            f"{info.filename} is larger than {max_file_bytes() // (1024 * 1024)} MB."
+            for info in archive.infolist() if info.file_size > max_file_bytes()
+        ]
+        if too_large:
+            raise InvalidExamFile(too_large)
+        if "exam.json" in names:
+            return _read_json(_decode(archive.read("exam.json"))), archive
+        if "exam.csv" in names:
+            return _read_csv(_decode(archive.read("exam.csv"))), archive
+        raise InvalidExamFile(["The ZIP file needs an exam.json or exam.csv at its root."])
+    if name.endswith(".json"):
+        return _read_json(_decode(upload.read())), None
+    if name.endswith(".csv"):
+        return _read_csv(_decode(upload.read())), None
+    raise InvalidExamFile(["Upload a .json, .csv or .zip file."])
+
+
+def _clean(raw_questions, media, archived):
+    """
+    Validate the raw questions; returns ``(questions, warnings)`` with the
+    questions normalized, or raises ``InvalidExamFile``. Media missing from
+    ``media`` (the ZIP's member names) are dropped with a warning.
+    """
+    questions, errors, warnings = [], [], []
+    for number, raw in enumerate(raw_questions, start=1):
+        prefix = f"Question {number}"
+        if not isinstance(raw, dict):
+            errors.append(f"{prefix}: expected an object.")
+            continue
+        text = raw.get("text")
+        qtype = raw.get("qtype") or "mcq"
+        if not isinstance(text, str) or not text.strip():
+            errors.append(f"{prefix}: the text is empty.")
+        if qtype not in _QTYPES:
+            errors.append(f"{prefix}: unknown type {qtype!r}.")
+        try:
+            points = int(raw.get("points", 1))
+            if points < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors.append(f"{prefix}: points must be a whole number of at least 0.")
+            points = 0
+
+        files = {}
+        for field in ("audio", "image"):
+            path = raw.get(field) or ""
+            if path and path not in media:
+                if archived:
+                    warnings.append(f"{prefix}: {path} is not in the ZIP file; imported without it.")
+                else:
+                    warnings.append(f"{prefix}: {path} skipped; media can only be imported from a ZIP file.")
+                path = ""
+            files[field] = path
+
+        choices = []
+        for choice in raw.get("choices") or []:
+            choice_text = choice.get("text") if isinstance(choice, dict) else None
+            if not isinstance(choice_text, str) or not choice_text.strip():
+                errors.append(f"{prefix}: a choice is empty.")
+            elif len(choice_text) > _CHOICE_TEXT_MAX:
+                errors.append(f"{prefix}: a choice is longer than {_CHOICE_TEXT_MAX} characters.")
+            else:
+                choices.append((choice_text, bool(choice.get("is_correct"))))
+        if qtype in MCQ_TYPES:
+            if len(choices) < 2:
+                errors.append(f"{prefix}: a multiple-choice question needs at least two choices.")
+            elif not any(is_correct for _, is_correct in choices):
+                errors.append(f"{prefix}: no choice is marked correct.")
+        elif choices:
+            errors.append(f"{prefix}: only multiple-choice questions have choices.")
+
+        questions.append({"text": text, "qtype": qtype, "points": points, "choices": choices, **files})
+    if not questions and not errors:
+        errors.append("The file has no questions.")
+    if errors:
+        raise InvalidExamFile(errors)
+    return questions, warnings
+
+
+def import_exam(exam, upload):
+    """
+    Append the questions of ``upload`` (a .json, .csv or .zip file) to
+    ``exam``. Returns ``{"questions": n, "choices": n, "warnings": [...]}``;
+    raises ``InvalidExamFile`` listing every problem, before anything is
+    written.
+    """
+    raw_questions, archive = _read_upload(upload)
+    questions, warnings = _clean(raw_questions, set(archive.namelist()) if archive else set(), archive is not None)
+
+    created, saved = [], []
+    try:
+        for data in questions:
+            question = Question(exam=exam, text=data["text"], qtype=data["qtype"], points=data["points"])
+            for path, field in ((data["audio"], question.audio_file), (data["image"], question.image_file)):
+                if path:
+                    field.save(os.path.basename(path), ContentFile(archive.read(path)), save=False)
+                    saved.append(field)
+            created.append(question)
+        with transaction.atomic():
+            Question.objects.bulk_create(created)
+            choices = Choice.objects.bulk_create([
+                Choice(question=question, text=text, is_correct=is_correct)
+                for question, data in zip(created, questions)
+                for text, is_correct in data["choices"]
+            ])
+            exam.total_marks = Question.objects.filter(exam=exam).aggregate(total=Sum("points"))["total"] or 0
+            exam.save(update_fields=["total_marks"])
+    except Exception:
+        for field in saved:
+            field.storage.delete(field.name)
+        raise
+    ordering.forget(exam.pk)
+    analysis.forget(exam.pk)
+    return {"questions": len(created), "choices": len(choices), "warnings": warnings}
+
+
+# Export
+
+def _questions(exam):
+    return (
+        Question.objects.filter(exam=exam).order_by("id")
+        .prefetch_related(Prefetch("choices", queryset=Choice.objects.order_by("id")))
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def stream_json(exam, media=False):
+    """The exam as JSON; with ``media`` (inside the ZIP export) the media's storage names are kept."""
+    header = {
+        "format": FORMAT,
+        "version": VERSION,
+        "exam": {
+            "title": exam.title,
+            "description": exam.description,
+            "duration": exam.duration,
+            "total_marks": exam.total_marks,
+        },
+    }
+    yield json.dumps(header)[:-1] + ', "questions": ['
+    separator = "\n"
+    for question in _questions(exam):
+        yield separator + json.dumps({
+            "text": question.text,
+            "qtype": question.qtype,
+            "points": question.points,
+            "audio": (question.audio_file.name or None) if media else None,
+            "image": (question.image_file.name or None) if media else None,
+            "choices": [{"text": choice.text, "is_correct": choice.is_correct} for choice in question.choices.all()],
+        })
+        separator = ",\n"
+    yield "\n]}\n"
+
+
+class _Line:
+    def write(self, value):
+        return value
+
+
+def stream_csv(exam):
+    # No formula escaping here, unlike spreadsheet exports: the file is read back as is.
+    # A CSV file cannot carry media, so the audio and image columns stay empty.
+    width = (
+        Question.objects.filter(exam=exam).annotate(n=Count("choices")).aggregate(width=Max("n"))["width"] or 0
+    )
+    writer = csv.writer(_Line())
+    yield "\ufeff" + writer.writerow(CSV_COLUMNS + [f"choice {n}" for n in range(1, width + 1)])
+    for question in _questions(exam):
+        choices = list(question.choices.all())
+        yield writer.writerow([
+            question.text,
+            question.qtype,
+            question.points,
+            "",
+            "",
+            " ".join(str(n) for n, choice in enumerate(choices, start=1) if choice.is_correct),
+            *[choice.text for choice in choices],
+        ])
+
+
+def _media_chunks(field_file):
+    try:
+        yield from field_file.chunks()
+    finally:
+        field_file.close()
+
+
+def stream_zip(exam):
+    """``exam.json`` plus every media file of the exam; files that cannot be opened are left out."""
+    def members():
+        yield "exam.json", (piece.encode() for piece in stream_json(exam, media=True))
+        seen = set()
+        for question in Question.objects.filter(exam=exam).only("audio_file", "image_file").iterator(
+            chunk_size=CHUNK_SIZE,
+        ):
+            for field_file in (question.audio_file, question.image_file):
+                if not field_file or field_file.name in seen:
+                    continue
+                seen.add(field_file.name)
+                try:
+                    field_file.open("rb")
+                except OSError:
+                    continue
+                yield field_file.name, _media_chunks(field_file)
+
+    return stream_zip_chunks(members(), compression=zipfile.ZIP_DEFLATED)
+
+
+def stream(exam, fmt):
+    return {JSON: stream_json, CSV: stream_csv, ZIP: stream_zip}[fmt](exam)
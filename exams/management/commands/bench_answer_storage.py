@@ -0,0 +1,150 @@
+import datetime
+import statistics
+import time
+import uuid
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from exams import answers, scoring, storage
+from exams.models import Choice, Exam, ExamResult, Question, StudentAnswer
+from users.models import CustomUser
+
+
+def _bytes_written():
+    """Bytes this process has passed to write() so far (Linux only), or None."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _stored_bytes():
+    """Pages used by the answer and result tables with their indexes (SQLite only), or None."""
+    if connection.vendor != "sqlite":
+        return None
+    tables = [StudentAnswer._meta.db_table, ExamResult._meta.db_table]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE tbl_name IN (%s, %s))",
+            tables,
+        )
+        return cursor.fetchone()[0]
+
+
+def _per_answer(value, answers_n):
+    return f"{value / answers_n:8.1f} B" if value is not None else "     n/a"
+
+
+class Command(BaseCommand):
+    help = "Compare row-per-answer and packed answer storage: write cost, stored size and scoring speed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=300, help="Students taking the exam.")
+        parser.add_argument("--questions", type=int, default=200, help="Questions in the exam.")
+        parser.add_argument("--written", type=int, default=10, help="How many of the questions are written.")
+        parser.add_argument("--batch", type=int, default=10, help="Answers per autosave.")
+
+    def handle(self, *args, **options):
+        students_n = options["students"]
+        questions_n = options["questions"]
+        written_n = min(options["written"], questions_n)
+        batch = options["batch"]
+
+        tag = uuid.uuid4().hex[:8]
+        instructor = CustomUser.objects.create(email=f"bench-{tag}-instructor@example.com", role="instructor")
+        CustomUser.objects.bulk_create([
+            CustomUser(email=f"bench-{tag}-{i}@example.com", role="student") for i in range(students_n)
+        ])
+        student_ids = list(
+            CustomUser.objects.filter(email__startswith=f"bench-{tag}-", role="student").values_list("pk", flat=True)
+        )
+        # The same responses for both layouts.
+        picks = np.random.default_rng(0).integers(0, 4, size=(students_n, questions_n))
+        text = "A written answer of about a sentence or two, as students tend to give. " * 2
+        logical = students_n * ((questions_n - written_n) * 8 + written_n * len(text.encode()))
+
+        self.stdout.write(
+            f"{students_n} students x {questions_n} questions ({written_n} written), "
+            f"{batch} answers per save, {connection.vendor}"
+        )
+        self.stdout.write(f"payload {logical / (students_n * questions_n):.1f} B per answer")
+        try:
+            for layout in (Exam.ANSWERS_ROWS, Exam.ANSWERS_PACKED):
+                self._bench(layout, instructor, student_ids, questions_n, written_n, batch, picks, text, logical)
+        finally:
+            Exam.objects.filter(title__startswith=f"Bench {tag}").delete()
+            Exam.objects.filter(instructor=instructor).delete()
+            CustomUser.objects.filter(email__startswith=f"bench-{tag}-").delete()
+
+    def _bench(self, layout, instructor, student_ids, questions_n, written_n, batch, picks, text, logical):
+        now = timezone.now()
+        exam = Exam.objects.create(
+            title=f"Bench {layout}", instructor=instructor, answer_storage=layout,
+            start_time=now, end_time=now + datetime.timedelta(hours=2), duration=120,
+        )
+        questions = Question.objects.bulk_create([
+            Question(exam=exam, text=f"Question {i}", qtype="essay" if i < written_n else "mcq", points=1)
+            for i in range(questions_n)
+        ])
+        Choice.objects.bulk_create([
+            Choice(question=question, text=f"Choice {j}", is_correct=j == 0)
+            for question in questions[written_n:] for j in range(4)
+        ])
+        choice_ids = {}
+        for choice_id, question_id in Choice.objects.filter(question__exam=exam).order_by("id").values_list(
+            "id", "question_id",
+        ):
+            choice_ids.setdefault(question_id, []).append(choice_id)
+        ExamResult.objects.bulk_create([
+            ExamResult(exam=exam, student_id=student_id, start_time=now, deadline=exam.end_time)
+            for student_id in student_ids
+        ])
+
+        stored_before, written_before = _stored_bytes(), _bytes_written()
+        timings = []
+        for s, student_id in enumerate(student_ids):
+            rows = [
+                (question.pk, None, text) if question.pk not in choice_ids
+                else (question.pk, choice_ids[question.pk][picks[s, q]], None)
+                for q, question in enumerate(questions)
+            ]
+            for start in range(0, len(rows), batch):
+                started = time.perf_counter()
+                answers.upsert(exam.pk, student_id, rows[start:start + batch])
+                timings.append(time.perf_counter() - started)
+        stored_after, written_after = _stored_bytes(), _bytes_written()
+        # Only submitted attempts are scored.
+        ExamResult.objects.filter(exam=exam).update(submitted_at=timezone.now())
+
+        scoring_times = []
+        for _ in range(3):
+            started = time.perf_counter()
+            _, scores = scoring.compute_scores(exam.pk)
+            scoring_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        for student_id in student_ids[:50]:
+            storage.saved_answers(exam.pk, student_id)
+        resume = (time.perf_counter() - started) / min(50, len(student_ids))
+
+        answers_n = len(student_ids) * questions_n
+        written = written_after - written_before if written_before is not None else None
+        stored = stored_after - stored_before if stored_before is not None else None
+        amplification = f"{written / logical:6.1f}x" if written is not None else "   n/a"
+        timings.sort()
+        self.stdout.write(
+            f"{layout:>7}: save p50 {statistics.median(timings) * 1000:6.2f} ms  "
+            f"p99 {timings[int(len(timings) * 0.99)] * 1000:6.2f} ms  "
+            f"written {_per_answer(written, answers_n)}/answer ({amplification})  "
+            f"stored {_per_answer(stored, answers_n)}/answer  "
+            f"score {min(scoring_times) * 1000:7.1f} ms (mean {scores.mean():.1f})  "
+            f"resume {resume * 1000:5.2f} ms"
+        )
+        exam.delete()
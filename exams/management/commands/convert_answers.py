@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from exams import storage
+from exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = "Move the stored answers of exams between one row per answer and packed storage on the exam results."
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_ids", nargs="+", type=int, help="Exams to convert.")
+        parser.add_argument(
+            "--to", required=True, choices=[Exam.ANSWERS_ROWS, Exam.ANSWERS_PACKED], help="Storage to move to.",
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Convert exams that are open too; answer saves of the exam wait until the conversion is done.",
+        )
+
+    def handle(self, *args, **options):
+        exams = Exam.objects.in_bulk(options["exam_ids"])
+        missing = set(options["exam_ids"]) - set(exams)
+        if missing:
+            raise CommandError(f"Unknown exam id(s): {', '.join(map(str, sorted(missing)))}")
+        now = timezone.now()
+        open_exams = [exam_id for exam_id, exam in exams.items() if exam.start_time <= now <= exam.end_time]
+        if open_exams and not options["force"]:
+            raise CommandError(
+                f"Exam(s) {', '.join(map(str, sorted(open_exams)))} are open; convert them after they close or pass --force."
+            )
+
+        for exam_id in options["exam_ids"]:
+            exam = exams[exam_id]
+            started = time.perf_counter()
+            try:
+                moved = storage.convert(exam, options["to"])
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(
+                f"{exam_id}  {exam.title}: {moved} attempt(s) in {time.perf_counter() - started:.2f} s"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Converted {len(exams)} exam(s) to {options['to']} storage."))
@@ -0,0 +1,108 @@
+import datetime
+import time
+import uuid
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+
+from courses.management.commands import loadtest_enrollment
+from courses.models import Classroom, Course
+from exams import attempts
+from exams.models import Exam, ExamResult
+from users.models import CustomUser
+
+
+class Command(loadtest_enrollment.Command):
+    help = "Start one exam for many students at once and report latency, throughput and duplicates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=1000, help="Students starting the exam.")
+        parser.add_argument("--threads", type=int, default=64, help="Concurrent worker threads.")
+        parser.add_argument(
+            "--no-provision", action="store_true",
+            help="Skip provisioning so every start inserts its row, for comparison.",
+        )
+        parser.add_argument(
+            "--direct", action="store_true",
+            help="Start each attempt with its own get_or_create and save instead, for comparison.",
+        )
+        parser.add_argument("--repeat", action="store_true", help="Start everyone a second time (reloads).")
+
+    def handle(self, *args, **options):
+        students_n = options["students"]
+        threads = options["threads"]
+
+        tag = uuid.uuid4().hex[:8]
+        instructor = CustomUser.objects.create(email=f"loadtest-{tag}-instructor@example.com", role="instructor")
+        course = Course.objects.create(title=f"Load test {tag}")
+        classroom = Classroom.objects.create(
+            course=course, instructor=instructor, title=f"Load test {tag}", start_date=datetime.date.today(),
+        )
+        CustomUser.objects.bulk_create([
+            CustomUser(email=f"loadtest-{tag}-{i}@example.com", role="student")
+            for i in range(students_n)
+        ])
+        students = list(CustomUser.objects.filter(email__startswith=f"loadtest-{tag}-", role="student"))
+        classroom.students.add(*students)
+        now = timezone.now()
+        exam = Exam.objects.create(
+            title=f"Load test {tag}", course=course, instructor=instructor,
+            start_time=now - datetime.timedelta(minutes=1), end_time=now + datetime.timedelta(hours=2), duration=60,
+        )
+
+        try:
+            mode = "unprovisioned" if options["no_provision"] else "provisioned"
+            mode += ", direct" if options["direct"] else ", batched"
+            self.stdout.write(f"{students_n} students, {threads} threads, {connection.vendor}, {mode}")
+            if not options["no_provision"]:
+                started = time.perf_counter()
+                attempts.provision(exam)
+                self.stdout.write(f"provisioned in {time.perf_counter() - started:.2f} s")
+
+            if options["direct"]:
+                def action(student):
+                    # What start_exam did before: get_or_create, then a save.
+                    result, created = ExamResult.objects.get_or_create(
+                        student=student, exam=exam, defaults={"start_time": timezone.now()},
+                    )
+                    if not created and result.start_time is None:
+                        result.start_time = timezone.now()
+                        result.save()
+            else:
+                def action(student):
+                    attempts.start(exam, student.pk)
+
+            batcher = attempts.batcher()
+            batches_before, rows_before = batcher.batches, batcher.rows
+            started = time.perf_counter()
+            _, timings, errors = self._run(threads, students, action)
+            wall = time.perf_counter() - started
+            self._report("start", timings, errors)
+            self.stdout.write(f"throughput {len(timings) / wall:8.0f} starts/s over {wall:.2f} s")
+            if not options["direct"]:
+                batches = batcher.batches - batches_before
+                rows = batcher.rows - rows_before
+                self.stdout.write(f"{batches} batches, {rows / batches if batches else 0:.1f} rows per batch")
+
+            if options["repeat"]:
+                first_starts = dict(
+                    ExamResult.objects.filter(exam=exam, start_time__isnull=False).values_list("student_id", "start_time")
+                )
+                _, timings, repeat_errors = self._run(threads, students, action)
+                self._report("repeat", timings, repeat_errors)
+                errors += repeat_errors
+                again = dict(ExamResult.objects.filter(exam=exam).values_list("student_id", "start_time"))
+                if any(again[student_id] != start for student_id, start in first_starts.items()):
+                    raise CommandError("A repeated start moved a start time.")
+
+            rows = ExamResult.objects.filter(exam=exam)
+            self.stdout.write(f"{rows.count()} result rows, {rows.filter(start_time__isnull=False).count()} started")
+            if errors:
+                raise CommandError(f"{len(errors)} start(s) failed, e.g. {errors[0]}")
+            if (rows.count(), rows.filter(start_time__isnull=False).count()) != (students_n, students_n):
+                raise CommandError("Not every student has one started attempt.")
+            self.stdout.write(self.style.SUCCESS("Every student started exactly once."))
+        finally:
+            course.delete()
+            CustomUser.objects.filter(email__startswith=f"loadtest-{tag}-").delete()
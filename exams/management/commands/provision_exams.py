@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams import attempts
+from exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = "Create the ExamResult rows of every enrolled student for exams that are about to open."
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_ids", nargs="*", type=int, help="Exams to provision (default: upcoming ones).")
+        parser.add_argument(
+            "--within", type=int, default=60,
+            help="Without exam ids, provision exams opening within this many minutes (and open ones).",
+        )
+
+    def handle(self, *args, **options):
+        if options["exam_ids"]:
+            exams = Exam.objects.in_bulk(options["exam_ids"])
+            missing = set(options["exam_ids"]) - set(exams)
+            if missing:
+                raise CommandError(f"Unknown exam id(s): {', '.join(map(str, sorted(missing)))}")
+            exams = [exams[exam_id] for exam_id in options["exam_ids"]]
+        else:
+            exams = list(attempts.upcoming(timedelta(minutes=options["within"])))
+
+        for exam in exams:
+            self.stdout.write(f"{exam.pk}  {exam.title}: {attempts.provision(exam)} student(s)")
+        self.stdout.write(self.style.SUCCESS(f"Provisioned {len(exams)} exam(s)."))
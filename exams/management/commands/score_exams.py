@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.models import Exam
+from exams.scoring import score_exam
+
+
+class Command(BaseCommand):
+    help = "Score every finished attempt of the given exams; with --approve, publish the results as grades."
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_ids", nargs="+", type=int, help="Exams to score.")
+        parser.add_argument("--approve", action="store_true", help="Approve the results and write Grades.")
+
+    def handle(self, *args, **options):
+        exams = Exam.objects.in_bulk(options["exam_ids"])
+        missing = set(options["exam_ids"]) - set(exams)
+        if missing:
+            raise CommandError(f"Unknown exam id(s): {', '.join(map(str, sorted(missing)))}")
+
+        for exam_id in options["exam_ids"]:
+            started = time.perf_counter()
+            scores = score_exam(exams[exam_id], approve=options["approve"])
+            self.stdout.write(
+                f"{exam_id}  {exams[exam_id].title}: {len(scores)} result(s) in {time.perf_counter() - started:.2f} s"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Scored {len(exams)} exam(s)."))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exams import attempts
+
+
+class Command(BaseCommand):
+    help = "Submit and score the exam attempts whose deadline has passed; run it every minute or so."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every", type=int, default=0,
+            help="Keep running and sweep every this many seconds (default: sweep once, e.g. from cron).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            swept = attempts.sweep()
+            if swept or not options["every"]:
+                self.stdout.write(
+                    f"Finalized {sum(swept.values())} attempt(s) of {len(swept)} exam(s) "
+                    f"in {time.perf_counter() - started:.2f} s."
+                )
+            if not options["every"]:
+                return
+            time.sleep(options["every"])
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_calendar_indexes'),
+        ('exams', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['course', 'start_time'], name='exams_exam_course__b48fb4_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0003_exam_course_start_time_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='delivery_mode',
+            field=models.CharField(choices=[('paged', 'One question per page'), ('single', 'Whole exam in one page')], default='paged', help_text='Whole-page delivery loads every question at once and only saves answers to the server.', max_length=10),
+        ),
+    ]
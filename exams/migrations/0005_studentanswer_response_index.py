@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0004_exam_delivery_mode'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(fields=['question', 'student', 'choice'], name='exams_stude_questio_d1ec16_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:14
+
+from django.conf import settings
+import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_deadlines(apps, schema_editor):
+    # Attempts already past their deadline count as submitted, so the
+    # sweeper does not rescore the whole history on its first run.
+    ExamResult = apps.get_model('exams', 'ExamResult')
+    now = timezone.now()
+    results = list(ExamResult.objects.filter(start_time__isnull=False).select_related('exam'))
+    for result in results:
+        result.deadline = min(
+            result.start_time + datetime.timedelta(minutes=result.exam.duration), result.exam.end_time,
+        )
+        if result.deadline <= now:
+            result.submitted_at = result.deadline
+    ExamResult.objects.bulk_update(results, ['deadline', 'submitted_at'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0005_studentanswer_response_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examresult',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='examresult',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='examresult',
+            index=models.Index(fields=['submitted_at', 'deadline'], name='exams_examr_submitt_85e73c_idx'),
+        ),
+        migrations.RunPython(backfill_deadlines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0006_examresult_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='answer_storage',
+            field=models.CharField(choices=[('rows', 'One row per answer'), ('packed', 'Packed on the exam result')], default='rows', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='examresult',
+            name='answer_choices',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='examresult',
+            name='answer_texts',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0007_packed_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examresult',
+            name='last_seq',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
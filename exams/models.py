@@ -5,6 +5,19 @@ from django.utils import timezone
 
 
 class Exam(models.Model):
+    DELIVERY_PAGED = "paged"
+    DELIVERY_SINGLE = "single"
+    DELIVERY_CHOICES = [
+        (DELIVERY_PAGED, "One question per page"),
+        (DELIVERY_SINGLE, "Whole exam in one page"),
+    ]
+    ANSWERS_ROWS = "rows"
+    ANSWERS_PACKED = "packed"
+    ANSWER_STORAGE_CHOICES = [
+        (ANSWERS_ROWS, "One row per answer"),
+        (ANSWERS_PACKED, "Packed on the exam result"),
+    ]
+
     title = models.CharField(max_length=200)
     description = models.TextField(null=True, blank=True)
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='exams', null=True, blank=True)
@@ -18,11 +31,20 @@ class Exam(models.Model):
     end_time = models.DateTimeField()
     duration = models.PositiveIntegerField(help_text='Exam duration (minutes)')
     total_marks = models.PositiveIntegerField(default=0, help_text="Total marks for the exam (auto-calculated or set manually)")
+    delivery_mode = models.CharField(
+        max_length=10, choices=DELIVERY_CHOICES, default=DELIVERY_PAGED,
+        help_text="Whole-page delivery loads every question at once and only saves answers to the server.",
+    )
+    # Changed with ``manage.py convert_answers``, which moves stored answers along.
+    answer_storage = models.CharField(
+        max_length=10, choices=ANSWER_STORAGE_CHOICES, default=ANSWERS_ROWS, editable=False,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['course', 'start_time'])]
 
     def __str__(self):
         return self.title
@@ -86,6 +108,8 @@ class StudentAnswer(models.Model):
 
     class Meta:
         unique_together = ("student", "question")
+        # Covers the (student, choice) pairs read by scoring and item analysis.
+        indexes = [models.Index(fields=["question", "student", "choice"])]
 
     def __str__(self):
         return f"{self.student.email} → {self.question.text[:30]}..."
@@ -105,9 +129,18 @@ class ExamResult(models.Model):
     is_approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     start_time = models.DateTimeField(null=True, blank=True) 
+    deadline = models.DateTimeField(null=True, blank=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    # Number of the last autosave batch written (exams/answers.py).
+    last_seq = models.BigIntegerField(null=True, blank=True)
+    # Answers of exams with packed storage (see exams/storage.py): the chosen
+    # choice ids as little-endian int64s, and written answers by question id.
+    answer_choices = models.BinaryField(null=True, blank=True)
+    answer_texts = models.JSONField(null=True, blank=True)
 
     class Meta:
         unique_together = ("student", "exam")
+        indexes = [models.Index(fields=["submitted_at", "deadline"])]
 
     def __str__(self):
         return f"{self.student.email} - {self.exam.title} - {self.score}"
@@ -0,0 +1,62 @@
+"""
+Question order of an exam, for moving between questions while taking it.
+
+The ordered question ids and their position map are built with one query and
+cached per exam, so finding the first, next or previous question is a cache
+read and a dict lookup rather than a query per click. Adding or deleting a
+question drops the cached order (see ``exams.signals``); the timeout bounds
+how long another worker's per-process copy can lag behind.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Question
+
+
+def _cache_key(exam_id):
+    return f"exams:order:{exam_id}"
+
+
+def _cache_timeout():
+    return getattr(settings, "EXAM_ORDER_CACHE_TIMEOUT", 60 * 15)
+
+
+def question_order(exam_id):
+    """``(question_ids, positions)``: the ids in order and ``{id: index}``, cached."""
+    key = _cache_key(exam_id)
+    order = cache.get(key)
+    if order is None:
+        ids = tuple(Question.objects.filter(exam_id=exam_id).order_by("id").values_list("id", flat=True))
+        order = (ids, {question_id: index for index, question_id in enumerate(ids)})
+        cache.set(key, order, _cache_timeout())
+    return order
+
+
+def forget(exam_id):
+    cache.delete(_cache_key(exam_id))
+
+
+def first_question_id(exam_id):
+    ids, _ = question_order(exam_id)
+    return ids[0] if ids else None
+
+
+def position(exam_id, question_id):
+    """The 0-based index of ``question_id`` in its exam, or None."""
+    return question_order(exam_id)[1].get(question_id)
+
+
+def next_question_id(exam_id, question_id):
+    ids, positions = question_order(exam_id)
+    index = positions.get(question_id)
+    if index is None or index + 1 >= len(ids):
+        return None
+    return ids[index + 1]
+
+
+def previous_question_id(exam_id, question_id):
+    ids, positions = question_order(exam_id)
+    index = positions.get(question_id)
+    if not index:
+        return None
+    return ids[index - 1]
@@ -0,0 +1,121 @@
+"""
+Exam scoring.
+
+Scores a whole exam in one pass instead of one student at a time. The answer
+key is a sorted vector of correct choice ids with the points of their
+question; every chosen answer of the exam is loaded as ``(student, choice)``
+pairs (``storage.choice_pairs``, from either answer layout), looked up in the
+key with ``searchsorted`` and summed per student with ``bincount``. A question earns its points when the chosen choice is one
+of its correct ones; written answers earn nothing until graded by hand.
+
+Only closed attempts are scored: submitted ones, ones past their deadline
+plus the grace period (``attempts.grace``), and every attempt once the exam
+itself ended that long ago. An attempt still running is never scored, so
+partial scores are never approved or published.
+
+Results are written with one upsert on (student, exam). Approving them also
+writes the students' Grades in bulk (``grades.services``); the per-result
+signal only runs for results saved one at a time. Scoring is also what drops
+the cached item analysis: attempts are scored when they close, and only
+closed attempts' answers change it.
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from grades.services import upsert_exam_grades
+
+from . import analysis
+from .models import Choice, Exam, ExamResult, Question
+from .storage import choice_pairs
+
+
+def answer_key(exam_id):
+    """``(choice_ids, points)``: sorted correct choice ids and their question's points."""
+    rows = np.array(
+        Choice.objects.filter(question__exam_id=exam_id, is_correct=True)
+        .values_list("id", "question__points"),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    order = np.argsort(rows[:, 0], kind="stable")
+    return rows[order, 0], rows[order, 1]
+
+
+def possible_points(exam_id):
+    return Question.objects.filter(exam_id=exam_id).aggregate(total=Sum("points"))["total"] or 0
+
+
+def closed_student_ids(exam_id, student_ids=None, now=None):
+    """
+    ``(student_ids, exam_over)``: the students (of ``student_ids``) whose
+    attempt at the exam is over, and whether the exam itself is; once it is,
+    every attempt counts as closed.
+    """
+    from .attempts import grace
+
+    cutoff = (now or timezone.now()) - grace()
+    exam_over = Exam.objects.filter(pk=exam_id, end_time__lte=cutoff).exists()
+    # Provisioned rows of students who never started are left alone.
+    closed = ExamResult.objects.filter(exam_id=exam_id, start_time__isnull=False)
+    if student_ids is not None:
+        closed = closed.filter(student_id__in=list(student_ids))
+    if not exam_over:
+        closed = closed.filter(Q(submitted_at__isnull=False) | Q(deadline__lte=cutoff))
+    return np.fromiter(closed.values_list("student_id", flat=True), dtype=np.int64), exam_over
+
+
+def compute_scores(exam_id, student_ids=None, now=None):
+    """
+    ``(student_ids, scores)`` as aligned numpy arrays for every student whose
+    attempt is closed (see ``closed_student_ids``; or only ``student_ids``);
+    students with no correct answer score 0.
+    """
+    if student_ids is not None:
+        student_ids = list(student_ids)
+    closed, exam_over = closed_student_ids(exam_id, student_ids, now)
+
+    pairs = choice_pairs(exam_id, student_ids)
+    if not exam_over:
+        pairs = pairs[np.isin(pairs[:, 0], closed)]
+    students = np.union1d(pairs[:, 0], closed)
+    if not len(students):
+        return students, np.zeros(0)
+
+    key_ids, key_points = answer_key(exam_id)
+    points = np.zeros(len(pairs))
+    if len(key_ids) and len(pairs):
+        index = np.minimum(np.searchsorted(key_ids, pairs[:, 1]), len(key_ids) - 1)
+        points = np.where(key_ids[index] == pairs[:, 1], key_points[index], 0)
+    scores = np.bincount(np.searchsorted(students, pairs[:, 0]), weights=points, minlength=len(students))
+    return students, scores
+
+
+def score_exam(exam, student_ids=None, approve=False):
+    """
+    Score the closed attempts at ``exam`` of all (or ``student_ids``)
+    students and store the results; with ``approve`` they are approved and
+    published as Grades. Returns ``{student_id: score}``.
+    """
+    students, values = compute_scores(exam.pk, student_ids)
+    scores = dict(zip(students.tolist(), values.tolist()))
+    if not scores:
+        return scores
+
+    update_fields = ["score", "is_approved"] if approve else ["score"]
+    with transaction.atomic():
+        ExamResult.objects.bulk_create(
+            [
+                ExamResult(student_id=student_id, exam=exam, score=score, is_approved=approve)
+                for student_id, score in scores.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["student", "exam"],
+            update_fields=update_fields,
+            batch_size=1000,
+        )
+        if approve:
+            max_score = max(exam.total_marks, possible_points(exam.pk)) or 100
+            upsert_exam_grades(exam, scores, max_score)
+        transaction.on_commit(lambda: analysis.forget(exam.pk))
+    return scores
@@ -0,0 +1,42 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from courses import similarity
+from courses.models import TextSignature
+
+from . import analysis, delivery, ordering
+from .models import Choice, Exam, Question
+
+
+@receiver(post_save, sender=Question)
+def forget_order_on_create(sender, instance, created, **kwargs):
+    if created:
+        ordering.forget(instance.exam_id)
+
+
+@receiver(post_delete, sender=Question)
+def forget_order_on_delete(sender, instance, **kwargs):
+    ordering.forget(instance.exam_id)
+
+
+@receiver(post_delete, sender=Question)
+def forget_answer_signatures(sender, instance, **kwargs):
+    similarity.forget(TextSignature.KIND_ANSWER, instance.pk)
+
+
+@receiver(post_save, sender=Exam)
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def forget_exam_caches(sender, instance, **kwargs):
+    delivery.forget(instance.pk if sender is Exam else instance.exam_id)
+    if sender is Question:
+        analysis.forget(instance.exam_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def forget_exam_caches_for_choice(sender, instance, **kwargs):
+    exam_id = Question.objects.filter(pk=instance.question_id).values_list("exam_id", flat=True).first()
+    if exam_id is not None:
+        delivery.forget(exam_id)
+        analysis.forget(exam_id)
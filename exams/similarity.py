@@ -0,0 +1,35 @@
+"""
+Near-duplicate written answers within an exam.
+
+The written answers of an attempt are signed when it is submitted or swept
+(``exams.attempts``) and compared per question; the engine and its storage
+are in ``courses.similarity``.
+"""
+from courses import similarity
+from courses.models import TextSignature
+
+from . import storage
+from .delivery import MCQ_TYPES
+from .models import Question
+
+
+def record_attempts(exam_id, student_ids=None):
+    """Sign the written answers of ``student_ids`` (or of everyone) in the exam."""
+    return similarity.record(TextSignature.KIND_ANSWER, storage.text_answers(exam_id, student_ids))
+
+
+def exam_report(exam):
+    """
+    ``pairs``: flagged pairs of written answers to the same question of
+    ``exam``, each with the question; plus the ``threshold`` and
+    ``min_words`` they were found with.
+    """
+    questions = {
+        question_id: {"question_id": question_id, "question_text": text}
+        for question_id, text in Question.objects.filter(exam=exam).exclude(qtype__in=MCQ_TYPES).values_list("id", "text")
+    }
+    return {
+        "pairs": similarity.describe(similarity.flagged_pairs(TextSignature.KIND_ANSWER, questions), questions),
+        "threshold": similarity.threshold(),
+        "min_words": similarity.min_words(),
+    }
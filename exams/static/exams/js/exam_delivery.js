@@ -0,0 +1,173 @@
+document.addEventListener("DOMContentLoaded", function () {
+    const form = document.getElementById("examForm");
+    if (!form) return;
+
+    const exam = JSON.parse(document.getElementById("examPayload").textContent);
+    const answers = JSON.parse(document.getElementById("examAnswers").textContent);
+    const body = document.getElementById("questionBody");
+    const nav = document.getElementById("questionNav");
+    const position = document.getElementById("questionPosition");
+    const saveStatus = document.getElementById("saveStatus");
+    const prevButton = document.getElementById("prevQuestion");
+    const nextButton = document.getElementById("nextQuestion");
+    const csrfToken = form.querySelector("[name=csrfmiddlewaretoken]").value;
+    const mcqTypes = ["mcq", "audio_mcq", "image_mcq"];
+    const autosaveInterval = 5000;
+    const questionsById = Object.fromEntries(exam.questions.map(question => [question.id, question]));
+    const unsaved = new Set();
+    let current = 0;
+    let seq = Date.now();
+    let inFlight = null;
+
+    // Answers changed since the last autosave are sent together, every few
+    // seconds and whenever the student moves to another question.
+    function flush() {
+        if (!unsaved.size) return inFlight || Promise.resolve();
+        if (inFlight) return inFlight.then(flush, flush);
+        const batch = {};
+        unsaved.forEach(id => {
+            const answer = answers[id];
+            const question = questionsById[id];
+            if (mcqTypes.includes(question.qtype)) {
+                if (answer.choice) batch[id] = { choice: answer.choice };
+            } else {
+                batch[id] = { text: answer.text || "" };
+            }
+        });
+        const sent = Array.from(unsaved);
+        unsaved.clear();
+        seq += 1;
+        saveStatus.textContent = "Saving...";
+        inFlight = fetch(form.action, {
+            method: "POST",
+            body: JSON.stringify({ seq: seq, answers: batch }),
+            keepalive: true,
+            headers: {
+                "Content-Type": "application/json",
+                "X-CSRFToken": csrfToken,
+                "X-Requested-With": "XMLHttpRequest",
+            },
+        })
+            .then(response => {
+                if (response.status === 409) {
+                    // The deadline has passed or the exam was submitted elsewhere.
+                    unsaved.clear();
+                    window.location.href = form.dataset.finish;
+                    return;
+                }
+                if (!response.ok) throw new Error();
+                saveStatus.textContent = "Saved.";
+            })
+            .catch(error => {
+                sent.forEach(id => unsaved.add(id));
+                saveStatus.textContent = "Your answers could not be saved. Retrying...";
+                throw error;
+            })
+            .finally(() => { inFlight = null; });
+        return inFlight;
+    }
+
+    function renderNav() {
+        nav.replaceChildren(...exam.questions.map((question, index) => {
+            const button = document.createElement("button");
+            button.type = "button";
+            button.textContent = index + 1;
+            button.className = "btn btn-sm " + (
+                index === current ? "btn-primary" : answers[question.id] ? "btn-outline-success" : "btn-outline-secondary"
+            );
+            button.addEventListener("click", () => go(index));
+            return button;
+        }));
+    }
+
+    function render() {
+        const question = exam.questions[current];
+        const answer = answers[question.id] || {};
+        const parts = [];
+
+        const text = document.createElement("p");
+        text.className = "fw-bold";
+        text.textContent = question.text;
+        parts.push(text);
+
+        if (question.audio_url) {
+            const audio = document.createElement("audio");
+            audio.controls = true;
+            audio.className = "mb-3";
+            audio.src = question.audio_url;
+            parts.push(audio);
+        }
+        if (question.image_url) {
+            const image = document.createElement("img");
+            image.src = question.image_url;
+            image.className = "img-fluid rounded mb-3";
+            image.style.maxWidth = "350px";
+            parts.push(image);
+        }
+
+        if (mcqTypes.includes(question.qtype)) {
+            question.choices.forEach(choice => {
+                const wrapper = document.createElement("div");
+                wrapper.className = "form-check mb-2";
+                const input = document.createElement("input");
+                input.type = "radio";
+                input.className = "form-check-input";
+                input.name = "choice";
+                input.id = "c" + choice.id;
+                input.checked = answer.choice === choice.id;
+                input.addEventListener("change", () => {
+                    answers[question.id] = { choice: choice.id, text: null };
+                    unsaved.add(question.id);
+                    renderNav();
+                });
+                const label = document.createElement("label");
+                label.className = "form-check-label";
+                label.htmlFor = input.id;
+                label.textContent = choice.text;
+                wrapper.append(input, label);
+                parts.push(wrapper);
+            });
+        } else {
+            const textarea = document.createElement("textarea");
+            textarea.className = "form-control";
+            textarea.rows = 5;
+            textarea.placeholder = "Write your answer here...";
+            textarea.value = answer.text || "";
+            textarea.addEventListener("input", () => {
+                answers[question.id] = { choice: null, text: textarea.value };
+                unsaved.add(question.id);
+            });
+            parts.push(textarea);
+        }
+
+        body.replaceChildren(...parts);
+        position.textContent = `Question ${current + 1} of ${exam.questions.length}`;
+        prevButton.disabled = current === 0;
+        nextButton.textContent = current + 1 < exam.questions.length ? "Next" : "Submit Exam";
+        saveStatus.textContent = "";
+        renderNav();
+    }
+
+    function go(index) {
+        flush().catch(() => {});
+        current = index;
+        render();
+    }
+
+    prevButton.addEventListener("click", () => go(current - 1));
+    nextButton.addEventListener("click", () => {
+        if (current + 1 < exam.questions.length) {
+            go(current + 1);
+            return;
+        }
+        nextButton.disabled = true;
+        flush()
+            .then(() => flush())
+            .then(() => { window.location.href = form.dataset.finish; })
+            .catch(() => { nextButton.disabled = false; });
+    });
+
+    setInterval(() => flush().catch(() => {}), autosaveInterval);
+    window.addEventListener("pagehide", () => flush().catch(() => {}));
+    if (exam.questions.length) render();
+});
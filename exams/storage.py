@@ -0,0 +1,244 @@
+"""
+Answer storage layouts.
+
+By default every answer is a StudentAnswer row: one row, with its unique and
+response indexes, per student and question. An exam can instead keep each
+attempt's answers packed on its ExamResult (``Exam.ANSWERS_PACKED``): the
+chosen choice ids as one array of int64s (a choice id names its question, so
+no question ids are stored) and written answers as a small JSON map of
+question id to text. That is one row per attempt instead of one per
+question; ``manage.py convert_answers`` moves an exam between the layouts
+and ``manage.py bench_answer_storage`` compares them.
+
+The layout is read from the Exam row on every call (``answer_storage``,
+one primary-key lookup) rather than from a per-process cache, so a
+conversion made by another process is followed at once. Writes read it
+after locking their attempt's ExamResult (``attempts.lock_open``), and
+``convert`` locks every attempt of the exam first, so a write in flight
+finishes in the old layout before the conversion moves it, and one arriving
+during the conversion waits and then uses the new layout.
+
+Everything that reads answers goes through this module: ``choice_pairs``
+for scoring and item analysis, ``saved_answers`` for resuming an attempt,
+``text_answers`` for near-duplicate detection.
+A packed save reads the attempt's arrays, changes them and writes them back
+in one transaction, instead of one blind upsert per answer. Packed storage
+keeps neither a per-answer timestamp nor an uploaded file, so exams with
+uploaded answers stay on rows.
+"""
+from collections import defaultdict
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Q
+
+from . import delivery
+from .models import Choice, Exam, ExamResult, Question, StudentAnswer
+
+
+_CHOICE_DTYPE = np.dtype("<i8")
+
+
+def answer_storage(exam_id):
+    """The exam's ``answer_storage``, read from the database."""
+    return Exam.objects.filter(pk=exam_id).values_list("answer_storage", flat=True).first()
+
+
+def pack_choices(choice_ids):
+    return np.asarray(sorted(choice_ids), dtype=_CHOICE_DTYPE).tobytes()
+
+
+def unpack_choices(blob):
+    if not blob:
+        return np.zeros(0, dtype=np.int64)
+    return np.frombuffer(blob, dtype=_CHOICE_DTYPE).astype(np.int64)
+
+
+def answer_pairs(answers):
+    """
+    ``(student_id, choice_id)`` of the chosen answers in the StudentAnswer
+    queryset ``answers`` as an ``(n, 2)`` int array. The rows are read
+    straight from the cursor: at exam scale building ORM rows costs more
+    than the query.
+    """
+    sql, params = (
+        answers.filter(choice__isnull=False).order_by().values_list("student_id", "choice_id").query.sql_with_params()
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+
+
+def choice_pairs(exam_id, student_ids=None):
+    """``answer_pairs`` for every (or ``student_ids``') answer of the exam, in either layout."""
+    if answer_storage(exam_id) != Exam.ANSWERS_PACKED:
+        answers = StudentAnswer.objects.filter(question__exam_id=exam_id)
+        if student_ids is not None:
+            answers = answers.filter(student_id__in=list(student_ids))
+        return answer_pairs(answers)
+
+    results = ExamResult.objects.filter(exam_id=exam_id, answer_choices__isnull=False)
+    if student_ids is not None:
+        results = results.filter(student_id__in=list(student_ids))
+    students, choices = [], []
+    for student_id, blob in results.values_list("student_id", "answer_choices").iterator(chunk_size=2000):
+        chosen = unpack_choices(blob)
+        students.append(np.full(len(chosen), student_id, dtype=np.int64))
+        choices.append(chosen)
+    if not choices:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.column_stack([np.concatenate(students), np.concatenate(choices)])
+
+
+def text_answers(exam_id, student_ids=None):
+    """``(question_id, student_id, text_answer)`` of the written answers of the exam."""
+    if answer_storage(exam_id) != Exam.ANSWERS_PACKED:
+        answers = StudentAnswer.objects.filter(question__exam_id=exam_id, text_answer__isnull=False)
+        if student_ids is not None:
+            answers = answers.filter(student_id__in=list(student_ids))
+        yield from answers.values_list("question_id", "student_id", "text_answer").iterator(chunk_size=2000)
+        return
+
+    results = ExamResult.objects.filter(exam_id=exam_id, answer_texts__isnull=False)
+    if student_ids is not None:
+        results = results.filter(student_id__in=list(student_ids))
+    for student_id, texts in results.values_list("student_id", "answer_texts").iterator(chunk_size=2000):
+        for question_id, text in texts.items():
+            yield int(question_id), student_id, text
+
+
+def _question_of_choice(choices):
+    return {
+        choice_id: question_id
+        for question_id, choice_ids in choices.items()
+        for choice_id in choice_ids or ()
+    }
+
+
+def saved_answers(exam_id, student_id):
+    """``{question_id: (choice_id, text_answer)}`` of one attempt."""
+    if answer_storage(exam_id) != Exam.ANSWERS_PACKED:
+        return {
+            question_id: (choice_id, text_answer)
+            for question_id, choice_id, text_answer in StudentAnswer.objects.filter(
+                student_id=student_id, question__exam_id=exam_id,
+            ).values_list("question_id", "choice_id", "text_answer")
+        }
+
+    blob, texts = ExamResult.objects.filter(
+        exam_id=exam_id, student_id=student_id,
+    ).values_list("answer_choices", "answer_texts").first() or (None, None)
+    choices = delivery.choice_map(exam_id) or {}
+    question_of = _question_of_choice(choices)
+    saved = {
+        int(question_id): (None, text) for question_id, text in (texts or {}).items() if int(question_id) in choices
+    }
+    for choice_id in unpack_choices(blob).tolist():
+        if choice_id in question_of:
+            saved[question_of[choice_id]] = (choice_id, None)
+    return saved
+
+
+def write_packed(exam_id, student_id, answers):
+    """``answers.upsert`` for packed exams: merge ``answers`` into the attempt's arrays."""
+    question_of = _question_of_choice(delivery.choice_map(exam_id) or {})
+    with transaction.atomic():
+        blob, texts = ExamResult.objects.select_for_update().filter(
+            exam_id=exam_id, student_id=student_id,
+        ).values_list("answer_choices", "answer_texts").first() or (None, None)
+        # Choices deleted since they were saved are dropped here, as their rows would be.
+        chosen = {
+            question_of[choice_id]: choice_id
+            for choice_id in unpack_choices(blob).tolist() if choice_id in question_of
+        }
+        texts = dict(texts or {})
+        for question_id, choice_id, text_answer in answers:
+            chosen.pop(question_id, None)
+            texts.pop(str(question_id), None)
+            if choice_id:
+                choice_id = int(choice_id)
+                if question_of.get(choice_id) == question_id:
+                    chosen[question_id] = choice_id
+            elif text_answer is not None:
+                texts[str(question_id)] = text_answer
+        ExamResult.objects.bulk_create(
+            [ExamResult(
+                exam_id=exam_id, student_id=student_id,
+                answer_choices=pack_choices(chosen.values()), answer_texts=texts or None,
+            )],
+            update_conflicts=True,
+            unique_fields=["student", "exam"],
+            update_fields=["answer_choices", "answer_texts"],
+        )
+
+
+def _pack(exam):
+    rows = StudentAnswer.objects.filter(question__exam=exam)
+    if rows.exclude(uploaded_file="").exclude(uploaded_file__isnull=True).exists():
+        raise ValueError(f"{exam} has uploaded answers, which packed storage cannot keep.")
+    chosen, texts = defaultdict(list), defaultdict(dict)
+    for student_id, question_id, choice_id, text_answer in rows.values_list(
+        "student_id", "question_id", "choice_id", "text_answer",
+    ).iterator(chunk_size=5000):
+        if choice_id is not None:
+            chosen[student_id].append(choice_id)
+        elif text_answer is not None:
+            texts[student_id][str(question_id)] = text_answer
+    students = set(chosen) | set(texts)
+    ExamResult.objects.bulk_create(
+        [
+            ExamResult(
+                exam=exam, student_id=student_id,
+                answer_choices=pack_choices(chosen[student_id]), answer_texts=texts.get(student_id) or None,
+            )
+            for student_id in students
+        ],
+        update_conflicts=True,
+        unique_fields=["student", "exam"],
+        update_fields=["answer_choices", "answer_texts"],
+        batch_size=500,
+    )
+    rows.delete()
+    return len(students)
+
+
+def _unpack(exam):
+    question_of = dict(Choice.objects.filter(question__exam=exam).values_list("id", "question_id"))
+    question_ids = set(Question.objects.filter(exam=exam).values_list("id", flat=True))
+    results = ExamResult.objects.filter(
+        Q(answer_choices__isnull=False) | Q(answer_texts__isnull=False), exam=exam,
+    )
+    rows, students = [], 0
+    for student_id, blob, texts in results.values_list("student_id", "answer_choices", "answer_texts").iterator(
+        chunk_size=2000,
+    ):
+        students += 1
+        rows.extend(
+            StudentAnswer(student_id=student_id, question_id=question_of[choice_id], choice_id=choice_id)
+            for choice_id in unpack_choices(blob).tolist() if choice_id in question_of
+        )
+        rows.extend(
+            StudentAnswer(student_id=student_id, question_id=int(question_id), text_answer=text)
+            for question_id, text in (texts or {}).items() if int(question_id) in question_ids
+        )
+    StudentAnswer.objects.bulk_create(rows, ignore_conflicts=True, batch_size=1000)
+    results.update(answer_choices=None, answer_texts=None)
+    return students
+
+
+def convert(exam, to):
+    """
+    Move every stored answer of ``exam`` to the ``to`` layout in one
+    transaction; returns the number of attempts moved. Answer writes of the
+    exam wait for it, as its attempts' rows are locked first.
+    """
+    if to not in (Exam.ANSWERS_ROWS, Exam.ANSWERS_PACKED):
+        raise ValueError(f"Unknown answer storage {to!r}.")
+    if exam.answer_storage == to:
+        return 0
+    with transaction.atomic():
+        list(ExamResult.objects.select_for_update().filter(exam=exam).values_list("pk", flat=True))
+        moved = _pack(exam) if to == Exam.ANSWERS_PACKED else _unpack(exam)
+        exam.answer_storage = to
+        exam.save(update_fields=["answer_storage"])
+    return moved
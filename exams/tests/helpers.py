@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from exams.models import Choice, Exam, ExamResult, Question
+
+User = get_user_model()
+
+
+class ExamTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.instructor = User.objects.create_user(email="teacher@example.com", password="x", role="instructor")
+        self.exam = Exam.objects.create(
+            title="Midterm", instructor=self.instructor,
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1), duration=60,
+        )
+        # Two points for the first question, three for the second, a written third one.
+        self.q1, self.a1 = self.question("Capital of France?", 2, ["Paris", "Lyon", "Nice"], correct={0})
+        self.q2, self.a2 = self.question("Even numbers?", 3, ["2", "3", "4"], correct={0, 2})
+        self.q3, _ = self.question("Explain.", 5, [], qtype="essay")
+
+    def question(self, text, points, choices, correct=(), qtype="mcq"):
+        question = Question.objects.create(exam=self.exam, text=text, qtype=qtype, points=points)
+        return question, [
+            Choice.objects.create(question=question, text=choice, is_correct=n in correct)
+            for n, choice in enumerate(choices)
+        ]
+
+    def student(self, n, start=None, deadline=None):
+        now = timezone.now()
+        student = User.objects.create_user(email=f"student{n}@example.com", password="x", role="student")
+        ExamResult.objects.create(
+            student=student, exam=self.exam, start_time=start or now - timedelta(minutes=30),
+            deadline=deadline or now + timedelta(minutes=30),
+        )
+        return student
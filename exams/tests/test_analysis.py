@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from exams import analysis, answers, attempts
+from exams.models import Exam, ExamResult
+
+from .helpers import ExamTestCase
+
+
+class ItemAnalysisTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.right, self.wrong, self.blank, self.running = (self.student(n) for n in range(4))
+        answers.upsert(self.exam.pk, self.right.pk, [(self.q1.pk, self.a1[0].pk, None), (self.q2.pk, self.a2[0].pk, None)])
+        answers.upsert(self.exam.pk, self.wrong.pk, [(self.q1.pk, self.a1[1].pk, None), (self.q2.pk, self.a2[2].pk, None)])
+        answers.upsert(self.exam.pk, self.running.pk, [(self.q1.pk, self.a1[0].pk, None)])
+        ExamResult.objects.exclude(student=self.running).update(submitted_at=timezone.now())
+
+    def items(self, report):
+        return {item["question_id"]: item for item in report["items"]}
+
+    def test_only_closed_attempts_are_analysed(self):
+        report = analysis.item_analysis(self.exam.pk)
+
+        self.assertEqual((report["takers"], report["skipped"]), (3, 1))
+        q1, q2 = self.items(report)[self.q1.pk], self.items(report)[self.q2.pk]
+        self.assertEqual((q1["p_value"], q1["omitted"], q1["discrimination"]), (0.333, 0.333, 0.5))
+        self.assertEqual(q2["p_value"], 0.667)
+        self.assertEqual([choice["count"] for choice in q1["choices"]], [1, 1, 0])
+        self.assertEqual([choice["rate"] for choice in q1["choices"]], [0.333, 0.333, 0.0])
+        self.assertEqual(report["mean_correct"], 1.0)
+
+    def test_closing_an_attempt_updates_the_cached_report(self):
+        analysis.item_analysis(self.exam.pk)
+        with self.assertNumQueries(0):
+            analysis.item_analysis(self.exam.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            attempts.submit(self.exam, self.running.pk)
+
+        self.assertEqual(analysis.item_analysis(self.exam.pk)["takers"], 4)
+
+    def test_every_started_attempt_counts_once_the_exam_ended(self):
+        Exam.objects.filter(pk=self.exam.pk).update(end_time=timezone.now() - timedelta(hours=1))
+        report = analysis.item_analysis(self.exam.pk)
+        self.assertEqual(report["takers"], 4)
+        self.assertEqual(self.items(report)[self.q1.pk]["p_value"], 0.5)
+
+    def test_an_exam_nobody_finished(self):
+        ExamResult.objects.update(submitted_at=None)
+        report = analysis.item_analysis(self.exam.pk)
+        self.assertEqual((report["takers"], report["kr20"]), (0, None))
+        self.assertIsNone(self.items(report)[self.q1.pk]["p_value"])
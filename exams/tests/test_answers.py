@@ -0,0 +1,83 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from exams import analysis, answers, attempts, delivery, storage
+from exams.models import ExamResult
+
+from .helpers import ExamTestCase
+
+
+class UpsertTests(ExamTestCase):
+    def test_answers_are_overwritten_in_place(self):
+        student = self.student(1)
+        answers.upsert(self.exam.pk, student.pk, [(self.q1.pk, self.a1[0].pk, None), (self.q3.pk, None, "First.")])
+        answers.upsert(self.exam.pk, student.pk, [(self.q1.pk, self.a1[2].pk, None), (self.q3.pk, None, "Second.")])
+
+        self.assertEqual(storage.saved_answers(self.exam.pk, student.pk), {
+            self.q1.pk: (self.a1[2].pk, None), self.q3.pk: (None, "Second."),
+        })
+
+    def test_closed_attempts_and_stale_batches_are_rejected(self):
+        student = self.student(1)
+        self.assertTrue(answers.upsert(self.exam.pk, student.pk, [(self.q1.pk, self.a1[0].pk, None)], seq=2))
+        self.assertFalse(answers.upsert(self.exam.pk, student.pk, [(self.q1.pk, self.a1[1].pk, None)], seq=1))
+        self.assertFalse(answers.upsert(self.exam.pk, student.pk, [(self.q1.pk, self.a1[1].pk, None)], seq=2))
+        self.assertEqual(storage.saved_answers(self.exam.pk, student.pk), {self.q1.pk: (self.a1[0].pk, None)})
+
+        ExamResult.objects.filter(exam=self.exam, student=student).update(submitted_at=timezone.now())
+        with self.assertRaises(answers.AttemptClosed):
+            answers.upsert(self.exam.pk, student.pk, [(self.q1.pk, self.a1[1].pk, None)], seq=3)
+
+    def test_answers_are_accepted_for_the_grace_period_only(self):
+        recent = self.student(1, deadline=timezone.now() - attempts.grace() / 2)
+        expired = self.student(2, deadline=timezone.now() - attempts.grace() - timedelta(seconds=1))
+
+        self.assertTrue(answers.upsert(self.exam.pk, recent.pk, [(self.q1.pk, self.a1[0].pk, None)]))
+        with self.assertRaises(answers.AttemptClosed):
+            answers.upsert(self.exam.pk, expired.pk, [(self.q1.pk, self.a1[0].pk, None)])
+
+    def test_autosaves_leave_the_item_analysis_cached(self):
+        student = self.student(1)
+        with mock.patch.object(analysis, "forget") as forget:
+            answers.upsert(self.exam.pk, student.pk, [(self.q1.pk, self.a1[0].pk, None)])
+        forget.assert_not_called()
+
+        with mock.patch.object(analysis, "forget") as forget, self.captureOnCommitCallbacks(execute=True):
+            attempts.submit(self.exam, student.pk)
+        forget.assert_called_once_with(self.exam.pk)
+
+
+class ValidationTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.choices = delivery.choice_map(self.exam.pk)
+
+    def test_a_valid_batch(self):
+        rows = answers.validate(self.choices, {
+            str(self.q1.pk): {"choice": self.a1[1].pk}, str(self.q3.pk): {"text": "Because."},
+        })
+        self.assertEqual(rows, [(self.q1.pk, self.a1[1].pk, None), (self.q3.pk, None, "Because.")])
+
+    def test_every_error_is_reported(self):
+        with self.assertRaises(answers.InvalidAnswers) as raised:
+            answers.validate(self.choices, {
+                str(self.q1.pk): {"choice": self.a2[0].pk},
+                str(self.q2.pk): {"choice": True},
+                str(self.q3.pk): {"text": 5},
+                "x": {"text": "?"},
+                "0": {"text": "?"},
+            })
+        self.assertEqual(len(raised.exception.errors), 5)
+
+        with self.assertRaises(answers.InvalidAnswers):
+            answers.validate(self.choices, ["not", "a", "dict"])
+
+    def test_form_posts(self):
+        self.assertEqual(answers.from_form(self.choices, self.q1.pk, str(self.a1[0].pk), None), (self.q1.pk, self.a1[0].pk, None))
+        self.assertEqual(answers.from_form(self.choices, self.q1.pk, "", None), (self.q1.pk, None, None))
+        self.assertEqual(answers.from_form(self.choices, self.q3.pk, "1", "Text"), (self.q3.pk, None, "Text"))
+        for question_id, choice in ((self.q1.pk, str(self.a2[0].pk)), (self.q1.pk, "x"), (0, "1")):
+            with self.subTest(question_id=question_id, choice=choice), self.assertRaises(answers.InvalidAnswers):
+                answers.from_form(self.choices, question_id, choice, None)
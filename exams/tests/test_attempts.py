@@ -0,0 +1,127 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from courses.tests.helpers import make_classroom, make_users
+from exams import answers, attempts
+from exams.models import Exam, ExamResult
+
+from .helpers import ExamTestCase
+
+
+class ProvisionTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        classroom = make_classroom(instructor=self.instructor)
+        self.enrolled = make_users("student", 3, prefix="enrolled")
+        classroom.students.add(*self.enrolled)
+        self.exam.course = classroom.course
+        self.exam.save()
+
+    def test_every_enrolled_student_gets_an_unstarted_attempt(self):
+        self.assertEqual(attempts.provision(self.exam), 3)
+        self.assertEqual(attempts.provision(self.exam), 3)
+
+        rows = ExamResult.objects.filter(exam=self.exam)
+        self.assertEqual(sorted(rows.values_list("student_id", flat=True)), sorted(s.pk for s in self.enrolled))
+        self.assertFalse(rows.filter(start_time__isnull=False).exists())
+
+    def test_the_command_provisions_upcoming_exams(self):
+        later = Exam.objects.create(
+            title="Later", instructor=self.instructor, course=self.exam.course, duration=30,
+            start_time=timezone.now() + timedelta(days=2), end_time=timezone.now() + timedelta(days=2, hours=1),
+        )
+        out = StringIO()
+        call_command("provision_exams", stdout=out)
+
+        self.assertEqual(ExamResult.objects.filter(exam=self.exam).count(), 3)
+        self.assertFalse(ExamResult.objects.filter(exam=later).exists())
+        self.assertIn("Provisioned 1 exam(s).", out.getvalue())
+
+
+class StartTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.taker = make_users("student", 1)[0]
+
+    def result(self):
+        return ExamResult.objects.get(exam=self.exam, student=self.taker)
+
+    def test_a_start_is_recorded_once(self):
+        ExamResult.objects.create(exam=self.exam, student=self.taker)
+        self.exam.duration = 30
+        first = timezone.now()
+
+        attempts.start(self.exam, self.taker.pk, first)
+        attempts.start(self.exam, self.taker.pk, first + timedelta(minutes=5))
+
+        self.assertEqual(self.result().start_time, first)
+        self.assertEqual(self.result().deadline, first + timedelta(minutes=30))
+
+    def test_unprovisioned_students_get_a_row_and_the_deadline_stops_at_the_end(self):
+        now = timezone.now()
+        attempts.start(self.exam, self.taker.pk, now)
+
+        self.assertEqual(self.result().start_time, now)
+        self.assertEqual(self.result().deadline, self.exam.end_time)
+
+    def test_the_start_view_opens_the_first_question(self):
+        self.client.force_login(self.taker)
+        response = self.client.get(reverse("exams:start_exam", args=[self.exam.pk]))
+
+        self.assertRedirects(
+            response, reverse("exams:take_question", args=[self.exam.pk, self.q1.pk]), fetch_redirect_response=False,
+        )
+        self.assertIsNotNone(self.result().start_time)
+
+
+class DeadlineTests(ExamTestCase):
+    def test_answers_are_accepted_until_the_deadline_plus_grace(self):
+        deadline = timezone.now() + timedelta(minutes=10)
+        student = self.student(1, deadline=deadline)
+
+        self.assertTrue(attempts.accepts_answers(self.exam.pk, student.pk, now=deadline + attempts.grace()))
+        self.assertFalse(attempts.accepts_answers(self.exam.pk, student.pk, now=deadline + attempts.grace() + timedelta(seconds=1)))
+        self.assertFalse(attempts.accepts_answers(self.exam.pk, 0))
+
+    def test_a_submission_elsewhere_closes_the_attempt_despite_the_cache(self):
+        student = self.student(1)
+        self.assertTrue(attempts.accepts_answers(self.exam.pk, student.pk))
+        ExamResult.objects.filter(student=student).update(submitted_at=timezone.now())
+
+        self.assertTrue(attempts.accepts_answers(self.exam.pk, student.pk))
+        self.assertFalse(attempts.lock_open(self.exam.pk, student.pk))
+
+    def test_late_saves_are_refused(self):
+        student = self.student(1, deadline=timezone.now() - attempts.grace() - timedelta(minutes=1))
+        self.client.force_login(student)
+
+        response = self.client.post(
+            reverse("exams:save_answers", args=[self.exam.pk]),
+            f'{{"answers": {{"{self.q3.pk}": {{"text": "late"}}}}}}', content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 409)
+
+        response = self.client.get(reverse("exams:take_question", args=[self.exam.pk, self.q1.pk]))
+        self.assertRedirects(response, reverse("exams:finish_exam", args=[self.exam.pk]), fetch_redirect_response=False)
+
+
+class SweepTests(ExamTestCase):
+    def test_expired_attempts_are_scored_and_closed_at_their_deadline(self):
+        expired, running = self.student(1), self.student(2)
+        for student in (expired, running):
+            answers.upsert(self.exam.pk, student.pk, [(self.q1.pk, self.a1[0].pk, None)])
+        deadline = timezone.now() - attempts.grace() - timedelta(minutes=1)
+        ExamResult.objects.filter(student=expired).update(deadline=deadline)
+
+        out = StringIO()
+        call_command("sweep_exams", stdout=out)
+
+        result = ExamResult.objects.get(student=expired)
+        self.assertEqual((result.submitted_at, result.score), (deadline, 2))
+        self.assertIsNone(ExamResult.objects.get(student=running).submitted_at)
+        self.assertIn("Finalized 1 attempt(s) of 1 exam(s)", out.getvalue())
+        self.assertEqual(attempts.sweep(), {})
@@ -0,0 +1,85 @@
+import json
+
+from django.urls import reverse
+
+from exams import delivery, storage
+from exams.models import Exam
+
+from .helpers import ExamTestCase
+
+
+class PayloadTests(ExamTestCase):
+    def test_the_payload_never_holds_the_answer_key(self):
+        self.a1[0].text = "</script><b>"
+        self.a1[0].save()
+
+        text = delivery.exam_payload(self.exam.pk)
+        payload = json.loads(text)
+
+        self.assertNotIn("is_correct", text)
+        self.assertNotIn("<", text)
+        self.assertEqual([q["id"] for q in payload["questions"]], [self.q1.pk, self.q2.pk, self.q3.pk])
+        self.assertEqual(payload["questions"][0]["choices"][0], {"id": self.a1[0].pk, "text": "</script><b>"})
+
+    def test_the_choice_map(self):
+        self.assertEqual(delivery.choice_map(self.exam.pk), {
+            self.q1.pk: frozenset(c.pk for c in self.a1),
+            self.q2.pk: frozenset(c.pk for c in self.a2),
+            self.q3.pk: None,
+        })
+        self.assertIsNone(delivery.choice_map(0))
+
+    def test_the_payload_is_built_once_until_the_exam_changes(self):
+        with self.assertNumQueries(3):
+            delivery.exam_payload(self.exam.pk)
+        with self.assertNumQueries(0):
+            delivery.exam_payload(self.exam.pk)
+            delivery.choice_map(self.exam.pk)
+
+        self.a2[1].text = "Three"
+        self.a2[1].save()
+        self.assertIn('"Three"', delivery.exam_payload(self.exam.pk))
+
+        self.exam.title = "Final"
+        self.exam.save()
+        self.assertIn('"Final"', delivery.exam_payload(self.exam.pk))
+
+
+class SinglePageTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        Exam.objects.filter(pk=self.exam.pk).update(delivery_mode=Exam.DELIVERY_SINGLE)
+        self.taker = self.student(1)
+        self.client.force_login(self.taker)
+        self.url = reverse("exams:save_answers", args=[self.exam.pk])
+
+    def save(self, body):
+        return self.client.post(self.url, json.dumps(body), content_type="application/json")
+
+    def test_the_exam_page_embeds_the_payload_and_saved_answers(self):
+        self.save({"seq": 1, "answers": {str(self.q3.pk): {"text": "Because."}}})
+
+        response = self.client.get(reverse("exams:take_exam", args=[self.exam.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["payload"], delivery.exam_payload(self.exam.pk))
+        self.assertEqual(response.context["answers"], {str(self.q3.pk): {"choice": None, "text": "Because."}})
+
+    def test_a_batch_is_saved_in_one_request(self):
+        response = self.save({"seq": 1, "answers": {
+            str(self.q1.pk): {"choice": self.a1[0].pk}, str(self.q3.pk): {"text": "Because."},
+        }})
+
+        self.assertEqual(response.json(), {"seq": 1, "saved": [self.q1.pk, self.q3.pk]})
+        self.assertEqual(storage.saved_answers(self.exam.pk, self.taker.pk), {
+            self.q1.pk: (self.a1[0].pk, None), self.q3.pk: (None, "Because."),
+        })
+
+    def test_invalid_batches_are_refused_whole(self):
+        response = self.save({"answers": {
+            str(self.q1.pk): {"choice": self.a2[0].pk}, str(self.q3.pk): {"text": "Because."},
+        }})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(storage.saved_answers(self.exam.pk, self.taker.pk), {})
+        self.assertEqual(self.save({"seq": "2", "answers": {}}).status_code, 400)
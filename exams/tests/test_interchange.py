@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import zipfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.urls import reverse
+
+from courses.models import Course, StoredBlob
+from courses.tests.helpers import make_classroom, use_temp_dirs
+from exams import interchange
+from exams.models import Choice, Exam, Question
+
+from .helpers import ExamTestCase, User
+
+
+def zip_upload(questions, media=()):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("exam.json", json.dumps({"questions": questions}))
+        for name in media:
+            archive.writestr(name, b"\x89PNG")
+    return SimpleUploadedFile("exam.zip", buffer.getvalue())
+
+
+class InterchangeTests(ExamTestCase):
+    def export(self, fmt):
+        data = b"".join(
+            piece.encode() if isinstance(piece, str) else piece for piece in interchange.stream(self.exam, fmt)
+        )
+        return SimpleUploadedFile(f"exam.{fmt}", data)
+
+    def import_into_new_exam(self, upload):
+        copy = Exam.objects.create(
+            title="Copy", instructor=self.instructor,
+            start_time=self.exam.start_time, end_time=self.exam.end_time, duration=60,
+        )
+        return copy, interchange.import_exam(copy, upload)
+
+    def contents(self, exam):
+        return [
+            (q.text, q.qtype, q.points, [(c.text, c.is_correct) for c in q.choices.order_by("id")])
+            for q in Question.objects.filter(exam=exam).order_by("id")
+        ]
+
+    def test_every_format_imports_back_as_exported(self):
+        for fmt in interchange.FORMATS:
+            with self.subTest(fmt=fmt):
+                copy, result = self.import_into_new_exam(self.export(fmt))
+                self.assertEqual(result["warnings"], [])
+                self.assertEqual((result["questions"], result["choices"]), (3, 6))
+                self.assertEqual(self.contents(copy), self.contents(self.exam))
+                copy.refresh_from_db()
+                self.assertEqual(copy.total_marks, 10)
+
+    def test_media_outside_a_zip_is_skipped_with_a_warning(self):
+        exported = json.loads(self.export(interchange.JSON).read())
+        exported["questions"][0]["image"] = "exam_media/images/map.png"
+        upload = SimpleUploadedFile("exam.json", json.dumps(exported).encode())
+
+        copy, result = self.import_into_new_exam(upload)
+
+        self.assertEqual(len(result["warnings"]), 1)
+        self.assertFalse(Question.objects.get(exam=copy, text="Capital of France?").image_file)
+
+    def test_invalid_questions_are_all_reported_and_nothing_is_written(self):
+        upload = zip_upload([
+            {"text": "", "choices": [{"text": "a", "is_correct": True}, {"text": "b"}]},
+            {"text": "One choice", "choices": [{"text": "a", "is_correct": True}]},
+        ])
+
+        with self.assertRaises(interchange.InvalidExamFile) as raised:
+            self.import_into_new_exam(upload)
+
+        self.assertEqual(len(raised.exception.errors), 2)
+        self.assertEqual(Question.objects.exclude(exam=self.exam).count(), 0)
+
+    def test_media_written_by_a_failed_import_are_deleted(self):
+        media_root = os.path.join(use_temp_dirs(self, MEDIA_ROOT="media"), "media")
+        upload = zip_upload(
+            [{"text": "Where is this?", "image": "map.png",
+              "choices": [{"text": "Paris", "is_correct": True}, {"text": "Lyon"}]}],
+            media=["map.png"],
+        )
+
+        with mock.patch.object(Choice.objects, "bulk_create", side_effect=DatabaseError), \
+                self.captureOnCommitCallbacks(execute=True), self.assertRaises(DatabaseError):
+            self.import_into_new_exam(upload)
+
+        self.assertEqual([files for _, _, files in os.walk(os.path.join(media_root, "exam_media")) if files], [])
+        self.assertFalse(StoredBlob.objects.exists())
+        self.assertEqual(Question.objects.exclude(exam=self.exam).count(), 0)
+
+
+class ExportPermissionTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.exam.course = Course.objects.create(title="Geography")
+        self.exam.save()
+        self.other = User.objects.create_user(email="other@example.com", password="x", role="instructor")
+
+    def export(self, user):
+        self.client.force_login(user)
+        return self.client.get(reverse("exams:exam_export", args=[self.exam.pk]))
+
+    def test_the_exams_instructor_can_export(self):
+        self.assertEqual(self.export(self.instructor).status_code, 200)
+
+    def test_other_instructors_need_a_class_of_the_course(self):
+        self.assertEqual(self.export(self.other).status_code, 403)
+
+        make_classroom(instructor=self.other, course=self.exam.course)
+        self.assertEqual(self.export(self.other).status_code, 200)
+
+    def test_a_class_without_the_exams_course_does_not_count(self):
+        self.exam.course = None
+        self.exam.save()
+        make_classroom(instructor=self.other)
+        self.assertEqual(self.export(self.other).status_code, 403)
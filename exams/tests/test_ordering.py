@@ -0,0 +1,37 @@
+from exams import ordering
+from exams.models import Question
+
+from .helpers import ExamTestCase
+
+
+class QuestionOrderTests(ExamTestCase):
+    def test_moving_between_questions(self):
+        exam_id = self.exam.pk
+        self.assertEqual(ordering.first_question_id(exam_id), self.q1.pk)
+        self.assertEqual(ordering.next_question_id(exam_id, self.q1.pk), self.q2.pk)
+        self.assertEqual(ordering.previous_question_id(exam_id, self.q2.pk), self.q1.pk)
+        self.assertEqual(ordering.position(exam_id, self.q3.pk), 2)
+
+        self.assertIsNone(ordering.next_question_id(exam_id, self.q3.pk))
+        self.assertIsNone(ordering.previous_question_id(exam_id, self.q1.pk))
+        self.assertIsNone(ordering.next_question_id(exam_id, 0))
+
+    def test_the_order_is_read_from_the_cache(self):
+        ordering.question_order(self.exam.pk)
+        with self.assertNumQueries(0):
+            ordering.next_question_id(self.exam.pk, self.q1.pk)
+            ordering.position(self.exam.pk, self.q2.pk)
+
+    def test_adding_or_deleting_a_question_drops_the_order(self):
+        ordering.question_order(self.exam.pk)
+
+        q4, _ = self.question("Last?", 1, ["yes", "no"], correct={0})
+        self.assertEqual(ordering.next_question_id(self.exam.pk, self.q3.pk), q4.pk)
+
+        self.q2.delete()
+        self.assertEqual(ordering.next_question_id(self.exam.pk, self.q1.pk), self.q3.pk)
+
+    def test_an_exam_without_questions(self):
+        Question.objects.filter(exam=self.exam).delete()
+        ordering.forget(self.exam.pk)
+        self.assertIsNone(ordering.first_question_id(self.exam.pk))
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from exams import answers, scoring
+from exams.models import Exam, ExamResult
+from grades.models import Grade
+
+from .helpers import ExamTestCase
+
+
+class ScoringTests(ExamTestCase):
+    def test_scores_weigh_questions_by_points(self):
+        full, half, blank = self.student(1), self.student(2), self.student(3)
+        answers.upsert(self.exam.pk, full.pk, [(self.q1.pk, self.a1[0].pk, None), (self.q2.pk, self.a2[2].pk, None)])
+        answers.upsert(self.exam.pk, half.pk, [(self.q1.pk, self.a1[1].pk, None), (self.q2.pk, self.a2[0].pk, None)])
+        answers.upsert(self.exam.pk, blank.pk, [(self.q3.pk, None, "Because.")])
+        ExamResult.objects.filter(exam=self.exam).update(submitted_at=timezone.now())
+
+        scores = scoring.score_exam(self.exam)
+
+        self.assertEqual(scores, {full.pk: 5, half.pk: 3, blank.pk: 0})
+        self.assertEqual(ExamResult.objects.get(exam=self.exam, student=full).score, 5)
+        self.assertEqual(scoring.possible_points(self.exam.pk), 10)
+
+    def test_running_attempts_are_not_scored(self):
+        running = self.student(1)
+        expired = self.student(2, deadline=timezone.now() - timedelta(minutes=5))
+        answers.upsert(self.exam.pk, running.pk, [(self.q1.pk, self.a1[0].pk, None)])
+
+        scores = scoring.score_exam(self.exam)
+
+        self.assertEqual(scores, {expired.pk: 0})
+        self.assertEqual(ExamResult.objects.get(exam=self.exam, student=running).score, 0)
+
+    def test_every_attempt_is_closed_once_the_exam_ended(self):
+        running = self.student(1)
+        answers.upsert(self.exam.pk, running.pk, [(self.q1.pk, self.a1[0].pk, None)])
+        Exam.objects.filter(pk=self.exam.pk).update(end_time=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(scoring.score_exam(self.exam), {running.pk: 2})
+
+    def test_approving_publishes_grades(self):
+        student = self.student(1)
+        answers.upsert(self.exam.pk, student.pk, [(self.q2.pk, self.a2[0].pk, None)])
+        ExamResult.objects.filter(exam=self.exam).update(submitted_at=timezone.now())
+
+        scoring.score_exam(self.exam, approve=True)
+
+        grade = Grade.objects.get(exam=self.exam, student=student)
+        self.assertEqual((grade.score, grade.max_score, grade.is_published), (3, 10, True))
+        self.assertTrue(ExamResult.objects.get(exam=self.exam, student=student).is_approved)
+
+
+class ScoreViewTests(ExamTestCase):
+    def test_instructors_score_only_their_own_exams(self):
+        url = reverse("exams:exam_score", args=[self.exam.pk])
+        other = get_user_model().objects.create_user(email="other@example.com", password="x", role="instructor")
+
+        self.client.force_login(other)
+        self.assertEqual(self.client.post(url).status_code, 403)
+
+        self.client.force_login(self.instructor)
+        self.assertRedirects(self.client.post(url), reverse("exams:exam_detail", args=[self.exam.pk]), fetch_redirect_response=False)
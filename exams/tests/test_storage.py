@@ -0,0 +1,60 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from exams import answers, scoring, storage
+from exams.models import Exam, ExamResult, StudentAnswer
+
+from .helpers import ExamTestCase
+
+
+class AnswerStorageTests(ExamTestCase):
+    def test_rows_and_packed_convert_both_ways(self):
+        students = [self.student(n) for n in range(3)]
+        answers.upsert(self.exam.pk, students[0].pk, [
+            (self.q1.pk, self.a1[0].pk, None), (self.q2.pk, self.a2[2].pk, None), (self.q3.pk, None, "Because."),
+        ])
+        answers.upsert(self.exam.pk, students[1].pk, [(self.q1.pk, self.a1[1].pk, None)])
+        answers.upsert(self.exam.pk, students[2].pk, [(self.q3.pk, None, "Only text.")])
+        saved = {student.pk: storage.saved_answers(self.exam.pk, student.pk) for student in students}
+        pairs = storage.choice_pairs(self.exam.pk).tolist()
+
+        self.assertEqual(storage.convert(self.exam, Exam.ANSWERS_PACKED), 3)
+        self.assertFalse(StudentAnswer.objects.filter(question__exam=self.exam).exists())
+        self.assertEqual(storage.answer_storage(self.exam.pk), Exam.ANSWERS_PACKED)
+        for student in students:
+            self.assertEqual(storage.saved_answers(self.exam.pk, student.pk), saved[student.pk])
+        self.assertEqual(sorted(storage.choice_pairs(self.exam.pk).tolist()), sorted(pairs))
+
+        self.assertEqual(storage.convert(self.exam, Exam.ANSWERS_ROWS), 3)
+        self.assertEqual(StudentAnswer.objects.filter(question__exam=self.exam).count(), 5)
+        self.assertFalse(ExamResult.objects.filter(exam=self.exam, answer_choices__isnull=False).exists())
+        for student in students:
+            self.assertEqual(storage.saved_answers(self.exam.pk, student.pk), saved[student.pk])
+
+    def test_packed_writes_replace_the_previous_answer(self):
+        student = self.student(1)
+        storage.convert(self.exam, Exam.ANSWERS_PACKED)
+        answers.upsert(self.exam.pk, student.pk, [(self.q1.pk, self.a1[0].pk, None), (self.q3.pk, None, "First.")])
+        answers.upsert(self.exam.pk, student.pk, [(self.q1.pk, self.a1[2].pk, None), (self.q3.pk, None, "Second.")])
+
+        self.assertEqual(storage.saved_answers(self.exam.pk, student.pk), {
+            self.q1.pk: (self.a1[2].pk, None), self.q3.pk: (None, "Second."),
+        })
+
+    def test_packed_answers_score_the_same(self):
+        student = self.student(1)
+        answers.upsert(self.exam.pk, student.pk, [(self.q1.pk, self.a1[0].pk, None), (self.q2.pk, self.a2[1].pk, None)])
+        storage.convert(self.exam, Exam.ANSWERS_PACKED)
+        ExamResult.objects.filter(exam=self.exam).update(submitted_at=timezone.now())
+
+        self.assertEqual(scoring.score_exam(self.exam), {student.pk: 2})
+
+    def test_open_exams_are_only_converted_with_force(self):
+        with self.assertRaises(CommandError):
+            call_command("convert_answers", self.exam.pk, to=Exam.ANSWERS_PACKED)
+        self.assertEqual(storage.answer_storage(self.exam.pk), Exam.ANSWERS_ROWS)
+
+        call_command("convert_answers", self.exam.pk, to=Exam.ANSWERS_PACKED, force=True, stdout=StringIO())
+        self.assertEqual(storage.answer_storage(self.exam.pk), Exam.ANSWERS_PACKED)
@@ -1,10 +1,11 @@
 from django.urls import path
 from .views import (
-    ExamListView, ExamCreateView, ExamUpdateView, ExamDetailView,
+    ExamListView, ExamCreateView, ExamUpdateView, ExamDetailView, ExamScoreView, ExamAnalysisView, ExamSimilarityView,
+    ExamImportView, ExamExportView,
     QuestionCreateView, QuestionUpdateView, QuestionDetailView,
     ChoiceCreateView, ChoiceUpdateView,QuestionDeleteView,ChoiceDeleteView,ExamDeleteView,
     submit_answer,
-    start_exam, take_question, finish_exam
+    start_exam, take_question, finish_exam, take_exam, save_answers
 )
 
 app_name = "exams"
@@ -16,6 +17,11 @@ urlpatterns = [
     path("<int:pk>/", ExamDetailView.as_view(), name="exam_detail"),
     path("<int:pk>/edit/", ExamUpdateView.as_view(), name="exam_edit"),
     path('<int:pk>/delete/', ExamDeleteView.as_view(), name='exam_delete'),
+    path("<int:pk>/score/", ExamScoreView.as_view(), name="exam_score"),
+    path("<int:pk>/analysis/", ExamAnalysisView.as_view(), name="exam_analysis"),
+    path("<int:pk>/similarity/", ExamSimilarityView.as_view(), name="exam_similarity"),
+    path("<int:pk>/import/", ExamImportView.as_view(), name="exam_import"),
+    path("<int:pk>/export/", ExamExportView.as_view(), name="exam_export"),
 
     # Questions
     path("<int:exam_id>/questions/add/", QuestionCreateView.as_view(), name="question_add"),
@@ -31,6 +37,8 @@ urlpatterns = [
     # Student exam flow
     path("<int:pk>/start/", start_exam, name="start_exam"),
     path("<int:exam_id>/question/<int:question_id>/", take_question, name="take_question"),
+    path("<int:pk>/take/", take_exam, name="take_exam"),
+    path("<int:exam_id>/answers/", save_answers, name="save_answers"),
     path("<int:pk>/finish/", finish_exam, name="finish_exam"),
     path("exam/<int:exam_id>/question/<int:question_id>/submit/", submit_answer, name="submit_answer"),
 ]
@@ -1,12 +1,20 @@
 from django.shortcuts import get_object_or_404, render, redirect
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
-from django.views.generic import ListView, CreateView, UpdateView, DetailView, DeleteView
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from django.views.generic import ListView, CreateView, UpdateView, DetailView, DeleteView, View
+from django.contrib import messages
+from django.core.exceptions import PermissionDenied
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse, reverse_lazy
 
-from .models import Exam, Question, Choice, StudentAnswer, ExamResult
-from .forms import ExamForm, QuestionForm, ChoiceForm
+from courses.models import Classroom
+
+from .models import Exam, Question, Choice, ExamResult
+from .forms import ExamForm, ExamImportForm, QuestionForm, ChoiceForm
+import json
+from . import analysis, answers, attempts, delivery, interchange, ordering, scoring, similarity, storage
 
 
 class ExamListView(LoginRequiredMixin, ListView):
@@ -61,6 +69,100 @@ class ExamDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return self.request.user.role in ["manager", "employee", "instructor"]
 
 
+class ExamScoreView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Score every finished attempt of the exam at once and publish the results as grades."""
+
+    def test_func(self):
+        return self.request.user.role in ["manager", "employee", "instructor"]
+
+    def post(self, request, pk):
+        exam = get_object_or_404(Exam, pk=pk)
+        if request.user.role == "instructor" and exam.instructor_id != request.user.pk:
+            raise PermissionDenied("You can only score your own exams.")
+        scores = scoring.score_exam(exam, approve=True)
+        messages.success(request, f"Scored and published {len(scores)} finished attempt(s).")
+        return redirect("exams:exam_detail", pk=exam.pk)
+
+
+class ExamAnalysisView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+    model = Exam
+    template_name = "exams/exam_analysis.html"
+
+    def test_func(self):
+        return self.request.user.role in ["manager", "employee", "instructor"]
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx.update(analysis.item_analysis(self.object.pk))
+        return ctx
+
+
+class ExamSimilarityView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+    model = Exam
+    template_name = "exams/exam_similarity.html"
+
+    def test_func(self):
+        return self.request.user.role in ["manager", "employee", "instructor"]
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx.update(similarity.exam_report(self.object))
+        return ctx
+
+
+class ExamImportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Append questions and choices from an exam file (see ``exams.interchange``)."""
+    template_name = "exams/exam_import.html"
+
+    def test_func(self):
+        return self.request.user.role in ["manager", "employee", "instructor"]
+
+    def get(self, request, pk):
+        exam = get_object_or_404(Exam, pk=pk)
+        return render(request, self.template_name, {"exam": exam, "form": ExamImportForm()})
+
+    def post(self, request, pk):
+        exam = get_object_or_404(Exam, pk=pk)
+        form = ExamImportForm(request.POST, request.FILES)
+        errors = []
+        if form.is_valid():
+            try:
+                result = interchange.import_exam(exam, form.cleaned_data["file"])
+            except interchange.InvalidExamFile as e:
+                errors = e.errors
+            else:
+                messages.success(
+                    request, f"Imported {result['questions']} question(s) and {result['choices']} choice(s).",
+                )
+                for warning in result["warnings"]:
+                    messages.warning(request, warning)
+                return redirect("exams:exam_detail", pk=exam.pk)
+        return render(request, self.template_name, {"exam": exam, "form": form, "errors": errors})
+
+
+class ExamExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Download the exam's questions as ``?format=json`` (default), ``csv`` or ``zip`` with media."""
+
+    def test_func(self):
+        return self.request.user.role in ["manager", "employee", "instructor"]
+
+    def get(self, request, pk):
+        exam = get_object_or_404(Exam, pk=pk)
+        # The export carries the answer key.
+        if request.user.role == "instructor" and not (
+            exam.instructor_id == request.user.pk
+            or exam.course_id is not None
+            and Classroom.objects.filter(instructor=request.user, course_id=exam.course_id).exists()
+        ):
+            raise PermissionDenied("You can only export exams of your own courses.")
+        fmt = request.GET.get("format", interchange.JSON)
+        if fmt not in interchange.FORMATS:
+            fmt = interchange.JSON
+        response = StreamingHttpResponse(interchange.stream(exam, fmt), content_type=interchange.CONTENT_TYPES[fmt])
+        response["Content-Disposition"] = f'attachment; filename="exam_{exam.pk}.{fmt}"'
+        return response
+
+
 class QuestionCreateView(LoginRequiredMixin, CreateView):
     model = Question
     form_class = QuestionForm
@@ -156,26 +258,21 @@ class ChoiceDeleteView(LoginRequiredMixin, DeleteView):
 @login_required
 def start_exam(request, pk):
     exam = get_object_or_404(Exam, pk=pk)
-    
-    exam_result, created = ExamResult.objects.get_or_create(
-        student=request.user,
-        exam=exam,
-        defaults={'start_time': timezone.now()}
-    )
-
-    if not created and exam_result.start_time is None:
-        exam_result.start_time = timezone.now()
-        exam_result.save()
 
     now = timezone.now()
     if now < exam.start_time or now > exam.end_time:
         return render(request, "exams/out_of_time.html", {"exam": exam})
 
-    first_q = exam.questions.order_by("id").first()
-    if not first_q:
+    attempts.start(exam, request.user.pk, now)
+
+    if exam.delivery_mode == Exam.DELIVERY_SINGLE:
+        return redirect("exams:take_exam", pk=exam.id)
+
+    first_question_id = ordering.first_question_id(exam.id)
+    if first_question_id is None:
         return render(request, "exams/no_questions.html", {"exam": exam})
 
-    return redirect("exams:take_question", exam_id=exam.id, question_id=first_q.id)
+    return redirect("exams:take_question", exam_id=exam.id, question_id=first_question_id)
 
 
 @login_required
@@ -183,32 +280,30 @@ def take_question(request, exam_id, question_id):
     exam = get_object_or_404(Exam, id=exam_id)
     question = get_object_or_404(Question, id=question_id, exam=exam)
     exam_result = get_object_or_404(ExamResult, exam=exam, student=request.user)
+    if exam_result.start_time is None:
+        return redirect("exams:start_exam", pk=exam.id)
 
-    remaining_time = (exam_result.start_time + timezone.timedelta(minutes=exam.duration) - timezone.now()).total_seconds()
-    remaining_time = max(0, int(remaining_time))
+    now = timezone.now()
+    if now > attempts.remember(exam_result):
+        return redirect("exams:finish_exam", pk=exam.id)
+    remaining_time = max(0, int((exam_result.deadline - now).total_seconds()))
 
-    questions = list(Question.objects.filter(exam=exam).order_by("id"))
-    current_index = questions.index(question)
-    next_question = questions[current_index + 1] if current_index + 1 < len(questions) else None
+    next_question_id = ordering.next_question_id(exam.id, question.id)
 
     if request.method == "POST":
-        if question.qtype in ["mcq", "audio_mcq", "image_mcq"]:
-            selected_choice = request.POST.get("choice")
-            StudentAnswer.objects.update_or_create(
-                student=request.user,
-                question=question,
-                defaults={"choice_id": selected_choice, "text_answer": None}
-            )
-        else:
-            text_answer = request.POST.get("text_answer")
-            StudentAnswer.objects.update_or_create(
-                student=request.user,
-                question=question,
-                defaults={"text_answer": text_answer, "choice_id": None}
+        try:
+            row = answers.from_form(
+                delivery.choice_map(exam.id) or {}, question.id, request.POST.get("choice"), request.POST.get("text_answer"),
             )
-
-        if next_question:
-            return redirect("exams:take_question", exam_id=exam.id, question_id=next_question.id)
+            answers.upsert(exam.id, request.user.pk, [row])
+        except answers.InvalidAnswers:
+            messages.error(request, "Please choose one of the question's options.")
+            return redirect("exams:take_question", exam_id=exam.id, question_id=question.id)
+        except answers.AttemptClosed:
+            return redirect("exams:finish_exam", pk=exam.id)
+
+        if next_question_id:
+            return redirect("exams:take_question", exam_id=exam.id, question_id=next_question_id)
         return redirect("exams:finish_exam", pk=exam.id)
 
     return render(request, "exams/take_question.html", {
@@ -216,29 +311,97 @@ def take_question(request, exam_id, question_id):
         "question": question,
         "choices": question.choices.all(),
         "remaining_time": remaining_time,
-        "next_question": next_question,
+        "next_question_id": next_question_id,
+        "previous_question_id": ordering.previous_question_id(exam.id, question.id),
+    })
+
+
+
+@login_required
+def take_exam(request, pk):
+    """Single-page delivery: the whole exam in one response, answers saved by ``save_answers``."""
+    exam = get_object_or_404(Exam, pk=pk)
+    exam_result = get_object_or_404(ExamResult, exam=exam, student=request.user)
+    if exam_result.start_time is None:
+        return redirect("exams:start_exam", pk=exam.id)
+
+    now = timezone.now()
+    if now < exam.start_time or now > exam.end_time:
+        return render(request, "exams/out_of_time.html", {"exam": exam})
+
+    attempts.remember(exam_result)
+    if exam_result.submitted_at is not None or now > exam_result.deadline:
+        return redirect("exams:finish_exam", pk=exam.id)
+    remaining_time = max(0, int((exam_result.deadline - now).total_seconds()))
+
+    saved = {
+        str(question_id): {"choice": choice_id, "text": text_answer}
+        for question_id, (choice_id, text_answer) in storage.saved_answers(exam.pk, request.user.pk).items()
+    }
+
+    return render(request, "exams/take_exam.html", {
+        "exam": exam,
+        "payload": delivery.exam_payload(exam.pk),
+        "answers": saved,
+        "remaining_time": remaining_time,
     })
 
 
+@login_required
+@require_POST
+def save_answers(request, exam_id):
+    """
+    Autosave a batch of answers from the single-page exam:
+    ``{"seq": n, "answers": {question_id: {"choice": id} | {"text": str}}}``.
+    The whole batch is validated against the cached question map and written
+    with one upsert; a batch older than one already saved is ignored, and
+    after the attempt's deadline (or submission) nothing is written.
+    """
+    if not attempts.accepts_answers(exam_id, request.user.pk):
+        return JsonResponse({"error": "This attempt is closed."}, status=409)
+    choices = delivery.choice_map(exam_id)
+    if choices is None:
+        return JsonResponse({"error": "Exam not found."}, status=404)
+    try:
+        body = json.loads(request.body or b"{}")
+        seq = body.get("seq")
+        rows = answers.validate(choices, body.get("answers", {}))
+    except (ValueError, AttributeError):
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+    except answers.InvalidAnswers as e:
+        return JsonResponse({"error": "Invalid answers.", "answers": e.errors}, status=400)
+    if seq is not None and (not isinstance(seq, int) or isinstance(seq, bool)):
+        return JsonResponse({"error": "seq must be an integer."}, status=400)
+
+    try:
+        if not answers.upsert(exam_id, request.user.pk, rows, seq):
+            return JsonResponse({"seq": seq, "saved": [], "stale": True})
+    except answers.AttemptClosed:
+        return JsonResponse({"error": "This attempt is closed."}, status=409)
+    return JsonResponse({"seq": seq, "saved": [question_id for question_id, _, _ in rows]})
+
 
 @login_required
 def submit_answer(request, exam_id, question_id):
     question = get_object_or_404(Question, id=question_id, exam_id=exam_id)
+    if not attempts.accepts_answers(exam_id, request.user.pk):
+        return redirect("exams:finish_exam", pk=exam_id)
 
-
-    StudentAnswer.objects.update_or_create(
-        student=request.user,
-        question=question,
-        defaults={
-            "choice_id": request.POST.get("choice"),
-            "text_answer": request.POST.get("text_answer")
-        }
-    )
+    try:
+        row = answers.from_form(
+            delivery.choice_map(exam_id) or {}, question.id, request.POST.get("choice"), request.POST.get("text_answer"),
+        )
+        answers.upsert(exam_id, request.user.pk, [row])
+    except answers.InvalidAnswers:
+        messages.error(request, "Please choose one of the question's options.")
+        return redirect("exams:take_question", exam_id=exam_id, question_id=question.id)
+    except answers.AttemptClosed:
+        return redirect("exams:finish_exam", pk=exam_id)
 
 
-    next_q = Question.objects.filter(exam_id=exam_id, id__gt=question.id).order_by("id").first()
-    if next_q:
-        return redirect("exams:take_question", exam_id=exam_id, question_id=next_q.id)
+    next_question_id = ordering.next_question_id(exam_id, question.id)
+    if next_question_id:
+        return redirect("exams:take_question", exam_id=exam_id, question_id=next_question_id)
     else:
         return redirect("exams:finish_exam", pk=exam_id)
 
@@ -247,18 +410,7 @@ def finish_exam(request, pk):
     exam = get_object_or_404(Exam, pk=pk)
 
 
-    correct_count = StudentAnswer.objects.filter(
-        student=request.user,
-        question__exam=exam,
-        choice__is_correct=True
-    ).count()
-
-
-    result, created = ExamResult.objects.update_or_create(
-        student=request.user,
-        exam=exam,
-        defaults={"score": correct_count}
-    )
+    score = attempts.submit(exam, request.user.pk)
 
-    return render(request, "exams/finished.html", {"exam": exam, "score": correct_count})
+    return render(request, "exams/finished.html", {"exam": exam, "score": score})
 
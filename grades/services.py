@@ -0,0 +1,110 @@
+"""
+Bulk grade writes.
+
+``grades.signals`` keeps a Grade per approved ExamResult and refreshes the
+student's report card on every Grade save, one row at a time. Scoring a whole
+exam goes through here instead: ``upsert_exam_grades`` writes every student's
+Grade with one upsert and ``refresh_report_cards`` recomputes the affected
+report cards from one grouped aggregate, so the cost does not grow with a
+query (or several) per student.
+"""
+from decimal import Decimal
+
+from django.db.models import Avg, Case, Count, DecimalField, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Grade, ReportCard
+
+
+TWO_PLACES = Decimal("0.01")
+
+
+def current_term(now=None):
+    month = (now or timezone.now()).month
+    if month in [9, 10, 11, 12]:
+        return "fall"
+    if month in [1, 2, 3, 4, 5]:
+        return "spring"
+    return "summer"
+
+
+def exam_grade_type(exam):
+    return "final" if "final" in exam.title.lower() else "midterm"
+
+
+def upsert_exam_grades(exam, scores, max_score):
+    """
+    Create or update the published Grade of each ``{student_id: score}`` for
+    ``exam`` in one statement, then refresh the students' report cards.
+    """
+    if not scores:
+        return 0
+    now = timezone.now()
+    max_score = Decimal(str(max_score)).quantize(TWO_PLACES)
+    Grade.objects.bulk_create(
+        [
+            Grade(
+                student_id=student_id, exam=exam, course_id=exam.course_id,
+                score=Decimal(str(score)).quantize(TWO_PLACES), max_score=max_score,
+                grade_type=exam_grade_type(exam), graded_at=now, is_published=True,
+            )
+            for student_id, score in scores.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["student", "exam"],
+        update_fields=["course", "score", "max_score", "grade_type", "graded_at", "is_published", "updated_at"],
+    )
+    if exam.course_id:
+        refresh_report_cards(list(scores), exam.course)
+    return len(scores)
+
+
+def refresh_report_cards(student_ids, course):
+    """
+    ``ReportCard.calculate_statistics`` for the current-term cards of
+    ``student_ids`` in ``course``, creating missing cards, in a fixed number
+    of queries.
+    """
+    term, year = current_term(), timezone.now().year
+    percentage = Case(
+        When(max_score=0, then=Value(0.0)),
+        default=Cast(F("score"), FloatField()) * 100 / Cast(F("max_score"), FloatField()),
+        output_field=FloatField(),
+    )
+    stats = {
+        row["student_id"]: row
+        for row in (
+            Grade.objects.filter(student_id__in=student_ids, course=course, is_published=True)
+            .order_by()
+            .values("student_id")
+            .annotate(
+                total=Count("pk"),
+                average=Avg("score", output_field=DecimalField()),
+                weighted=Sum(percentage * Cast(F("weight"), FloatField()) / 100),
+                weights=Sum(Cast(F("weight"), FloatField())),
+            )
+        )
+    }
+
+    classroom = course.classes.first()
+    ReportCard.objects.bulk_create(
+        [
+            ReportCard(student_id=student_id, course=course, term=term, year=year, classroom=classroom)
+            for student_id in student_ids
+        ],
+        ignore_conflicts=True,
+    )
+    cards = list(ReportCard.objects.filter(student_id__in=student_ids, course=course, term=term, year=year))
+    now = timezone.now()
+    for card in cards:
+        card.updated_at = now
+        row = stats.get(card.student_id)
+        if row is None:
+            card.total_grades = 0
+            continue
+        card.total_grades = row["total"]
+        card.average_score = Decimal(str(row["average"] or 0)).quantize(TWO_PLACES)
+        card.gpa = Decimal(str(row["weighted"] / row["weights"] if row["weights"] else 0)).quantize(TWO_PLACES)
+    ReportCard.objects.bulk_update(cards, ["total_grades", "average_score", "gpa", "updated_at"], batch_size=500)
+    return len(cards)
@@ -5,6 +5,7 @@ from django.db import transaction
 from django.utils import timezone
 
 from .models import Grade, ReportCard
+from .services import current_term, exam_grade_type
 from courses.models import Submission
 from exams.models import ExamResult
 
@@ -43,7 +44,7 @@ def create_or_update_grade_from_examresult(sender, instance, created, **kwargs):
                     'course': instance.exam.course,
                     'score': instance.score,
                     'max_score': instance.exam.total_marks or 100,
-                    'grade_type': 'final' if 'final' in instance.exam.title.lower() else 'midterm',
+                    'grade_type': exam_grade_type(instance.exam),
                     'graded_at': timezone.now(),
                     'is_published': True  
                 }
@@ -55,14 +56,7 @@ def update_report_card_on_grade_change(sender, instance, **kwargs):
 
     if instance.is_published:  
         current_year = timezone.now().year
-        current_month = timezone.now().month
-        
-        if current_month in [9, 10, 11, 12]:
-            term = "fall"
-        elif current_month in [1, 2, 3, 4, 5]:
-            term = "spring"
-        else:
-            term = "summer"
+        term = current_term()
         
         report_card, created = ReportCard.objects.get_or_create(
             student=instance.student,
@@ -122,4 +116,13 @@ def create_grading_scale_for_course(sender, instance, created, **kwargs):
                     {"letter": "F", "min": 0, "max": 11.99},
                 ],
                 is_default=True
-            )
\ No newline at end of file
+            )
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def refresh_assignment_graded_count(sender, instance, **kwargs):
+    # A grade can move in and out of "graded" on any save, so recount the
+    # assignment rather than tracking the transition.
+    if instance.assignment_id:
+        from courses.counters import refresh_graded_counts
+        refresh_graded_counts([instance.assignment_id])
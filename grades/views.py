@@ -15,6 +15,7 @@ from django.core.exceptions import PermissionDenied
 
 from .models import Grade, ReportCard, GradingScale
 from courses.models import Course, Classroom, Submission, Assignment
+from courses.utils import pdf_service
 from exams.models import Exam, ExamResult
 from .forms import GradeForm, ReportCardForm, GradingScaleForm
 
@@ -385,20 +386,32 @@ class ReportCardPDFView(LoginRequiredMixin, UserPassesTestMixin, View):
     
     def get(self, request, pk):
         from django.http import FileResponse
-        import os
         
-        report_card = get_object_or_404(ReportCard, pk=pk)
+        report_card = get_object_or_404(
+            ReportCard.objects.select_related('student', 'course', 'classroom'), pk=pk
+        )
+        filename = f"report_card_{report_card.student.email}_{report_card.term}_{report_card.year}"
         
         if report_card.pdf_file:
             response = FileResponse(
                 report_card.pdf_file.open(),
                 as_attachment=True,
-                filename=f"report_card_{report_card.student.email}_{report_card.term}_{report_card.year}.pdf"
+                filename=f"{filename}.pdf"
             )
             return response
         
-        messages.error(request, "PDF file not available.")
-        return redirect('grades:reportcard_detail', pk=pk)
+        grades = Grade.objects.filter(
+            student=report_card.student,
+            course=report_card.course,
+            is_published=True
+        ).select_related('assignment', 'exam')
+        
+        context = {
+            'report_card': report_card,
+            'grades': grades,
+            'generated_date': timezone.now(),
+        }
+        return pdf_service.pdf_response(request, 'grades/reportcard_pdf.html', context, filename)
 
 
 # ========== Dashboard & Analytics ==========
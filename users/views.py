@@ -181,7 +181,7 @@ class AdminDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
                 cl_info = {
                     "id": cl.id,
                     "title": getattr(cl, "title", str(cl)),
-                    "students_count": getattr(cl, "students", []).count() if hasattr(cl, "students") else 0,
+                    "students_count": cl.student_count,
                     "avg_grade": None,
                 }
 